@@ -0,0 +1,171 @@
+"""Persistent, content-addressed cache for derived artifacts.
+
+Resampled grids, psychrometric tables, prepared model arrays and
+integrated KPIs are stored under ``.cache/artifacts`` keyed by a hash of
+everything they are derived from: the *contents* of the source files plus
+model parameters. Several Streamlit processes (or the batch CLI) can share
+one cache directory, so a fresh process warms up from disk instead of from
+the raw CSVs.
+
+Entries use the :mod:`datastore` layout (one ``.npy`` per array plus
+``meta.json``), are published with an atomic rename and are read back
+memory-mapped. Reading an entry refreshes its timestamp; when the cache
+grows past its size bound the least recently used entries are removed.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import datastore
+
+CACHE_DIR = os.path.join(".cache", "artifacts")
+# Bump when code producing cached artifacts changes in a way that alters results
+CACHE_VERSION = 3
+MAX_BYTES = int(os.environ.get("ARTIFACT_CACHE_MAX_MB", "512")) * 2**20
+
+_digests = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, rehashed only when its mtime or size changes."""
+    stat = os.stat(path)
+    stamp = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _digest_lock:
+        digest = _digests.get(stamp)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with _digest_lock:
+            _digests[stamp] = digest
+    return digest
+
+
+def dataset_digest(name):
+    return file_digest(datastore.SCHEMAS[name].path)
+
+
+def make_key(kind, *parts):
+    """Hex key of an artifact ``kind`` derived from ``parts`` (JSON-serialisable or dataclasses)."""
+    payload = json.dumps([CACHE_VERSION, kind, *parts], sort_keys=True, default=repr)
+    return f"{kind}-{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+
+class ArtifactCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def _load(self, key):
+        entry_dir = self._path(key)
+        try:
+            with open(os.path.join(entry_dir, "meta.json")) as f:
+                meta = json.load(f)
+            arrays = datastore._read_entry(entry_dir)
+            os.utime(entry_dir)
+        except (OSError, ValueError):
+            # Missing, or evicted by another process while reading
+            return None
+        return meta, arrays
+
+    def _store(self, key, arrays, meta):
+        datastore._write_entry(self._path(key), arrays, meta)
+        self.evict()
+
+    def arrays(self, key, compute):
+        """``{name: array}`` from the cache (memory-mapped) or from ``compute()``."""
+        hit = self._load(key)
+        if hit is not None:
+            return hit[1]
+        arrays = {k: np.ascontiguousarray(v) for k, v in compute().items()}
+        self._store(key, arrays, {"kind": "arrays"})
+        return arrays
+
+    def frame(self, key, compute):
+        """DataFrame with a DatetimeIndex or RangeIndex and numeric columns."""
+        hit = self._load(key)
+        if hit is not None:
+            meta, arrays = hit
+            if meta.get("index") == "datetime":
+                index = pd.DatetimeIndex(np.asarray(arrays.pop("__index__")).view("datetime64[ns]"), name=meta.get("index_name"))
+            else:
+                index = None
+            return pd.DataFrame(arrays, index=index, copy=False)
+        df = compute()
+        arrays = {c: df[c].to_numpy() for c in df.columns}
+        meta = {"kind": "frame", "index": None}
+        if isinstance(df.index, pd.DatetimeIndex):
+            arrays = {"__index__": df.index.as_unit("ns").asi8, **arrays}
+            meta.update(index="datetime", index_name=df.index.name)
+        self._store(key, arrays, meta)
+        return df
+
+    def json(self, key, compute):
+        """JSON-serialisable value (e.g. a dict of KPIs)."""
+        hit = self._load(key)
+        if hit is not None:
+            return hit[0]["value"]
+        value = compute()
+        self._store(key, {}, {"kind": "json", "value": value})
+        return value
+
+    def entries(self):
+        """``(last_used, bytes, key)`` of every published entry."""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                found.append((entry.stat().st_mtime, size, entry.name))
+            except OSError:
+                continue
+        return found
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if total <= self.max_bytes:
+                    break
+                # Renaming first hides the entry from other processes before it is deleted
+                trash = os.path.join(self.root, f".evict-{key}-{os.getpid()}")
+                try:
+                    os.rename(self._path(key), trash)
+                except OSError:
+                    continue
+                shutil.rmtree(trash, ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_default = None
+
+
+def default_cache():
+    """Process-wide cache at :data:`CACHE_DIR`."""
+    global _default
+    if _default is None:
+        _default = ArtifactCache()
+    return _default
@@ -0,0 +1,189 @@
+"""Headless batch runs of the energy model.
+
+Evaluates many configurations of one or all routes without the dashboard
+and writes the results as CSV or JSON, e.g. for nightly fleet reports::
+
+    python batch.py --cabins 20:401:20 --sfp 2.0 2.5 3.0 -o sweep.csv
+    python batch.py --route all --cabins 120 240 --workers 4 -o nightly.json
+    python batch.py --cabins 120 --window harbour=08:00-14:00 --window night=22:00-06:00
+
+Parameters given with several values are combined as a cartesian product.
+A route's prepared model arrays (grid, ambient enthalpy and density,
+cabin flow) are written once to ``.cache/batch`` and memory-mapped by
+every worker process, so workers share them instead of rebuilding or
+copying them. Entries are named after the model inputs (or a digest of
+the arrays) and evicted least recently used first, like :mod:`artifacts`.
+"""
+import argparse
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import datastore
+import energy
+from routes import RouteRegistry
+from scenarios import DEFAULT_WINDOWS, HeatingWindow
+
+BATCH_DIR = os.path.join(".cache", "batch")
+BATCH_MAX_BYTES = int(os.environ.get("BATCH_CACHE_MAX_MB", "256")) * 2**20
+
+_worker = {}
+
+
+def parse_values(tokens, cast=float):
+    """Values from CLI tokens; ``start:stop:step`` expands to a range (stop exclusive)."""
+    values = []
+    for token in tokens:
+        if ":" in token:
+            start, stop, step = (cast(p) for p in token.split(":"))
+            values.extend(np.arange(start, stop, step).tolist())
+        else:
+            values.append(cast(token))
+    return values
+
+
+def parse_window(text):
+    """``name=HH:MM-HH:MM`` (clock window) or ``name`` alone (full day)."""
+    name, _, span = text.partition("=")
+    if not span:
+        return HeatingWindow(name)
+    start, end = span.split("-")
+    return HeatingWindow(name, start, end)
+
+
+def config_table(params, grid=True):
+    """One row per configuration; ``params`` maps :class:`energy.EnergyConfig` fields to value lists."""
+    names = list(params)
+    values = [np.atleast_1d(params[n]) for n in names]
+    if grid:
+        rows = list(itertools.product(*values))
+        return pd.DataFrame(rows, columns=names)
+    return pd.DataFrame(dict(zip(names, np.broadcast_arrays(*values))))
+
+
+def arrays_digest(arrays):
+    """Hex digest of the names, dtypes and contents of ``{name: array}``."""
+    h = hashlib.sha1()
+    for name in sorted(arrays):
+        values = np.ascontiguousarray(arrays[name])
+        h.update(f"{name}:{values.dtype}:{values.shape}".encode())
+        h.update(values.data)
+    return h.hexdigest()
+
+
+def share_model(model, key=None, root=BATCH_DIR, max_bytes=BATCH_MAX_BYTES):
+    """Write ``model``'s arrays once per ``key``; returns the entry directory to memory-map.
+
+    Without a ``key`` the entry is named after the content of the arrays.
+    """
+    arrays = None
+    if key is None:
+        arrays = model.to_arrays()
+        key = arrays_digest(arrays)
+    cache = artifacts.ArtifactCache(root, max_bytes)
+    key = artifacts.make_key("batch-model", key)
+    cache.arrays(key, lambda: arrays if arrays is not None else model.to_arrays())
+    return os.path.join(cache.root, key)
+
+
+def _init_worker(entry_dir, p_atm, dt_h, windows):
+    arrays = datastore._read_entry(entry_dir)
+    _worker.update(model=energy.EnergyModel.from_arrays(arrays, p_atm, dt_h), windows=windows)
+
+
+def _sweep_chunk(params):
+    return _worker["model"].sweep(windows=_worker["windows"], **params)
+
+
+def run_batch(model, configs, windows=DEFAULT_WINDOWS, workers=None, shared_key=None, chunk_rows=None):
+    """Evaluate every row of ``configs`` on ``model``; rows are split across worker processes.
+
+    ``shared_key`` identifies the model's inputs (e.g. route and source
+    version) so the shared arrays are written only once per input; without
+    it they are keyed by a digest of their content.
+    """
+    workers = workers or os.cpu_count() or 1
+    n = len(configs)
+    if workers == 1 or n < 2:
+        return model.sweep(windows=windows, **{c: configs[c].to_numpy() for c in configs})
+
+    chunk_rows = chunk_rows or -(-n // workers)
+    chunks = [{c: configs[c].to_numpy()[i:i + chunk_rows] for c in configs} for i in range(0, n, chunk_rows)]
+    entry_dir = share_model(model, shared_key)
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                             initargs=(entry_dir, model.p_atm, model.dt_h, tuple(windows))) as pool:
+        parts = list(pool.map(_sweep_chunk, chunks))
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_results(table, path, meta):
+    """CSV for ``.csv`` paths or ``-`` (stdout), JSON with ``meta`` otherwise."""
+    if path == "-":
+        table.to_csv(sys.stdout, index=False)
+    elif path.endswith(".csv"):
+        table.to_csv(path, index=False)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": json.loads(table.to_json(orient="records"))}, f, indent=1)
+
+
+def main(argv=None):
+    defaults = energy.EnergyConfig()
+    parser = argparse.ArgumentParser(description="Run the DCV energy model for many configurations.")
+    parser.add_argument("--route", action="append", help="route name (repeatable) or 'all'; default: first route")
+    parser.add_argument("--cabins", nargs="+", default=[str(defaults.num_cabins)], help="cabin counts, e.g. 120 or 20:401:20")
+    parser.add_argument("--sfp", nargs="+", default=[str(defaults.sfp)], help="specific fan power [kW/(m3/s)]")
+    parser.add_argument("--cop", nargs="+", default=[str(defaults.cop)], help="heat pump COP")
+    parser.add_argument("--t-supply", nargs="+", default=[str(defaults.t_supply_c)], help="supply temperature [C]")
+    parser.add_argument("--rh-supply", nargs="+", default=[str(defaults.rh_supply)], help="supply relative humidity [0-1]")
+    parser.add_argument("--design-flow", nargs="+", default=[str(defaults.design_flow_per_cabin)], help="design flow per cabin [m3/h]")
+    parser.add_argument("--window", action="append", help="heating window name=HH:MM-HH:MM (repeatable); default harbour + 24h")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-o", "--output", default="-", help="output .csv or .json file, '-' for CSV on stdout")
+    args = parser.parse_args(argv)
+
+    registry = RouteRegistry()
+    if not args.route:
+        routes = registry.names()[:1]
+    elif "all" in args.route:
+        routes = [r for r in registry.names() if registry.get(r).available]
+    else:
+        routes = args.route
+    windows = tuple(parse_window(w) for w in args.window) if args.window else DEFAULT_WINDOWS
+
+    configs = config_table({
+        "num_cabins": parse_values(args.cabins, int),
+        "sfp": parse_values(args.sfp),
+        "cop": parse_values(args.cop),
+        "t_supply_c": parse_values(args.t_supply),
+        "rh_supply": parse_values(args.rh_supply),
+        "design_flow_per_cabin": parse_values(args.design_flow),
+    })
+
+    tables = []
+    for route in routes:
+        model = registry.model(route)
+        table = run_batch(model, configs, windows, args.workers, shared_key=(route, registry.version(route)))
+        table.insert(0, "route", route)
+        tables.append(table)
+        print(f"{route}: {len(table)} configurations", file=sys.stderr)
+    result = pd.concat(tables, ignore_index=True)
+    meta = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "routes": {r: registry.version(r) for r in routes},
+        "windows": [w.name for w in windows],
+        "units": "kWh over the route's weather period",
+    }
+    write_results(result, args.output, meta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Run the benchmark suite on synthetic data and store the timings.
+
+Usage, from the repository root::
+
+    python -m benchmarks.run --scale 1x 10x
+    python -m benchmarks.run --scale 100x --filter psychro resample
+    python -m benchmarks.run --compare benchmarks/results/A.json benchmarks/results/B.json
+
+Every run writes one JSON file to ``benchmarks/results/`` with the git
+commit, machine, scale and per-benchmark timings (min/median/mean in
+seconds over ``--repeat`` rounds, after one warm-up call). ``--compare``
+prints the median ratio of every benchmark the two runs share.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+import numpy as np
+
+import datastore
+from benchmarks import synthetic
+from benchmarks.suite import BENCHMARKS, Context
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DATA_DIR = os.path.join(ROOT, ".cache", "bench")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_benchmark(func, ctx, repeat, min_time=0.2):
+    """Timings in seconds; short benchmarks get extra rounds until ``min_time`` has passed."""
+    run = func(ctx)
+    run()
+    timings, began = [], time.perf_counter()
+    while len(timings) < repeat or (time.perf_counter() - began < min_time and len(timings) < 100):
+        t = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - t)
+    return timings
+
+
+def run_scale(scale_name, names, repeat, seed):
+    scale = synthetic.SCALES[scale_name]
+    data_dir = os.path.join(DATA_DIR, f"{scale_name}-seed{seed}")
+    t = time.perf_counter()
+    synthetic.write_dataset(data_dir, scale, seed)
+    print(f"[{scale_name}] {scale.rows:,} rows x {scale.cabins} cabins ({time.perf_counter() - t:.1f} s to prepare)")
+
+    datastore.DATASET_DIR = data_dir
+    ctx = Context(data_dir, os.path.join(data_dir, "cache"))
+    results = {}
+    for name in names:
+        timings = time_benchmark(BENCHMARKS[name], ctx, repeat)
+        results[name] = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+            "rounds": len(timings),
+        }
+        print(f"  {name:<26} {results[name]['median'] * 1e3:10.2f} ms  (min {results[name]['min'] * 1e3:.2f}, "
+              f"{len(timings)} rounds)")
+    return {"scale": scale_name, "rows": scale.rows, "cabins": scale.cabins, "benchmarks": results}
+
+
+def compare(path_a, path_b):
+    with open(path_a) as f:
+        a = json.load(f)
+    with open(path_b) as f:
+        b = json.load(f)
+    print(f"{'benchmark':<34}{'A ms':>12}{'B ms':>12}{'B/A':>8}")
+    for run_a in a["runs"]:
+        run_b = next((r for r in b["runs"] if r["scale"] == run_a["scale"]), None)
+        if run_b is None:
+            continue
+        for name, ra in run_a["benchmarks"].items():
+            rb = run_b["benchmarks"].get(name)
+            if rb is None:
+                continue
+            ratio = rb["median"] / ra["median"] if ra["median"] else np.nan
+            flag = "  slower" if ratio > 1.1 else "  faster" if ratio < 0.9 else ""
+            print(f"{run_a['scale'] + ' ' + name:<34}{ra['median'] * 1e3:12.2f}{rb['median'] * 1e3:12.2f}"
+                  f"{ratio:8.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipelines on synthetic data.")
+    parser.add_argument("--scale", nargs="+", default=["1x"], choices=synthetic.SCALES)
+    parser.add_argument("--filter", nargs="+", help="only benchmarks whose name starts with one of these")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    names = [n for n in BENCHMARKS if not args.filter or any(n.startswith(f) for f in args.filter)]
+    # Paths inside the suite are relative to the repository root
+    os.chdir(ROOT)
+    started = datetime.datetime.now()
+    runs = [run_scale(s, names, args.repeat, args.seed) for s in args.scale]
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = _git_commit()
+    path = os.path.join(RESULTS_DIR, f"{started:%Y%m%d-%H%M%S}-{commit or 'nogit'}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "started": started.isoformat(timespec="seconds"),
+            "commit": commit,
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "processor": platform.processor(), "cpus": os.cpu_count(), "numpy": np.__version__},
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "runs": runs,
+        }, f, indent=1)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Benchmarks for each stage of the measurement and energy pipelines.
+
+A benchmark is a function taking a :class:`Context` and returning the
+zero-argument callable to time; everything it does before returning is
+setup and is not timed. Benchmarks are grouped by stage through their
+dotted names (``ingest.*``, ``resample.*``, ``psychro.*``, ``energy.*``,
+``measurement.*``, ``chart.*``, ``fleet.*``, ``occupancy.*``).
+"""
+import os
+import shutil
+from functools import cached_property
+
+import numpy as np
+
+import datastore
+import downsample
+import energy
+import figures
+import fleet
+import occupancy
+import psychrometrics
+import resample
+from energyindex import EnergyIndex
+from rollup import MonthlyRollup
+from streaming import FLOW_COLUMN
+from timeindex import TimeIndex
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class Context:
+    """Synthetic data of one scale, loaded lazily through the normal datastore path."""
+
+    def __init__(self, data_dir, cache_dir):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+
+    def arrays(self, name):
+        return {k: np.asarray(v) for k, v in datastore.load_arrays(name, self.cache_dir).items()}
+
+    def frame(self, name):
+        return datastore.load_frame(name, self.cache_dir)
+
+    @cached_property
+    def master_grid(self):
+        return energy.build_master_grid(self.frame("weather_oslo"), self.frame("vav_oslo"))
+
+    @cached_property
+    def model(self):
+        return energy.EnergyModel(self.master_grid)
+
+    @cached_property
+    def flow(self):
+        return self.arrays("flowrate")
+
+
+# --- Ingestion ---
+
+@benchmark("ingest.parse_csv")
+def parse_csv(ctx):
+    schema = datastore.SCHEMAS["flowrate"]
+    return lambda: datastore.parse_csv(schema)
+
+
+@benchmark("ingest.cache_roundtrip")
+def cache_roundtrip(ctx):
+    arrays = ctx.flow
+    entry = os.path.join(ctx.cache_dir, "bench-roundtrip")
+
+    def run():
+        shutil.rmtree(entry, ignore_errors=True)
+        datastore._write_entry(entry, arrays)
+        return {k: np.asarray(v).sum() for k, v in datastore._read_entry(entry).items()}
+    return run
+
+
+@benchmark("ingest.load_cached")
+def load_cached(ctx):
+    ctx.arrays("flowrate")
+    return lambda: ctx.frame("flowrate")
+
+
+# --- Resampling ---
+
+@benchmark("resample.align")
+def resample_align(ctx):
+    w, v = ctx.arrays("weather_oslo"), ctx.arrays("vav_oslo")
+    sources = {
+        "weather": (w.pop("Time"), w),
+        "velocity": (v.pop("Time"), v),
+    }
+    return lambda: resample.align(sources, energy.GRID_FREQ)
+
+
+@benchmark("resample.stream")
+def resample_stream(ctx):
+    v = ctx.arrays("vav_oslo")
+    times, cols = v.pop("Time"), v
+    step = 100_000
+
+    def run():
+        chunks = ((times[i:i + step], {k: c[i:i + step] for k, c in cols.items()})
+                  for i in range(0, len(times), step))
+        return list(resample.resample_stream(chunks, energy.GRID_FREQ))
+    return run
+
+
+# --- Psychrometrics ---
+
+@benchmark("psychro.enthalpy")
+def psychro_enthalpy(ctx):
+    w = ctx.arrays("weather_oslo")
+    psychrometrics.get_table()
+    return lambda: psychrometrics.enthalpy(w["temperature"], w["relative_humidity"])
+
+
+@benchmark("psychro.air_density")
+def psychro_density(ctx):
+    w = ctx.arrays("weather_oslo")
+    psychrometrics.get_table()
+    return lambda: psychrometrics.air_density(w["temperature"], w["relative_humidity"])
+
+
+# --- Energy integration ---
+
+@benchmark("energy.master_grid")
+def master_grid(ctx):
+    df_w, df_v = ctx.frame("weather_oslo"), ctx.frame("vav_oslo")
+    return lambda: energy.build_master_grid(df_w, df_v)
+
+
+@benchmark("energy.model")
+def model(ctx):
+    master_df = ctx.master_grid
+    return lambda: energy.EnergyModel(master_df)
+
+
+@benchmark("energy.evaluate")
+def evaluate(ctx):
+    model = ctx.model
+    return lambda: model.evaluate(energy.EnergyConfig())
+
+
+@benchmark("energy.sweep_1000")
+def sweep(ctx):
+    model = ctx.model
+    return lambda: model.sweep(num_cabins=np.arange(1, 1001))
+
+
+@benchmark("energy.index")
+def index(ctx):
+    model = ctx.model
+    return lambda: EnergyIndex.from_model(model)
+
+
+# --- Measurement page ---
+
+@benchmark("measurement.time_index")
+def time_index(ctx):
+    times = ctx.flow["Time"]
+    return lambda: TimeIndex(times).months()
+
+
+@benchmark("measurement.rollup")
+def rollup(ctx):
+    times, flow = ctx.flow["Time"], ctx.flow[FLOW_COLUMN]
+    return lambda: MonthlyRollup.from_series(times, flow)
+
+
+# --- Charts ---
+
+@benchmark("chart.lttb")
+def lttb(ctx):
+    times, flow = ctx.flow["Time"], ctx.flow[FLOW_COLUMN]
+    return lambda: downsample.downsample(times, flow, downsample.CHART_WIDTH_PX)
+
+
+@benchmark("chart.figure_json")
+def figure_json(ctx):
+    import plotly.graph_objects as go
+    times, flow = ctx.flow["Time"].view("datetime64[ns]"), ctx.flow[FLOW_COLUMN]
+
+    def run():
+        fig = go.Figure(downsample.line_trace(times, flow, name="Flowrate"))
+        return fig.to_json()
+    return run
+
+
+def _measurement_charts(ctx, cache):
+    co2, flow = ctx.frame("co2"), ctx.frame("flowrate")
+    timeline = occupancy.detect_series(["co2"], [(co2["Time"].to_numpy().view(np.int64), co2[occupancy.CO2_COLUMN].to_numpy())])
+    charts = figures.MeasurementCharts(co2, flow, TimeIndex(co2["Time"].to_numpy()), TimeIndex(flow["Time"].to_numpy()),
+                                       timeline, version=None, cache=cache)
+    return charts, figures.month_bounds(charts.flow_index.months()[-1])
+
+
+@benchmark("chart.measurement_build")
+def measurement_build(ctx):
+    charts, (start, end) = _measurement_charts(ctx, figures.FigureCache())
+    return lambda: figures.to_payload(charts.build(start, end))
+
+
+@benchmark("chart.measurement_cached")
+def measurement_cached(ctx):
+    charts, (start, end) = _measurement_charts(ctx, figures.FigureCache())
+    charts.figure(start, end)
+    return lambda: figures.to_payload(charts.figure(start, end))
+
+
+# --- Fleet ---
+
+@benchmark("fleet.run")
+def fleet_run(ctx):
+    root = os.path.join(ctx.data_dir, "fleet")
+    grid = ctx.master_grid.index.asi8
+    return lambda: fleet.run_fleet(grid, root)
+
+
+# --- Occupancy ---
+
+@benchmark("occupancy.detect")
+def occupancy_detect(ctx):
+    store = datastore.FleetStore(os.path.join(ctx.data_dir, "fleet"))
+    cabins, series = store.cabins(), []
+    for cabin_id in cabins:
+        arrays, _ = store.partition(cabin_id).read()
+        series.append((arrays["Time"], arrays[occupancy.CO2_COLUMN]))
+    return lambda: occupancy.detect_series(cabins, series)
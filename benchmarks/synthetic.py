@@ -0,0 +1,172 @@
+"""Synthetic weather, velocity and CO2 series in the schemas of ``dataset/``.
+
+Series follow the shape of the measured data: hourly weather with a
+seasonal and daily temperature cycle, relative humidity running against
+temperature, and cabin sensors that switch between an occupied (night,
+high CO2, DCV velocity near design) and an empty state. Length, sampling
+interval and number of cabins are free, so the same generator feeds the
+benchmarks from the 1x size of the real files up to multi-year fleets.
+
+:func:`write_dataset` writes CSVs with the file names, column names and
+timestamp formats of :data:`datastore.SCHEMAS`, so pointing
+``datastore.DATASET_DIR`` at the output directory runs the normal loading
+path on them. The measurement formats only resolve minutes; with
+sub-minute sampling several rows share a timestamp, as they would in a
+real export at that rate. Every cabin is also written as a fleet partition
+(flowrate and CO2).
+"""
+import argparse
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+import datastore
+from streaming import FLOW_COLUMN, FLOW_PER_VELOCITY
+
+START = "2025-01-01"
+DESIGN_VELOCITY = 4.3
+NS_PER_S = 10**9
+# Bump when the written files change, so existing output directories are rewritten
+FORMAT = 2
+
+
+@dataclass(frozen=True)
+class Scale:
+    days: int
+    interval_s: float    # cabin sensor sampling interval
+    cabins: int = 1
+
+    @property
+    def rows(self):
+        return int(self.days * 86400 / self.interval_s)
+
+
+# Rows per cabin series relative to the real 6-month, 5-minute measurement files
+SCALES = {
+    "1x": Scale(182, 300),
+    "10x": Scale(365, 60),
+    "100x": Scale(730, 12),
+    "1000x": Scale(730, 12, cabins=10),
+}
+
+
+def _times(start, days, interval_s):
+    t0 = pd.Timestamp(start).value
+    n = int(days * 86400 / interval_s)
+    return t0 + (np.arange(n) * interval_s * NS_PER_S).astype(np.int64)
+
+
+def _ar1(rng, n, sigma, phi):
+    """AR(1) noise via an exponential filter of white noise."""
+    return lfilter([sigma * np.sqrt(1 - phi**2)], [1, -phi], rng.standard_normal(n))
+
+
+def weather(days, start=START, seed=0):
+    """Hourly ``{"Time", "temperature", "relative_humidity"}`` for a coastal route."""
+    rng = np.random.default_rng(seed)
+    times = _times(start, days, 3600)
+    day = (times - times[0]) / (86400 * NS_PER_S)
+    doy = pd.DatetimeIndex(times).dayofyear.to_numpy()
+    hour = day % 1 * 24
+    temp = (4 - 8 * np.cos(2 * np.pi * (doy - 20) / 365) + 2.5 * np.sin(2 * np.pi * (hour - 9) / 24)
+            + _ar1(rng, len(times), 2.0, 0.97))
+    rh = np.clip(80 - 2.0 * (temp - 4) + _ar1(rng, len(times), 6.0, 0.9), 25, 100)
+    return {"Time": times, "temperature": np.round(temp, 1), "relative_humidity": np.round(rh)}
+
+
+def occupancy(times, rng):
+    """Occupied at night with a random share of cabins also used in the afternoon."""
+    hour = (times // (3600 * NS_PER_S)) % 24
+    day = times // (86400 * NS_PER_S)
+    afternoon = rng.random(day.max() - day.min() + 1) < 0.3
+    return (hour < 8) | (hour >= 21) | (afternoon[day - day.min()] & (hour >= 14) & (hour < 17))
+
+
+def cabin(days, interval_s, start=START, seed=0):
+    """One cabin: ``{"Time", "velocity", "flowrate", "CO2", "temperature", "humidity"}``."""
+    rng = np.random.default_rng(seed)
+    times = _times(start, days, interval_s)
+    n = len(times)
+    occupied = occupancy(times, rng)
+
+    velocity = np.where(occupied, DESIGN_VELOCITY, 1.2) + _ar1(rng, n, 0.1, 0.8)
+    # Short stops of the supply fan
+    off = rng.random(n) < 0.002
+    velocity = np.clip(np.where(off, 0.0, velocity), 0, None)
+
+    # CO2 relaxes towards the occupied/empty level with a ~20 min time constant
+    alpha = 1 - np.exp(-interval_s / 1200)
+    co2 = 430.0 + lfilter([alpha], [1, -(1 - alpha)], np.where(occupied, 470.0, 0.0))
+    co2 += _ar1(rng, n, 15.0, 0.5)
+
+    temperature = 22 + 0.6 * occupied + _ar1(rng, n, 0.3, 0.99)
+    humidity = np.clip(45 + 6 * occupied + _ar1(rng, n, 3.0, 0.99), 10, 95)
+    return {
+        "Time": times,
+        "velocity": np.round(velocity, 2),
+        "flowrate": np.round(velocity, 2) * FLOW_PER_VELOCITY,
+        "CO2": np.round(co2),
+        "temperature": np.round(temperature, 1),
+        "humidity": np.round(humidity, 1),
+    }
+
+
+def _write_csv(name, arrays, out_dir):
+    schema = datastore.SCHEMAS[name]
+    df = pd.DataFrame({col: arrays[col] for col in schema.columns})
+    df.insert(0, schema.time_column, pd.DatetimeIndex(arrays["Time"]).strftime(schema.time_format))
+    df.to_csv(os.path.join(out_dir, schema.filename), index=False, encoding="utf-8-sig")
+
+
+def write_dataset(out_dir, scale, seed=0, start=START):
+    """Write one scale of synthetic data to ``out_dir`` (skipped if already there).
+
+    Returns the directory; ``out_dir/fleet`` holds one partition per cabin.
+    """
+    meta_path = os.path.join(out_dir, "synthetic.json")
+    meta = {"scale": asdict(scale), "seed": seed, "start": start, "format": FORMAT}
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return out_dir
+    shutil.rmtree(os.path.join(out_dir, "fleet"), ignore_errors=True)
+    os.makedirs(out_dir, exist_ok=True)
+
+    w = weather(scale.days, start, seed)
+    _write_csv("weather_oslo", w, out_dir)
+
+    fleet = datastore.FleetStore(os.path.join(out_dir, "fleet"))
+    for c in range(scale.cabins):
+        s = cabin(scale.days, scale.interval_s, start, seed + 1 + c)
+        if c == 0:
+            _write_csv("vav_oslo", {"Time": s["Time"], "Velocity": s["velocity"]}, out_dir)
+            _write_csv("velocity", {"Time": s["Time"], "SmartCabin - Supply velocity": s["velocity"]}, out_dir)
+            _write_csv("flowrate", {"Time": s["Time"], "SmartCabin - Supply velocity": s["velocity"],
+                                    FLOW_COLUMN: s["flowrate"]}, out_dir)
+            _write_csv("co2", {"Time": s["Time"], "TEMPERATURE": s["temperature"],
+                               "HUMIDITY": s["humidity"], "CO2_SENSOR": s["CO2"]}, out_dir)
+        fleet.partition(f"{c:04d}").append({"Time": s["Time"], FLOW_COLUMN: s["flowrate"], "CO2_SENSOR": s["CO2"]})
+
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return out_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic Smart Cabin datasets.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", choices=SCALES, default="1x")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    scale = SCALES[args.scale]
+    write_dataset(args.out_dir, scale, args.seed)
+    print(f"{args.scale}: {scale.rows:,} rows x {scale.cabins} cabins -> {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""Columnar cache for the CSV files under ``dataset/``.
+
+Each CSV is parsed once with an explicit timestamp format and written to a
+directory of ``.npy`` files (int64 epoch nanoseconds for the time column, one
+float32 array per value column, plus a bit-packed validity mask per column
+and the :mod:`quality` flags of every row).
+Later loads memory-map those arrays instead of parsing text, read-only, so
+every session and process shares the same pages. A cache entry is tied to
+the source file's mtime and size, so editing a CSV invalidates it
+automatically.
+
+Sensor values carry three or four significant digits, so float32 loses
+nothing while halving the footprint; computations upcast to float64 where
+they accumulate. Loaders skip missing samples through the packed masks
+(:func:`load_validity`) instead of scanning values for NaN.
+:func:`memory_budget` reports what the loaded and derived data costs.
+"""
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import profiling
+import quality
+
+DATASET_DIR = "dataset"
+CACHE_DIR = os.path.join(".cache", "datastore")
+# Bump when the on-disk layout or preprocessing changes
+CACHE_VERSION = 3
+VALUE_DTYPE = np.float32
+VALID_KEY = "_valid"
+FLAGS_KEY = "_flags"
+# Live segments that reach this many rows are no longer merged by LiveStore.compact
+COMPACT_ROWS = 1_000_000
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    filename: str
+    time_column: str
+    time_format: str
+    columns: tuple
+
+    @property
+    def path(self):
+        return os.path.join(DATASET_DIR, self.filename)
+
+
+# Timestamp formats differ per export: measurement files use M/D/YYYY H:MM
+# (zero-padded or not), the weather schedule uses ISO without padding.
+SCHEMAS = {
+    "co2": DatasetSchema(
+        "updated_file_summary_2025_07_2025_12_co2.csv", "Time", "%m/%d/%Y %H:%M",
+        ("TEMPERATURE", "HUMIDITY", "CO2_SENSOR"),
+    ),
+    "flowrate": DatasetSchema(
+        "updated_file_summary_2025_07_2025_12_flowrate.csv", "Time", "%m/%d/%Y %H:%M",
+        ("SmartCabin - Supply velocity", "SmartCabin - Supply flowrate"),
+    ),
+    "velocity": DatasetSchema(
+        "updated_file_summary_2025_07_2025_12_velocity.csv", "Time", "%m/%d/%Y %H:%M",
+        ("SmartCabin - Supply velocity",),
+    ),
+    "weather_oslo": DatasetSchema(
+        "hourly_schedule_weather_updated.csv", "Time", "%Y-%m-%dT%H:%M",
+        ("temperature", "relative_humidity"),
+    ),
+    "vav_oslo": DatasetSchema(
+        "VAV_velocity_Oslo-Honningsvåg-Oslo_updated.csv", "Time", "%m/%d/%Y %H:%M",
+        ("Velocity",),
+    ),
+}
+
+
+def signature(name):
+    """Cheap version tag of the source file, used as the cache key."""
+    stat = os.stat(SCHEMAS[name].path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def compact_arrays(arrays):
+    """Storage dtypes: int64 epoch-ns ``Time`` (and ``_batch``), float32 values."""
+    out = {}
+    for col, values in arrays.items():
+        values = np.asarray(values)
+        if np.issubdtype(values.dtype, np.floating):
+            values = values.astype(VALUE_DTYPE, copy=False)
+        elif col == "Time":
+            values = values.astype(np.int64, copy=False)
+        out[col] = values
+    return out
+
+
+def pack_validity(arrays, columns):
+    """``(columns x ceil(rows / 8))`` bit-packed masks of the non-NaN samples of each column."""
+    return np.packbits(np.stack([~np.isnan(arrays[c]) for c in columns]), axis=1)
+
+
+def parse_csv(schema, rules=None):
+    df = pd.read_csv(schema.path, encoding="utf-8-sig",
+                     usecols=[schema.time_column, *schema.columns])
+    times = pd.to_datetime(df[schema.time_column], format=schema.time_format)
+    times = times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    # Rows are stored in time order so ranges can be found by binary search
+    order = np.argsort(times, kind="stable")
+    arrays = {"Time": times[order]}
+    for col in schema.columns:
+        arrays[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=VALUE_DTYPE)[order]
+    arrays[VALID_KEY] = pack_validity(arrays, schema.columns)
+    arrays[FLAGS_KEY] = quality.flag_rows(arrays["Time"], {c: arrays[c] for c in schema.columns},
+                                          rules or quality.Rules())
+    return arrays
+
+
+def _write_entry(entry_dir, arrays, meta=None, exist_ok=True):
+    """Write ``arrays`` atomically as directory ``entry_dir``.
+
+    With ``exist_ok`` an existing entry counts as written (content-addressed
+    entries hold the same data); otherwise it raises :class:`FileExistsError`.
+    """
+    parent = os.path.dirname(entry_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        names = list(arrays)
+        for i, col in enumerate(names):
+            np.save(os.path.join(tmp, f"col_{i}.npy"), arrays[col])
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({**(meta or {}), "columns": names}, f)
+        os.rename(tmp, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(entry_dir):
+            raise
+        if not exist_ok:
+            raise FileExistsError(entry_dir) from None
+        # Another process finished the same entry first
+
+
+def _read_entry(entry_dir):
+    with open(os.path.join(entry_dir, "meta.json")) as f:
+        names = json.load(f)["columns"]
+    return {col: np.load(os.path.join(entry_dir, f"col_{i}.npy"), mmap_mode="r")
+            for i, col in enumerate(names)}
+
+
+def _load_entry(name, cache_dir=CACHE_DIR):
+    schema = SCHEMAS[name]
+    sig = f"{signature(name)}-v{CACHE_VERSION}"
+    entry_dir = os.path.join(cache_dir, f"{name}-{sig}")
+    if not os.path.isdir(entry_dir):
+        with profiling.stage(f"parse {name}") as s:
+            arrays = parse_csv(schema, quality.RULES.get(name))
+            s.rows = len(arrays["Time"])
+        with profiling.stage(f"cache {name}"):
+            _write_entry(entry_dir, arrays)
+        # Drop entries left behind by older versions of the file
+        for old in os.listdir(cache_dir):
+            if old.startswith(f"{name}-") and old != f"{name}-{sig}":
+                shutil.rmtree(os.path.join(cache_dir, old), ignore_errors=True)
+    return _read_entry(entry_dir)
+
+
+def load_arrays(name, cache_dir=CACHE_DIR):
+    """Return ``{column: array}`` for dataset ``name`` (read-only memory maps), building the cache if needed."""
+    arrays = _load_entry(name, cache_dir)
+    arrays.pop(VALID_KEY, None)
+    arrays.pop(FLAGS_KEY, None)
+    return arrays
+
+
+def load_flags(name, cache_dir=CACHE_DIR):
+    """:mod:`quality` flags (``uint8`` bit set) of every row of dataset ``name``."""
+    return _load_entry(name, cache_dir)[FLAGS_KEY]
+
+
+def load_validity(name, cache_dir=CACHE_DIR):
+    """``{column: bool array}``, True where the CSV held a number."""
+    arrays = _load_entry(name, cache_dir)
+    rows = len(arrays["Time"])
+    columns = SCHEMAS[name].columns
+    bits = np.unpackbits(arrays[VALID_KEY], axis=1, count=rows).astype(bool)
+    return dict(zip(columns, bits))
+
+
+def load_frame(name, cache_dir=CACHE_DIR, clean=False):
+    """Dataset ``name`` as a DataFrame with a datetime64 ``Time`` column.
+
+    The columns are views of the read-only memory maps, not copies. With
+    ``clean`` the quality flags are applied (:func:`quality.clean`): padding
+    and duplicate rows are dropped and out-of-range values are NaN.
+    """
+    arrays = load_arrays(name, cache_dir)
+    if clean:
+        times = arrays.pop("Time")
+        times, arrays = quality.clean(times, arrays, load_flags(name, cache_dir), quality.RULES.get(name, quality.Rules()))
+        arrays["Time"] = times
+    data = {"Time": np.asarray(arrays.pop("Time")).view("datetime64[ns]")}
+    data.update({col: np.asarray(values) for col, values in arrays.items()})
+    return pd.DataFrame(data, copy=False)
+
+
+def load_clean_frame(name, cache_dir=CACHE_DIR):
+    """:func:`load_frame` with the quality flags applied."""
+    return load_frame(name, cache_dir, clean=True)
+
+
+def nbytes(obj):
+    """``(heap bytes, memory-mapped bytes)`` of an array, a dict of arrays or a DataFrame (with its index)."""
+    if isinstance(obj, pd.DataFrame):
+        index = {} if isinstance(obj.index, pd.RangeIndex) else {"__index__": obj.index.to_numpy()}
+        obj = {**index, **{c: obj[c].to_numpy() for c in obj.columns}}
+    if isinstance(obj, dict):
+        sizes = [nbytes(v) for v in obj.values()]
+        return sum(s[0] for s in sizes), sum(s[1] for s in sizes)
+    values = np.asarray(obj)
+    return (0, values.nbytes) if _is_mapped(values) else (values.nbytes, 0)
+
+
+def _is_mapped(values):
+    base = values
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return True
+        base = base.base
+    return isinstance(base, mmap.mmap)
+
+
+def memory_budget(names=None, cache_dir=CACHE_DIR, derived=None):
+    """Footprint of the datasets as loaded, against float64 columns, one row per dataset.
+
+    Mapped bytes live in the OS page cache and are shared by every session
+    and process on the host; only heap bytes grow per process. The cached
+    datasets themselves are all mapped. ``derived`` maps labels to data
+    built from them and held per process (e.g. route grids and models from
+    :meth:`routes.RouteRegistry.footprint`), which are reported the same
+    way; their heap bytes are what a server needs on top of the page cache.
+    Short-lived copies (a cleaned frame while a grid is resampled) and
+    figures/KPIs are not included.
+    """
+    rows = []
+    for name in names or SCHEMAS:
+        arrays = _load_entry(name, cache_dir)
+        n = len(arrays["Time"])
+        heap, mapped = nbytes(arrays)
+        rows.append({
+            "dataset": name, "rows": n, "columns": len(SCHEMAS[name].columns),
+            "heap_mb": heap / 2**20, "mapped_mb": mapped / 2**20,
+            "float64_mb": n * 8 * (1 + len(SCHEMAS[name].columns)) / 2**20,
+            "bytes_per_row": (heap + mapped) / max(n, 1),
+        })
+    for label, obj in (derived or {}).items():
+        columns = obj.columns if isinstance(obj, pd.DataFrame) else list(obj)
+        n = len(obj) if isinstance(obj, pd.DataFrame) else max((len(v) for v in obj.values()), default=0)
+        heap, mapped = nbytes(obj)
+        rows.append({
+            "dataset": label, "rows": n, "columns": len(columns),
+            "heap_mb": heap / 2**20, "mapped_mb": mapped / 2**20,
+            "float64_mb": n * 8 * len(columns) / 2**20,
+            "bytes_per_row": (heap + mapped) / max(n, 1),
+        })
+    return pd.DataFrame(rows)
+
+
+class LiveStore:
+    """Append-only columnar store for live samples.
+
+    Every micro-batch becomes one immutable segment directory named after
+    the range of batch numbers it holds (``seg-<first>-<last>``). Readers
+    remember the last batch number they saw and only load newer segments.
+    ``compact()`` merges small segments into one and then removes them;
+    readers skip segments already covered by a merged one, and a reader
+    that loses a segment to a concurrent compaction lists the store again
+    and resumes at its cursor.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        existing = self._segments()
+        self._next = existing[-1][1] + 1 if existing else 0
+
+    def _segments(self):
+        """``(first, last, dirname)`` of visible segments, without overlaps."""
+        found = []
+        for d in os.listdir(self.root):
+            if d.startswith("seg-"):
+                _, first, last = d.split("-")
+                found.append((int(first), int(last), d))
+        found.sort(key=lambda s: (s[0], -s[1]))
+        visible, covered = [], -1
+        for first, last, d in found:
+            if first > covered:
+                visible.append((first, last, d))
+                covered = last
+        return visible
+
+    def append(self, arrays):
+        """Write one batch (``{"Time": int64 ns, column: values}``); returns its batch number.
+
+        A batch never lands on a number that is already taken: another writer
+        or a compaction since this store was opened moves it to the next free
+        number, and a segment created concurrently under the same name makes
+        it retry rather than count as written.
+        """
+        arrays = compact_arrays(arrays)
+        while True:
+            existing = self._segments()
+            seq = max(self._next, existing[-1][1] + 1 if existing else 0)
+            try:
+                _write_entry(os.path.join(self.root, f"seg-{seq:010d}-{seq:010d}"), arrays, exist_ok=False)
+            except FileExistsError:
+                self._next = seq + 1
+                continue
+            self._next = seq + 1
+            return seq
+
+    def iter_segments(self, since=0):
+        """``(arrays, next batch number)`` per segment holding batches numbered ``>= since``, in batch order.
+
+        Only one segment is loaded at a time, so a long history can be
+        processed in bounded memory.
+        """
+        next_seq, lost = since, None
+        while True:
+            try:
+                for first, last, d in self._segments():
+                    if last < next_seq:
+                        continue
+                    arrays = _read_entry(os.path.join(self.root, d))
+                    batch = arrays.pop("_batch", None)
+                    if first < next_seq and batch is not None:
+                        # Merged segment straddling the cursor: drop rows already read
+                        keep = np.asarray(batch) >= next_seq
+                        arrays = {k: np.asarray(v)[keep] for k, v in arrays.items()}
+                    next_seq = last + 1
+                    yield arrays, next_seq
+                return
+            except FileNotFoundError:
+                # A compaction removed the segment after it was listed; its rows are in the merged one.
+                # A segment that is still listed after that is damaged, not merged.
+                if d == lost:
+                    raise
+                lost = d
+
+    def read(self, since=0):
+        """Concatenated arrays of all batches numbered ``>= since`` and the next batch number."""
+        parts, next_seq = [], since
+        for arrays, next_seq in self.iter_segments(since):
+            parts.append(arrays)
+        if not parts:
+            return {}, next_seq
+        return {k: np.concatenate([np.asarray(p[k]) for p in parts]) for k in parts[0]}, next_seq
+
+    def compact(self, max_rows=COMPACT_ROWS):
+        """Merge the trailing small segments into one and remove the originals.
+
+        Segments that already hold ``max_rows`` rows are kept as they are, so
+        a compaction only rewrites the recent tail, not the whole history.
+        Returns the number of segments merged.
+        """
+        segments = self._segments()
+        entries = [_read_entry(os.path.join(self.root, d)) for _, _, d in segments]
+        start = next((i for i, e in enumerate(entries) if len(e["Time"]) < max_rows), len(entries))
+        segments, entries = segments[start:], entries[start:]
+        if len(segments) < 2:
+            return 0
+        parts = []
+        for (first, _, _), entry in zip(segments, entries):
+            arrays = {k: np.asarray(v) for k, v in entry.items()}
+            batch = arrays.pop("_batch", np.full(len(arrays["Time"]), first, dtype=np.int64))
+            parts.append((arrays, batch))
+        merged = {k: np.concatenate([p[0][k] for p in parts]) for k in parts[0][0]}
+        # Batch number per row lets readers resume in the middle of a merged segment
+        merged["_batch"] = np.concatenate([p[1] for p in parts])
+        first, last = segments[0][0], segments[-1][1]
+        _write_entry(os.path.join(self.root, f"seg-{first:010d}-{last:010d}"), merged)
+        for _, _, d in segments:
+            shutil.rmtree(os.path.join(self.root, d), ignore_errors=True)
+        return len(segments)
+
+
+class FleetStore:
+    """Per-cabin partitions of live samples, one :class:`LiveStore` per cabin."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def partition(self, cabin_id):
+        return LiveStore(os.path.join(self.root, f"cabin={cabin_id}"))
+
+    def cabins(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d.split("=", 1)[1] for d in os.listdir(self.root) if d.startswith("cabin="))
+
+    def version(self):
+        """Changes whenever any partition gains or merges a segment."""
+        return tuple((c, tuple(s[2] for s in self.partition(c)._segments())) for c in self.cabins())
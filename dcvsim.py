@@ -0,0 +1,178 @@
+"""Replay of the measured cabin CO2 through alternative DCV control laws.
+
+The ``CO2_SENSOR`` trace of the CO2 dataset is resampled onto the route's
+model grid and fed to a proportional DCV controller:
+
+* deadband: the controller only follows the sensor once it has moved more
+  than ``deadband / 2`` ppm from the last value acted on (backlash), which
+  keeps the damper from hunting on sensor noise;
+* proportional band: demand rises linearly from 0 at ``setpoint`` to 1 at
+  ``setpoint + band``;
+* flow: ``design * (min_flow_frac + (1 - min_flow_frac) * demand)``.
+
+The synthetic flows then go through the same fan and heating model as the
+measured flow (:meth:`energy.EnergyModel.evaluate_flows`). A whole grid of
+controller settings is evaluated in one batched pass: the deadband filter
+runs once per distinct deadband, and the control law and integration run
+on blocks of settings as (settings x timesteps) arrays::
+
+    python dcvsim.py --setpoint 600:1001:25 --band 200 300 400 --deadband 0 50 100 \\
+        --min-flow 0.1 0.2 0.3 -o tuning.csv
+"""
+import argparse
+import sys
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+
+import datastore
+import energy
+import resample
+from batch import config_table, parse_values, write_results
+from routes import RouteRegistry
+from scenarios import DEFAULT_WINDOWS
+
+CO2_COLUMN = "CO2_SENSOR"
+
+
+@dataclass(frozen=True)
+class ControllerParams:
+    setpoint: float = 800.0       # ppm where the flow starts to rise
+    band: float = 400.0           # ppm from minimum to design flow
+    deadband: float = 50.0        # ppm of sensor movement ignored by the controller
+    min_flow_frac: float = 0.25   # minimum flow as a fraction of design flow
+
+
+PARAM_FIELDS = tuple(f.name for f in fields(ControllerParams))
+
+
+def backlash(signal, widths):
+    """Deadband (backlash) filter of ``signal`` for every width at once; returns ``(widths x time)``."""
+    widths = np.asarray(widths, dtype=float)
+    half = widths / 2
+    out = np.empty((len(widths), len(signal)))
+    state = np.full(len(widths), signal[0])
+    for t, x in enumerate(signal):
+        state = np.clip(state, x - half, x + half)
+        out[:, t] = state
+    return out
+
+
+def control_law(co2, setpoint, band, min_flow_frac, design_flow):
+    """Per-cabin supply flow [m3/h]; parameters broadcast against ``co2`` rows."""
+    # In-place steps: these arrays are (settings x timesteps)
+    flow = np.subtract(co2, setpoint)
+    flow /= np.maximum(band, 1e-9)
+    np.clip(flow, 0.0, 1.0, out=flow)
+    flow *= 1.0 - np.asarray(min_flow_frac)
+    flow += min_flow_frac
+    flow *= design_flow
+    return flow
+
+
+class ReplaySimulator:
+    """Controller replay on the overlap of a CO2 trace and a route model."""
+
+    def __init__(self, model, times, co2, freq=energy.GRID_FREQ):
+        times = np.asarray(times, dtype=np.int64)
+        self.model = model.subset(times[0].view("datetime64[ns]"), times[-1].view("datetime64[ns]"))
+        grid = self.model.master_df.index.as_unit("ns").asi8
+        _, cols = resample.to_grid(times, {CO2_COLUMN: co2}, resample.freq_to_ns(freq), grid)
+        self.co2 = cols[CO2_COLUMN]
+        if np.isnan(self.co2).any():
+            raise ValueError("CO2 trace does not cover the model grid")
+
+    @classmethod
+    def from_datasets(cls, route=None, registry=None, dataset="co2"):
+        registry = registry or RouteRegistry()
+        route = route or registry.names()[0]
+        arrays = datastore.load_arrays(dataset)
+        valid = datastore.load_validity(dataset)[CO2_COLUMN]
+        return cls(registry.model(route), np.asarray(arrays["Time"])[valid], np.asarray(arrays[CO2_COLUMN], dtype=float)[valid])
+
+    @property
+    def index(self):
+        return self.model.master_df.index
+
+    def flows(self, params=None, config=None):
+        """Supply flow series [m3/h per cabin] of one controller setting."""
+        params = params or ControllerParams()
+        config = config or energy.EnergyConfig()
+        co2 = backlash(self.co2, [params.deadband])[0]
+        return control_law(co2, params.setpoint, params.band, params.min_flow_frac, config.design_flow_per_cabin)
+
+    def run(self, config=None, windows=DEFAULT_WINDOWS, grid=True, block=256, **params):
+        """Evaluate controller settings; keywords are :class:`ControllerParams` fields (scalars or lists).
+
+        Returns one row per setting with the DCV energies, savings against
+        the design-flow baseline and the mean simulated flow. Only rows with
+        measured operation count (see :meth:`energy.EnergyModel.evaluate_flows`),
+        for the baseline and the mean flow as well, so a controller pinned at
+        design flow saves no heating and only the fan curve's offset at
+        design flow.
+        """
+        unknown = set(params) - set(PARAM_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown controller parameters: {sorted(unknown)}")
+        config = config or energy.EnergyConfig()
+        defaults = asdict(ControllerParams())
+        table = config_table({name: params.get(name, defaults[name]) for name in PARAM_FIELDS}, grid)
+
+        # The deadband filter only depends on the width, so it runs once per distinct deadband
+        widths, w_inv = np.unique(table['deadband'].to_numpy(dtype=float), return_inverse=True)
+        filtered = backlash(self.co2, widths)
+
+        setpoint, band, min_frac = (table[c].to_numpy(dtype=float)[:, None] for c in ('setpoint', 'band', 'min_flow_frac'))
+        results, mean_flow = [], np.full(len(table), np.nan)
+        operating = np.asarray(self.model.fan_on, dtype=bool)
+        for lo in range(0, len(table), block):
+            rows = slice(lo, lo + block)
+            flows = control_law(filtered[w_inv[rows]], setpoint[rows], band[rows], min_frac[rows],
+                                config.design_flow_per_cabin)
+            results.append(self.model.evaluate_flows(flows, config, windows))
+            if operating.any():
+                mean_flow[rows] = flows[:, operating].mean(axis=1)
+
+        # Heating baseline: design flow over the same operating hours as the replayed flows
+        baseline = self.model.evaluate(config, windows)
+        design = self.model.evaluate_flows(np.full(len(self.co2), config.design_flow_per_cabin), config, windows)
+        baseline.update({f'heat_orig_{w.name}': float(design[f'heat_dcv_{w.name}'][0]) for w in windows})
+        for kind, orig_col, dcv_col in energy.result_columns(windows):
+            orig, dcv = baseline[orig_col], np.concatenate([r[dcv_col] for r in results])
+            table[orig_col] = orig
+            table[dcv_col] = dcv
+            table[f"{kind}_saving"] = orig - dcv
+            table[f"{kind}_saving_pct"] = (orig - dcv) / orig * 100 if orig > 0 else 0.0
+        table['mean_flow_m3h'] = mean_flow
+        return table
+
+    def measured(self, config=None, windows=DEFAULT_WINDOWS):
+        """Energies of the measured flow over the same period, for comparison."""
+        return self.model.evaluate(config, windows)
+
+
+def main(argv=None):
+    defaults = ControllerParams()
+    parser = argparse.ArgumentParser(description="Replay the CO2 trace through a grid of DCV controller settings.")
+    parser.add_argument("--route", default=None, help="route whose weather is used (default: first route)")
+    parser.add_argument("--cabins", type=int, default=energy.EnergyConfig().num_cabins)
+    parser.add_argument("--setpoint", nargs="+", default=[str(defaults.setpoint)], help="ppm, e.g. 600:1001:25")
+    parser.add_argument("--band", nargs="+", default=[str(defaults.band)], help="proportional band [ppm]")
+    parser.add_argument("--deadband", nargs="+", default=[str(defaults.deadband)], help="deadband [ppm]")
+    parser.add_argument("--min-flow", nargs="+", default=[str(defaults.min_flow_frac)], help="minimum flow fraction")
+    parser.add_argument("-o", "--output", default="-", help="output .csv or .json file, '-' for CSV on stdout")
+    args = parser.parse_args(argv)
+
+    sim = ReplaySimulator.from_datasets(args.route)
+    config = energy.EnergyConfig(num_cabins=args.cabins)
+    table = sim.run(config, setpoint=parse_values(args.setpoint), band=parse_values(args.band),
+                    deadband=parse_values(args.deadband), min_flow_frac=parse_values(args.min_flow))
+    measured = sim.measured(config)
+    print(f"{len(table)} settings over {sim.index[0]:%Y-%m-%d} - {sim.index[-1]:%Y-%m-%d}; measured DCV: "
+          + ", ".join(f"{k} {v:,.0f} kWh" for k, v in measured.items() if "dcv" in k), file=sys.stderr)
+    write_results(table, args.output, {"config": asdict(config), "measured": measured,
+                                       "period": [str(sim.index[0]), str(sim.index[-1])]})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Server-side downsampling of time series before they are sent to Plotly.
+
+A chart cannot show more than a couple of points per horizontal pixel, so
+sending every raw sample only bloats the websocket payload and slows the
+browser. Series longer than the pixel budget are reduced with
+Largest-Triangle-Three-Buckets (keeps the visual shape) or min/max buckets
+(keeps every extreme). A downsampled trace holds at most about one point
+per pixel, which SVG draws without trouble, so traces stay plain
+``Scatter`` (WebGL would only add a GL context per chart).
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+# Plot area width of the full-width charts on the wide layout
+CHART_WIDTH_PX = 1600
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").view(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the ``n_out`` points chosen by Largest-Triangle-Three-Buckets."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _as_float(x), np.asarray(y, dtype=np.float64)
+
+    # Interior points are split into n_out - 2 buckets; first and last are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    # Average of each bucket is the third vertex for the bucket before it
+    sums_x, sums_y = np.add.reduceat(x[1:n - 1], edges[:-1] - 1), np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    out = np.empty(n_out, dtype=np.intp)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        cx, cy = avg_x[b + 1], avg_y[b + 1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[b + 1] = a
+    return out
+
+
+def minmax_indices(y, n_buckets):
+    """Indices of the minimum and maximum of each of ``n_buckets`` equal buckets."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+    base = np.arange(n_buckets) * size
+    idx = np.concatenate([base + np.nanargmin(padded, axis=1), base + np.nanargmax(padded, axis=1), [0, n - 1]])
+    return np.unique(idx[idx < n])
+
+
+def downsample(x, y, n_out=CHART_WIDTH_PX, method="lttb"):
+    """Reduce ``(x, y)`` to about ``n_out`` points; NaN samples are dropped."""
+    x, y = np.asarray(x), np.asarray(y)
+    finite = np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if method == "minmax":
+        idx = minmax_indices(y, max(1, n_out // 2))
+    else:
+        idx = lttb_indices(x, y, n_out)
+    return x[idx], y[idx]
+
+
+def line_trace(x, y, n_out=CHART_WIDTH_PX, method="lttb", **kwargs):
+    """Line trace of the downsampled series."""
+    x, y = downsample(x, y, n_out, method)
+    return go.Scatter(x=x, y=y, mode="lines", **kwargs)
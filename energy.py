@@ -0,0 +1,307 @@
+"""Fan and heat-pump energy model of a DCV ventilation system.
+
+The model runs on the merged 10-minute weather/velocity grid of a sailing
+route. Everything that does not depend on the system configuration
+(ambient enthalpy, air density, the measured per-cabin flow) is computed
+once in :class:`EnergyModel`. Configurations are then evaluated on top of
+those arrays, either one at a time or as a broadcasted parameter sweep.
+
+Usable outside Streamlit::
+
+    model = EnergyModel(build_master_grid(df_weather, df_velocity))
+    table = model.sweep(num_cabins=np.arange(20, 401, 20), sfp=[2.0, 2.5])
+"""
+import itertools
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+import pandas as pd
+from scipy.integrate import simpson
+
+import profiling
+import psychrometrics
+import quality
+import resample
+from scenarios import DEFAULT_WINDOWS, window_matrix
+
+P_ATM = 101325
+DUCT_DIAMETER_M = 0.08
+GRID_FREQ = "10min"
+DT_H = 10 / 60
+
+
+@dataclass(frozen=True)
+class EnergyConfig:
+    num_cabins: int = 120
+    sfp: float = 2.5
+    cop: float = 3.0
+    t_supply_c: float = 15.0
+    rh_supply: float = 0.85
+    design_flow_per_cabin: float = 87.0
+
+
+CONFIG_FIELDS = tuple(f.name for f in fields(EnergyConfig))
+
+
+
+def result_columns(windows=DEFAULT_WINDOWS):
+    """``(kind, baseline column, DCV column)`` for fan power and each heating window."""
+    return [("fan", "fan_orig", "fan_dcv")] + [
+        (f"heat_{w.name}", f"heat_orig_{w.name}", f"heat_dcv_{w.name}") for w in windows
+    ]
+
+
+def fan_poly(x):
+    """Part-load fan power fraction (ASHRAE 90.1-2019) at normalized flow ``x``."""
+    # Horner form: same polynomial without the costly float powers on large arrays
+    return 0.0013 + x * (0.147 + x * (0.9506 - 0.0998 * x))
+
+
+def simpson_weights(n, dx):
+    """Weights ``w`` such that ``y @ w == simpson(y, dx=dx)`` for ``n`` samples.
+
+    Matches SciPy's composite rule, including its end correction for an even
+    number of samples, so any number of series can be integrated with one
+    matrix product.
+    """
+    if n < 4:
+        return simpson(np.eye(n), dx=dx, axis=-1)
+    odd = n if n % 2 else n - 1
+    w = np.zeros(n)
+    w[:odd] = 2.0
+    w[1:odd:2] = 4.0
+    w[[0, odd - 1]] = 1.0
+    w *= dx / 3
+    if n % 2 == 0:
+        w[-3:] += dx * np.array([-1 / 12, 2 / 3, 5 / 12])
+    return w
+
+
+def heating_kw_per_flow(h_amb, density, h_supply):
+    """Heating power per m3/h of supply air heated from ambient to ``h_supply`` (before COP).
+
+    Rows without weather data (NaN enthalpy, e.g. outside the sailing schedule) need no heat.
+    """
+    needs_heat = h_amb < h_supply
+    return np.where(needs_heat, density * (h_supply - h_amb) / 3600, 0.0)
+
+
+def build_master_grid(df_w, df_v, freq=GRID_FREQ, max_gaps=None):
+    """Resample weather and velocity onto one shared grid (10 minutes by default).
+
+    ``max_gaps`` (weather, velocity) makes grid points inside longer gaps of
+    a source NaN (see :func:`quality.service_mask`) instead of interpolated.
+    """
+    sources = {"w": resample.frame_to_arrays(df_w), "v": resample.frame_to_arrays(df_v)}
+    grid, columns = resample.align(sources, freq)
+    for (times, cols), max_gap in zip(sources.values(), max_gaps or ()):
+        for name, values in cols.items():
+            covered = quality.service_mask(np.asarray(times)[~np.isnan(values)], grid, max_gap)
+            columns[name] = np.where(covered, columns[name], np.nan)
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(grid.view("datetime64[ns]")))
+
+
+class EnergyModel:
+    """Configuration-independent arrays of one route on the model grid."""
+
+    def __init__(self, master_df, p_atm=P_ATM, duct_diameter_m=DUCT_DIAMETER_M, dt_h=DT_H, cabin_flow=None):
+        """``master_df`` holds temperature, relative humidity and (unless
+        ``cabin_flow`` is given) the measured duct ``Velocity`` of one cabin.
+        ``cabin_flow`` replaces that trace with a per-cabin flow in m3/h, e.g.
+        the fleet average from :mod:`fleet`.
+        """
+        self.master_df = master_df
+        self.p_atm = p_atm
+        self.dt_h = dt_h
+        with profiling.stage("psychrometrics", rows=len(master_df)):
+            self.h_amb = psychrometrics.enthalpy(master_df['temperature'], master_df['relative_humidity'], p_atm)
+            self.density = psychrometrics.air_density(master_df['temperature'], master_df['relative_humidity'], p_atm)
+
+        if cabin_flow is None:
+            cabin_flow = master_df['Velocity'].to_numpy(dtype=float) * (np.pi * (duct_diameter_m / 2) ** 2) * 3600
+        cabin_flow = np.asarray(cabin_flow, dtype=float)
+        self.fan_on = cabin_flow > 0
+        # Per-cabin supply flow; missing samples count as no flow
+        self.cabin_flow = np.nan_to_num(cabin_flow, nan=0.0)
+        self.weights = simpson_weights(len(master_df), dt_h)
+        self._window_masks = {}
+
+    def to_arrays(self):
+        """Prepared inputs as plain arrays (int64 ns ``Time``), e.g. to share with worker processes."""
+        return {
+            "Time": self.master_df.index.as_unit("ns").asi8,
+            "temperature": self.master_df['temperature'].to_numpy(dtype=float),
+            "relative_humidity": self.master_df['relative_humidity'].to_numpy(dtype=float),
+            "h_amb": np.asarray(self.h_amb, dtype=float),
+            "density": np.asarray(self.density, dtype=float),
+            "cabin_flow": self.cabin_flow,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, p_atm=P_ATM, dt_h=DT_H, master_df=None):
+        """Rebuild a model from :meth:`to_arrays` output without recomputing psychrometrics.
+
+        Arrays are used as given, so memory-mapped inputs stay shared.
+        ``master_df`` replaces the weather-only frame rebuilt from the arrays.
+        """
+        model = cls.__new__(cls)
+        if master_df is None:
+            index = pd.DatetimeIndex(np.asarray(arrays["Time"]).view("datetime64[ns]"))
+            master_df = pd.DataFrame({c: arrays[c] for c in ("temperature", "relative_humidity")}, index=index, copy=False)
+        model.master_df = master_df
+        model.p_atm = p_atm
+        model.dt_h = dt_h
+        model.h_amb = arrays["h_amb"]
+        model.density = arrays["density"]
+        model.cabin_flow = arrays["cabin_flow"]
+        model.fan_on = model.cabin_flow > 0
+        model.weights = simpson_weights(len(master_df), dt_h)
+        model._window_masks = {}
+        return model
+
+    def window_masks(self, windows):
+        """Boolean (windows x timesteps) matrix, built once per set of windows."""
+        windows = tuple(windows)
+        if windows not in self._window_masks:
+            self._window_masks[windows] = window_matrix(windows, self.master_df.index)
+        return self._window_masks[windows]
+
+    def _integrate(self, power, masks=None):
+        """Simpson integral over time of each row of ``power``, once per mask row if given."""
+        if masks is None:
+            return power @ self.weights
+        return power @ (masks * self.weights).T
+
+    def _heating_kw_per_flow(self, h_supply):
+        """Heating power per m3/h of supply air (before dividing by COP), one row per supply state."""
+        return heating_kw_per_flow(self.h_amb, self.density, np.asarray(h_supply, dtype=float)[:, None])
+
+    def sweep(self, grid=False, windows=DEFAULT_WINDOWS, **params):
+        """Evaluate many configurations in one pass and return a results table.
+
+        Each keyword is an :class:`EnergyConfig` field given as a scalar or
+        1-D array. Arrays are broadcast together (one configuration per
+        element), or combined as a cartesian product when ``grid=True``.
+        Heating is reported for every :class:`~scenarios.HeatingWindow` in
+        ``windows``. Energies are in kWh over the whole grid.
+        """
+        unknown = set(params) - set(CONFIG_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown energy parameters: {sorted(unknown)}")
+        defaults = asdict(EnergyConfig())
+        values = [np.atleast_1d(params.get(name, defaults[name])) for name in CONFIG_FIELDS]
+        if grid:
+            values = [np.array(v) for v in zip(*itertools.product(*values))]
+        values = np.broadcast_arrays(*values)
+        table = pd.DataFrame({name: v for name, v in zip(CONFIG_FIELDS, values)})
+
+        n = table['num_cabins'].to_numpy(dtype=float)
+        sfp, cop = table['sfp'].to_numpy(dtype=float), table['cop'].to_numpy(dtype=float)
+        design_per_cabin = table['design_flow_per_cabin'].to_numpy(dtype=float)
+
+        # Fan: the normalized flow x only depends on the design flow per cabin
+        with profiling.stage("fan power + integration", rows=len(self.cabin_flow)):
+            d_flows, d_inv = np.unique(design_per_cabin, return_inverse=True)
+            x = self.cabin_flow / np.where(d_flows > 0, d_flows, np.inf)[:, None]
+            fan_frac = np.where(self.cabin_flow > 0, fan_poly(x), 0.0)
+            fan_shape = self._integrate(fan_frac)[d_inv]
+            fan_on_hours = self._integrate(self.fan_on.astype(float))
+        design_fan_kw = n * design_per_cabin / 3600 * sfp
+        table['fan_dcv'] = np.where(design_per_cabin > 0, design_fan_kw * fan_shape, 0.0)
+        table['fan_orig'] = design_fan_kw * fan_on_hours
+
+        # Heating: one power row per distinct supply state, every window in one matrix product
+        supply = table[['t_supply_c', 'rh_supply']].to_numpy(dtype=float)
+        states, s_inv = np.unique(supply, axis=0, return_inverse=True)
+        s_inv = s_inv.ravel()
+        with profiling.stage("heating power + integration", rows=len(self.cabin_flow)):
+            h_supply = [psychrometrics.enthalpy_point(t, rh * 100, self.p_atm) for t, rh in states]
+            per_flow = self._heating_kw_per_flow(h_supply)
+            masks = self.window_masks(windows)
+            integrals = self._integrate(np.concatenate([per_flow, per_flow * self.cabin_flow]), masks)
+        design_int, actual_int = integrals[:len(states)][s_inv], integrals[len(states):][s_inv]
+
+        for k, window in enumerate(windows):
+            table[f'heat_orig_{window.name}'] = n * design_per_cabin * design_int[:, k] / cop
+            table[f'heat_dcv_{window.name}'] = n * actual_int[:, k] / cop
+
+        for kind, orig_col, dcv_col in result_columns(windows):
+            orig, dcv = table[orig_col].to_numpy(), table[dcv_col].to_numpy()
+            table[f"{kind}_saving"] = orig - dcv
+            table[f"{kind}_saving_pct"] = np.where(orig > 0, (orig - dcv) / np.where(orig > 0, orig, 1) * 100, 0.0)
+        return table
+
+    def power_arrays(self, config=None, windows=DEFAULT_WINDOWS, rows=slice(None)):
+        """Fan and heating power in kW as ``{column: array}`` for the grid rows ``rows``."""
+        config = config or EnergyConfig()
+        n, d_flow = config.num_cabins, config.design_flow_per_cabin
+        design_fan_kw = n * d_flow / 3600 * config.sfp
+        cabin_flow = self.cabin_flow[rows]
+        series = {'fan_orig': np.where(self.fan_on[rows], design_fan_kw, 0.0)}
+        if d_flow > 0:
+            series['fan_dcv'] = np.where(cabin_flow > 0, fan_poly(cabin_flow / d_flow), 0.0) * design_fan_kw
+        else:
+            series['fan_dcv'] = np.zeros_like(cabin_flow)
+
+        h_supply = psychrometrics.enthalpy_point(config.t_supply_c, config.rh_supply * 100, self.p_atm)
+        per_flow = heating_kw_per_flow(self.h_amb[rows], self.density[rows], h_supply) / config.cop
+        for window, mask in zip(windows, self.window_masks(windows)[:, rows]):
+            series[f'heat_orig_{window.name}'] = np.where(mask, n * d_flow * per_flow, 0.0)
+            series[f'heat_dcv_{window.name}'] = np.where(mask, n * cabin_flow * per_flow, 0.0)
+        return series
+
+    def subset(self, start=None, end=None):
+        """Model restricted to grid rows in ``[start, end]`` (anything pandas can parse)."""
+        rows = self.master_df.index.slice_indexer(start, end)
+        arrays = {k: np.asarray(v)[rows] for k, v in self.to_arrays().items()}
+        return type(self).from_arrays(arrays, self.p_atm, self.dt_h, master_df=self.master_df.iloc[rows])
+
+    def evaluate_flows(self, flows, config=None, windows=DEFAULT_WINDOWS):
+        """DCV fan and heating energy in kWh for alternative per-cabin flow profiles.
+
+        ``flows`` is ``(profiles x timesteps)`` in m3/h on this model's grid,
+        e.g. from a controller replay. Rows where the measured trace has no
+        flow (fan off, or no data) carry no flow in any profile either, so
+        the profiles cover the same operating hours as the ``fan_orig``
+        baseline of :meth:`evaluate`. Returns ``fan_dcv`` and one
+        ``heat_dcv_<window>`` array per window, one value per profile.
+        """
+        config = config or EnergyConfig()
+        flows = np.where(self.fan_on, np.atleast_2d(np.asarray(flows, dtype=float)), 0.0)
+        n, d_flow = config.num_cabins, config.design_flow_per_cabin
+        design_fan_kw = n * d_flow / 3600 * config.sfp
+        fan_frac = np.where(flows > 0, fan_poly(flows / d_flow), 0.0) if d_flow > 0 else np.zeros_like(flows)
+        out = {'fan_dcv': design_fan_kw * self._integrate(fan_frac)}
+
+        h_supply = psychrometrics.enthalpy_point(config.t_supply_c, config.rh_supply * 100, self.p_atm)
+        per_flow = self._heating_kw_per_flow([h_supply])[0]
+        heat = n * self._integrate(flows * per_flow, self.window_masks(windows)) / config.cop
+        for k, window in enumerate(windows):
+            out[f'heat_dcv_{window.name}'] = heat[:, k]
+        return out
+
+    def evaluate(self, config=None, windows=DEFAULT_WINDOWS):
+        """Energies in kWh for a single :class:`EnergyConfig` as a dict."""
+        config = config or EnergyConfig()
+        row = self.sweep(windows=windows, **asdict(config)).iloc[0]
+        return {col: float(row[col]) for _, orig_col, dcv_col in result_columns(windows) for col in (orig_col, dcv_col)}
+
+
+SAVING_LABELS = {
+    "fan_saving_pct": "Fan power",
+    "heat_harbour_saving_pct": "Heating (harbour mode)",
+    "heat_24h_saving_pct": "Heating (full day)",
+}
+
+
+def sweep_figure(table, x="num_cabins", metrics=SAVING_LABELS):
+    """Line chart of savings against the swept parameter ``x``."""
+    # plotly is only needed for the chart, so it is not loaded with the model
+    import plotly.graph_objects as go
+    table = table.sort_values(x)
+    fig = go.Figure()
+    for column, label in metrics.items():
+        fig.add_trace(go.Scatter(x=table[x], y=table[column], mode='lines+markers', name=label))
+    fig.update_layout(height=350, margin=dict(l=20, r=0, t=30, b=20), template="plotly_white",
+                      xaxis_title=x.replace("_", " "), yaxis_title="Savings [%]")
+    return fig
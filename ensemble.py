@@ -0,0 +1,191 @@
+"""Ensemble evaluation of the DCV savings over resampled weather and flow years.
+
+The single measured weather year and the December velocity trace (which is
+extrapolated to the whole year) give one savings figure without any
+uncertainty. An :class:`Ensemble` draws many alternative years from them by
+day-block bootstrap:
+
+* weather: each sailing day takes the weather of a random sailing day within
+  ``window_days`` of the same day of the year (circularly), so the seasonal
+  cycle is kept;
+* velocity: each sailing day takes the flow profile of any sailing day.
+
+Days outside the schedule stay as they are. A member is only a pair of row
+index arrays into the route's prepared model, so ambient enthalpy and
+density are gathered from the arrays computed once through the cached
+psychrometric table instead of being recomputed per member. Members are
+evaluated in blocks as (members x timesteps) arrays; peak memory depends on
+the block size, not on the ensemble size::
+
+    python ensemble.py --members 500 --cabins 120 -o ensemble.csv
+"""
+import argparse
+import sys
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+import energy
+import psychrometrics
+from batch import parse_window, write_results
+from routes import RouteRegistry
+from scenarios import DEFAULT_WINDOWS
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def analog_days(active, window_days=None):
+    """Candidate source days of every active day as ``(targets, pool, counts)``.
+
+    Row ``i`` of ``pool`` holds the ``counts[i]`` active days within
+    ``window_days`` of ``targets[i]`` (circular in the day of the year), or
+    all active days when ``window_days`` is None.
+    """
+    n = len(active)
+    targets = np.flatnonzero(active)
+    if window_days is None:
+        return targets, np.broadcast_to(targets, (len(targets), len(targets))), np.full(len(targets), len(targets))
+    dist = np.abs(targets[:, None] - targets[None, :])
+    near = np.minimum(dist, n - dist) <= window_days
+    counts = near.sum(axis=1)
+    # Stable sort moves each row's candidates to the front, in day order
+    order = np.argsort(~near, axis=1, kind="stable")
+    return targets, targets[order], counts
+
+
+def day_bootstrap(num_days, analogs, rng):
+    """Source day for every day: active days draw one of their analogs, others keep their own."""
+    targets, pool, counts = analogs
+    source = np.arange(num_days)
+    pick = (rng.random(len(targets)) * counts).astype(int)
+    source[targets] = pool[np.arange(len(targets)), pick]
+    return source
+
+
+class Ensemble:
+    """Bootstrapped weather/flow years of one route model; member 0 is the measured year."""
+
+    def __init__(self, model, members=200, window_days=15, weather=True, velocity=True, seed=0):
+        self.model = model
+        self.members = members
+        self.window_days = window_days
+        self.weather = weather
+        self.velocity = velocity
+        self.seed = seed
+
+        self.h_amb = np.asarray(model.h_amb, dtype=float)
+        self.density = np.asarray(model.density, dtype=float)
+        self.cabin_flow = np.asarray(model.cabin_flow, dtype=float)
+        self.rows_per_day = int(round(24 / model.dt_h))
+        self.num_days = len(self.cabin_flow) // self.rows_per_day
+        day_rows = slice(0, self.num_days * self.rows_per_day)
+        weather_days = (~np.isnan(self.h_amb[day_rows])).reshape(self.num_days, -1).any(axis=1)
+        flow_days = (self.cabin_flow[day_rows] > 0).reshape(self.num_days, -1).any(axis=1)
+        self._weather_analogs = analog_days(weather_days, window_days)
+        self._flow_analogs = analog_days(flow_days)
+
+    def _rows(self, source_days, active_rows):
+        """Grid row index from a source day per day; inactive rows and the partial last day keep their own."""
+        rows = np.arange(len(active_rows))
+        full = self.num_days * self.rows_per_day
+        offset = np.arange(self.rows_per_day)
+        drawn = (source_days[:, None] * self.rows_per_day + offset).ravel()
+        rows[:full] = np.where(active_rows[:full], drawn, rows[:full])
+        return rows
+
+    def member_rows(self, member):
+        """``(weather rows, flow rows)`` of one member, reproducible from ``seed`` and ``member``."""
+        identity = np.arange(len(self.cabin_flow))
+        if member == 0:
+            return identity, identity
+        rng = np.random.default_rng([self.seed, member])
+        weather_rows = flow_rows = identity
+        if self.weather:
+            weather_rows = self._rows(day_bootstrap(self.num_days, self._weather_analogs, rng), ~np.isnan(self.h_amb))
+        if self.velocity:
+            flow_rows = self._rows(day_bootstrap(self.num_days, self._flow_analogs, rng), self.cabin_flow > 0)
+        return weather_rows, flow_rows
+
+    def run(self, config=None, windows=DEFAULT_WINDOWS, block=32):
+        """Energies and savings of every member, one row per member (kWh over the grid)."""
+        config = config or energy.EnergyConfig()
+        n, d_flow, cop = config.num_cabins, config.design_flow_per_cabin, config.cop
+        design_fan_kw = n * d_flow / 3600 * config.sfp
+        h_supply = psychrometrics.enthalpy_point(config.t_supply_c, config.rh_supply * 100, self.model.p_atm)
+        masks = self.model.window_masks(windows)
+        mask_weights = (masks * self.model.weights).T
+
+        columns = {c: np.empty(self.members) for _, orig, dcv in energy.result_columns(windows) for c in (orig, dcv)}
+        for lo in range(0, self.members, block):
+            members = range(lo, min(lo + block, self.members))
+            weather_rows, flow_rows = (np.stack(r) for r in zip(*(self.member_rows(m) for m in members)))
+            flow = self.cabin_flow[flow_rows]
+            fan_frac = np.where(flow > 0, energy.fan_poly(flow / d_flow), 0.0) if d_flow > 0 else np.zeros_like(flow)
+            rows = slice(lo, lo + len(members))
+            columns['fan_dcv'][rows] = design_fan_kw * (fan_frac @ self.model.weights)
+            columns['fan_orig'][rows] = design_fan_kw * ((flow > 0) @ self.model.weights)
+            del fan_frac
+
+            per_flow = energy.heating_kw_per_flow(self.h_amb[weather_rows], self.density[weather_rows], h_supply)
+            heat_orig = n * d_flow * (per_flow @ mask_weights) / cop
+            per_flow *= flow
+            heat_dcv = n * (per_flow @ mask_weights) / cop
+            for k, window in enumerate(windows):
+                columns[f'heat_orig_{window.name}'][rows] = heat_orig[:, k]
+                columns[f'heat_dcv_{window.name}'][rows] = heat_dcv[:, k]
+
+        table = pd.DataFrame({'member': np.arange(self.members)})
+        for kind, orig_col, dcv_col in energy.result_columns(windows):
+            orig, dcv = columns[orig_col], columns[dcv_col]
+            table[orig_col] = orig
+            table[dcv_col] = dcv
+            table[f"{kind}_saving"] = orig - dcv
+            table[f"{kind}_saving_pct"] = np.where(orig > 0, (orig - dcv) / np.where(orig > 0, orig, 1) * 100, 0.0)
+        return table
+
+
+def bands(table, percentiles=PERCENTILES, metrics=energy.SAVING_LABELS):
+    """Percentiles over the members of each saving metric; ``measured`` is member 0."""
+    values = table[list(metrics)]
+    out = pd.DataFrame(np.percentile(values.to_numpy(), percentiles, axis=0).T,
+                       index=list(metrics), columns=[f"p{p:g}" for p in percentiles])
+    out.insert(0, "measured", values.iloc[0].to_numpy())
+    out.insert(0, "metric", [metrics[m] for m in metrics])
+    return out
+
+
+def main(argv=None):
+    defaults = energy.EnergyConfig()
+    parser = argparse.ArgumentParser(description="Evaluate the DCV savings over bootstrapped weather and flow years.")
+    parser.add_argument("--route", default=None, help="route name (default: first route)")
+    parser.add_argument("--members", type=int, default=200, help="ensemble size, including the measured year")
+    parser.add_argument("--window-days", type=int, default=15, help="seasonal window of the weather bootstrap [days]")
+    parser.add_argument("--no-weather", action="store_true", help="keep the measured weather")
+    parser.add_argument("--no-velocity", action="store_true", help="keep the measured flow profile")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cabins", type=int, default=defaults.num_cabins)
+    parser.add_argument("--window", action="append", help="heating window name=HH:MM-HH:MM (repeatable); default harbour + 24h")
+    parser.add_argument("-o", "--output", default=None, help="per-member results as .csv or .json, '-' for CSV on stdout")
+    args = parser.parse_args(argv)
+
+    registry = RouteRegistry()
+    route = args.route or registry.names()[0]
+    windows = tuple(parse_window(w) for w in args.window) if args.window else DEFAULT_WINDOWS
+    config = energy.EnergyConfig(num_cabins=args.cabins)
+    ens = Ensemble(registry.model(route), args.members, args.window_days,
+                   weather=not args.no_weather, velocity=not args.no_velocity, seed=args.seed)
+    print(f"Evaluating {args.members} members of {route}", file=sys.stderr)
+    table = ens.run(config, windows)
+    metrics = {f"{kind}_saving_pct": kind for kind, _, _ in energy.result_columns(windows)}
+    # The bands are the result; they only move to stderr when the per-member CSV takes stdout
+    out = sys.stderr if args.output == "-" else sys.stdout
+    print(f"{route}: {args.members} members, savings [%]", file=out)
+    print(bands(table, metrics=metrics).to_string(index=False, float_format="{:.1f}".format), file=out)
+    if args.output:
+        write_results(table, args.output, {"route": route, "config": asdict(config), "members": args.members,
+                                           "window_days": args.window_days, "seed": args.seed})
+
+
+if __name__ == "__main__":
+    main()
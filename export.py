@@ -0,0 +1,216 @@
+"""Arrow IPC and Parquet export of computed series and KPI rollups.
+
+Two tables can be exported for any :class:`energy.EnergyModel` (a route
+model, or a fleet model from :mod:`fleet`) and configuration:
+
+* ``series``: the model grid with ambient temperature, humidity, enthalpy
+  and density, the per-cabin flow and every fan/heating power column [kW];
+* ``kpis``: baseline, DCV and savings in kWh per month (``YYYY.MM``, as on
+  the dashboard) and for the whole period, one row per result kind.
+
+Tables are produced as Arrow record batches straight from the model's
+numpy arrays (no DataFrame in between) and written batch by batch, so an
+export never holds more than one batch of computed power columns. The same
+writers serve the dashboard's download buttons, the command line and a
+small local HTTP endpoint::
+
+    python export.py --table series --cabins 240 -o oslo.parquet
+    python export.py --serve --port 8765
+    curl -o oslo.arrows "http://127.0.0.1:8765/series.arrow?num_cabins=240"
+"""
+import argparse
+import urllib.parse
+from dataclasses import asdict, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import energy
+from energyindex import EnergyIndex
+from routes import RouteRegistry
+from scenarios import DEFAULT_WINDOWS
+from timeindex import month_label
+
+BATCH_ROWS = 65_536
+SERIES_INPUTS = ("temperature", "relative_humidity")
+# format -> (MIME type, file extension)
+FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def series_schema(windows=DEFAULT_WINDOWS):
+    power = [pa.field(c, pa.float64()) for _, orig, dcv in energy.result_columns(windows) for c in (orig, dcv)]
+    return pa.schema([
+        pa.field("Time", pa.timestamp("ns")),
+        *(pa.field(c, pa.float64()) for c in SERIES_INPUTS),
+        pa.field("h_amb", pa.float64()),
+        pa.field("density", pa.float64()),
+        pa.field("cabin_flow", pa.float64()),
+        *power,
+    ])
+
+
+def series_batches(model, config=None, windows=DEFAULT_WINDOWS, batch_rows=BATCH_ROWS):
+    """Record batches of the model grid and its power columns, ``batch_rows`` rows each."""
+    schema = series_schema(windows)
+    times = model.master_df.index.as_unit("ns").asi8
+    inputs = {c: model.master_df[c].to_numpy(dtype=float) for c in SERIES_INPUTS}
+    inputs.update(h_amb=np.asarray(model.h_amb, dtype=float), density=np.asarray(model.density, dtype=float),
+                  cabin_flow=np.asarray(model.cabin_flow, dtype=float))
+    for lo in range(0, len(times), batch_rows):
+        rows = slice(lo, lo + batch_rows)
+        columns = {"Time": times[rows], **{c: v[rows] for c, v in inputs.items()}}
+        columns.update(model.power_arrays(config, windows, rows))
+        yield pa.RecordBatch.from_arrays([pa.array(columns[f.name], type=f.type) for f in schema], schema=schema)
+
+
+KPI_SCHEMA = pa.schema([
+    pa.field("period", pa.string()),
+    pa.field("start", pa.timestamp("ns")),
+    pa.field("end", pa.timestamp("ns")),
+    pa.field("kind", pa.string()),
+    pa.field("baseline_kwh", pa.float64()),
+    pa.field("dcv_kwh", pa.float64()),
+    pa.field("saving_kwh", pa.float64()),
+    pa.field("saving_pct", pa.float64()),
+])
+
+
+def kpi_batches(model, config=None, windows=DEFAULT_WINDOWS):
+    """One record batch per month plus one for the whole period (``period == "total"``)."""
+    index = EnergyIndex.from_model(model, config, windows)
+    months = np.arange(index.start.astype("datetime64[M]"), index.end.astype("datetime64[M]") + 1)
+    bounds = [(month_label(m), m.astype("datetime64[ns]"), (m + 1).astype("datetime64[ns]")) for m in months]
+    bounds.append(("total", index.start, index.end))
+    for period, start, end in bounds:
+        savings = index.savings(start, end)
+        orig = np.array([s[1] for s in savings])
+        dcv = np.array([s[2] for s in savings])
+        pct = np.where(orig > 0, (orig - dcv) / np.where(orig > 0, orig, 1) * 100, 0.0)
+        n = len(savings)
+        yield pa.RecordBatch.from_arrays([
+            pa.array([period] * n), pa.array(np.full(n, start.astype(np.int64)), pa.timestamp("ns")),
+            pa.array(np.full(n, end.astype(np.int64)), pa.timestamp("ns")), pa.array([s[0] for s in savings]),
+            pa.array(orig), pa.array(dcv), pa.array(orig - dcv), pa.array(pct),
+        ], schema=KPI_SCHEMA)
+
+
+TABLES = {
+    "series": (series_batches, series_schema),
+    "kpis": (kpi_batches, lambda windows: KPI_SCHEMA),
+}
+
+
+def write(batches, schema, sink, fmt="parquet", metadata=None):
+    """Write record batches to ``sink`` (path or binary file object) as they are produced."""
+    schema = schema.with_metadata({k: str(v) for k, v in (metadata or {}).items()})
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif fmt == "parquet":
+        with pq.ParquetWriter(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {sorted(FORMATS)}")
+
+
+def export(model, table="series", fmt="parquet", sink=None, config=None, windows=DEFAULT_WINDOWS, metadata=None):
+    """Write ``table`` of ``model`` to ``sink``; returns the bytes when ``sink`` is None."""
+    make_batches, make_schema = TABLES[table]
+    config = config or energy.EnergyConfig()
+    metadata = {**asdict(config), **(metadata or {})}
+    if sink is not None:
+        write(make_batches(model, config, windows), make_schema(windows), sink, fmt, metadata)
+        return None
+    out = pa.BufferOutputStream()
+    write(make_batches(model, config, windows), make_schema(windows), out, fmt, metadata)
+    return out.getvalue().to_pybytes()
+
+
+def parse_config(query):
+    """:class:`energy.EnergyConfig` from query parameters named after its fields."""
+    defaults = energy.EnergyConfig()
+    values = {}
+    for f in fields(energy.EnergyConfig):
+        if f.name in query:
+            values[f.name] = type(getattr(defaults, f.name))(query[f.name][-1])
+    return energy.EnergyConfig(**values)
+
+
+def registry_version(registry, route):
+    return {"source_version": "/".join(registry.version(route))}
+
+
+def make_handler(registry):
+    class ExportHandler(BaseHTTPRequestHandler):
+        """``GET /<series|kpis>.<arrow|parquet>?route=...&<EnergyConfig field>=...``"""
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            name, _, fmt = url.path.strip("/").partition(".")
+            query = urllib.parse.parse_qs(url.query)
+            if name not in TABLES or fmt not in FORMATS:
+                self.send_error(404, f"Expected /<{'|'.join(TABLES)}>.<{'|'.join(FORMATS)}>")
+                return
+            try:
+                route = query.get("route", registry.names())[0]
+                config = parse_config(query)
+                model = registry.model(route)
+            except (KeyError, ValueError, TypeError) as e:
+                self.send_error(400, str(e))
+                return
+            mime, ext = FORMATS[fmt]
+            self.send_response(200)
+            self.send_header("Content-Type", mime)
+            self.send_header("Content-Disposition", f'attachment; filename="{name}{ext}"')
+            # Length is unknown while batches are still being computed; the body ends when the connection closes
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            export(model, name, fmt, self.wfile, config, metadata={"route": route, **registry_version(registry, route)})
+
+    return ExportHandler
+
+
+def serve(registry, host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(registry))
+    print(f"Serving exports on http://{host}:{port}/ (series.arrow, series.parquet, kpis.arrow, kpis.parquet)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export energy model series and KPIs as Arrow IPC or Parquet.")
+    parser.add_argument("--route", default=None, help="route name (default: first route)")
+    parser.add_argument("--table", choices=sorted(TABLES), default="series")
+    parser.add_argument("--cabins", type=int, default=energy.EnergyConfig().num_cabins)
+    parser.add_argument("-o", "--output", help="output file; the format follows the extension (.parquet, .arrows/.arrow)")
+    parser.add_argument("--serve", action="store_true", help="run the local HTTP export endpoint instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    registry = RouteRegistry()
+    if args.serve:
+        serve(registry, args.host, args.port)
+        return
+    if not args.output:
+        parser.error("--output is required unless --serve is given")
+    route = args.route or registry.names()[0]
+    fmt = "parquet" if args.output.endswith(".parquet") else "arrow"
+    export(registry.model(route), args.table, fmt, args.output, energy.EnergyConfig(num_cabins=args.cabins),
+           metadata={"route": route, **registry_version(registry, route)})
+
+
+if __name__ == "__main__":
+    main()
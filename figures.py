@@ -0,0 +1,205 @@
+"""Measurement-page charts, cached as serialized Plotly JSON.
+
+Building the two-row measurement figure (downsampling, ``make_subplots``,
+traces, shapes and the axis styling) takes far longer than sending it, and
+every session viewing the same month builds the same figure. Figures are
+therefore serialized once and kept in a process-wide :class:`FigureCache`,
+keyed by cabin, month, window, point budget and dataset version:
+
+* entries are evicted least recently used first once the cached JSON
+  exceeds ``max_bytes`` (``FIGURE_CACHE_MAX_MB``, 64 MB by default);
+* a hit only turns the JSON back into a figure object without validation,
+  so repeat views skip figure construction entirely;
+* :func:`prewarm` builds the full-month charts of the latest months in the
+  background once the measurement page is first opened, so switching to
+  another recent month is already a hit.
+"""
+import datetime
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+import datastore
+import downsample
+import occupancy
+import profiling
+from timeindex import TimeIndex, month_label, to_epoch_ns
+
+MAX_BYTES = int(os.environ.get("FIGURE_CACHE_MAX_MB", "64")) * 2**20
+PREWARM_MONTHS = 3
+SOURCES = ("co2", "flowrate")
+FLOW_COLUMN = "SmartCabin - Supply flowrate"
+
+
+def to_payload(fig):
+    return pio.to_json(fig, validate=False)
+
+
+def from_payload(payload):
+    # The payload was produced from a validated figure; validating it again costs as much as building it
+    return go.Figure(json.loads(payload), _validate=False)
+
+
+class FigureCache:
+    """Thread-safe LRU of figure JSON payloads, bounded by their total size."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()    # key -> payload, in LRU order
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return payload
+
+    def put(self, key, payload):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            # Never evict the entry just stored, even if it alone exceeds the cap
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def payload(self, key, build):
+        """JSON of the figure under ``key``, from the cache or serialized from ``build()``."""
+        payload = self.get(key)
+        if payload is not None:
+            return payload
+        # Built outside the lock: concurrent misses of one key build it twice, but never block other keys
+        payload = to_payload(build())
+        self.put(key, payload)
+        return payload
+
+    def figure(self, key, build):
+        return from_payload(self.payload(key, build))
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "mb": self._bytes / 2**20, "max_mb": self.max_bytes / 2**20,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache shared by all sessions."""
+    global _default
+    # Sessions run in separate threads; without the lock two first visits could each create a cache
+    with _default_lock:
+        if _default is None:
+            _default = FigureCache()
+        return _default
+
+
+def measurement_version():
+    """Version of the datasets behind the measurement chart; changes when either CSV is edited."""
+    return tuple(datastore.signature(name) for name in SOURCES)
+
+
+def month_bounds(label):
+    """``[start, end)`` of month ``label`` (``YYYY.MM``) as datetimes, as picked on the measurement page."""
+    start = datetime.datetime.strptime(label, "%Y.%m")
+    return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+
+def measurement_figure(co2_times, co2, flow_times, flow, occupied=None, n_out=downsample.CHART_WIDTH_PX):
+    """CO2 and supply flowrate over one window; ``occupied`` ``(starts, ends)`` are shaded behind the CO2."""
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1, subplot_titles=("CO2 Concentration (shaded: occupied)", "VAV Supply Air Flowrate"))
+    fig.add_trace(downsample.line_trace(co2_times, co2, n_out, line=dict(color='#ff730f', width=1), fill='tozeroy', fillcolor='rgba(255, 115, 15, 0.05)'), row=1, col=1)
+    fig.add_trace(downsample.line_trace(flow_times, flow, n_out, line=dict(color='#004499', width=1), fill='tozeroy', fillcolor='rgba(0, 68, 153, 0.05)'), row=2, col=1)
+    # Occupied periods as shaded bands behind the CO2 trace, passed as one list instead of one add_vrect call each
+    starts, ends = occupied if occupied is not None else ([], [])
+    starts, ends = (np.asarray(t, dtype=np.int64).view('datetime64[ns]') for t in (starts, ends))
+    occupied_shapes = [
+        dict(type="rect", xref="x", yref="y domain", x0=str(t0), x1=str(t1), y0=0, y1=1, fillcolor="rgba(34, 197, 94, 0.12)", line_width=0, layer="below")
+        for t0, t1 in zip(starts, ends)
+    ]
+    fig.update_layout(height=500, margin=dict(l=20, r=0, t=50, b=20), showlegend=False, template="plotly_white", shapes=occupied_shapes)
+    fig.update_annotations(font_size=13, font_family="Satoshi, sans-serif", x=0.5, xanchor='left')
+    fig.update_xaxes(tickfont=dict(size=12), gridcolor='#F5F5F5')
+    # Axis titles sit close to the (slightly smaller) ticks to save space
+    for row, title in ((1, "ppm"), (2, "m³/h")):
+        fig.update_yaxes(title_text=title, title_font=dict(size=12, family="Satoshi, sans-serif"), title_standoff=0,
+                         tickfont=dict(size=12), gridcolor='#F5F5F5', row=row, col=1)
+    return fig
+
+
+class MeasurementCharts:
+    """Measurement chart of one cabin for any window, served from a :class:`FigureCache`."""
+
+    def __init__(self, co2_df, flow_df, co2_index, flow_index, timeline, version, cache=None, cabin=0):
+        self.co2_df, self.flow_df = co2_df, flow_df
+        self.co2_index, self.flow_index = co2_index, flow_index
+        self.timeline = timeline
+        self.version = version
+        # An empty cache is falsy (len 0), so compare with None
+        self.cache = cache if cache is not None else default_cache()
+        self.cabin = cabin
+
+    @classmethod
+    def from_datastore(cls, cache=None):
+        """Charts of the measured cabin from the (memory-mapped) datasets, outside any Streamlit session."""
+        co2_df, flow_df = (datastore.load_frame(name) for name in SOURCES)
+        return cls(co2_df, flow_df, TimeIndex(co2_df['Time'].to_numpy()), TimeIndex(flow_df['Time'].to_numpy()),
+                   occupancy.detect_dataset(SOURCES[0]), measurement_version(), cache)
+
+    def key(self, start, end, n_out=downsample.CHART_WIDTH_PX):
+        start_ns, end_ns = int(to_epoch_ns(start)), int(to_epoch_ns(end))
+        month = month_label(np.int64(start_ns).view("datetime64[ns]"))
+        return ("measurement", self.timeline.cabins[self.cabin], month, start_ns, end_ns, n_out, self.version)
+
+    def build(self, start, end, n_out=downsample.CHART_WIDTH_PX):
+        with profiling.stage("slice zoom window") as s:
+            co2 = self.co2_df.iloc[self.co2_index.between(start, end)]
+            flow = self.flow_df.iloc[self.flow_index.between(start, end)]
+            s.rows = len(co2) + len(flow)
+        with profiling.stage("downsample traces"):
+            return measurement_figure(co2['Time'].to_numpy(), co2[occupancy.CO2_COLUMN].to_numpy(),
+                                      flow['Time'].to_numpy(), flow[FLOW_COLUMN].to_numpy(),
+                                      self.timeline.intervals(self.cabin, start, end), n_out)
+
+    def figure(self, start, end, n_out=downsample.CHART_WIDTH_PX):
+        return self.cache.figure(self.key(start, end, n_out), lambda: self.build(start, end, n_out))
+
+    def prewarm(self, months=PREWARM_MONTHS):
+        """Cache the full-month charts of the latest ``months`` months with data."""
+        for label in self.flow_index.months()[-months:]:
+            start, end = month_bounds(label)
+            self.cache.payload(self.key(start, end), lambda: self.build(start, end))
+
+
+def prewarm(months=PREWARM_MONTHS, cache=None):
+    MeasurementCharts.from_datastore(cache).prewarm(months)
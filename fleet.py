@@ -0,0 +1,172 @@
+"""Fleet-level processing of per-cabin sensor streams.
+
+Each instrumented cabin writes its own partition of a
+:class:`datastore.FleetStore`. :func:`run_fleet` fans the cabins out over a
+process pool: every worker streams its cabins' supply flow onto the
+route's model grid, one stored segment at a time, and returns partial sums,
+so the parent only adds up a few arrays. The summed flow replaces the single-cabin extrapolation in the
+energy model: :func:`fleet_model` gives an :class:`energy.EnergyModel` whose
+per-cabin flow is the measured fleet average, evaluated with
+``num_cabins`` equal to the number of cabins.
+
+Ambient psychrometrics depend only on the route weather, so they are
+computed once for the fleet rather than per cabin.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import datastore
+import energy
+import quality
+import resample
+from streaming import FLOW_COLUMN
+
+FLEET_DIR = os.path.join(".cache", "fleet")
+
+_worker = {}
+
+
+def _init_worker(root, grid, step):
+    _worker.update(store=datastore.FleetStore(root), grid=grid, step=step)
+
+
+def _process_cabins(cabin_ids):
+    """Resample a group of cabins; returns summed flow, reporting count and per-cabin stats."""
+    store, grid, step = _worker["store"], _worker["grid"], _worker["step"]
+    flow_sum = np.zeros(len(grid))
+    reporting = np.zeros(len(grid), dtype=np.int32)
+    stats = []
+    for cabin_id in cabin_ids:
+        flow, samples = partition_flow(store.partition(cabin_id), grid, step)
+        if not samples:
+            stats.append({"cabin": cabin_id, "samples": 0, "coverage": 0.0, "mean_flow_m3h": np.nan})
+            continue
+        valid = ~np.isnan(flow)
+        flow_sum += np.where(valid, flow, 0.0)
+        reporting += valid
+        stats.append({
+            "cabin": cabin_id,
+            "samples": samples,
+            "coverage": float(valid.mean()),
+            "mean_flow_m3h": float(flow[valid].mean()) if valid.any() else np.nan,
+        })
+    return flow_sum, reporting, stats
+
+
+def partition_flow(partition, grid, step):
+    """Supply flow of one cabin partition on ``grid`` and its number of samples.
+
+    The partition is streamed segment by segment through
+    :func:`resample.resample_stream`, so memory is bounded by the segment
+    size rather than the cabin's history. Partitions whose segments overlap
+    in time (late data) are read whole and resampled in one piece.
+    """
+    samples = 0
+
+    def chunks():
+        nonlocal samples
+        for arrays, _ in partition.iter_segments():
+            samples += len(arrays["Time"])
+            yield arrays["Time"], {"flow": arrays[FLOW_COLUMN]}
+
+    flow, filled = np.full(len(grid), np.nan), 0
+    try:
+        for points, cols in resample.resample_stream(chunks(), pd.Timedelta(step), grid):
+            flow[filled:filled + len(points)] = cols["flow"]
+            filled += len(points)
+        return flow, samples
+    except ValueError:
+        # Segments out of time order
+        arrays, _ = partition.read()
+        _, cols = resample.to_grid(arrays["Time"], {"flow": arrays[FLOW_COLUMN]}, step, grid)
+        return cols["flow"], int(len(arrays["Time"]))
+
+
+@dataclass
+class FleetResult:
+    grid: np.ndarray          # int64 epoch ns
+    total_flow: np.ndarray    # m3/h summed over reporting cabins
+    reporting: np.ndarray     # number of cabins with data at each grid point
+    cabins: pd.DataFrame      # per-cabin sample count, coverage, mean flow
+
+    @property
+    def num_cabins(self):
+        return len(self.cabins)
+
+    @property
+    def mean_flow(self):
+        """Flow per cabin averaged over the cabins reporting at each grid point; NaN where none report."""
+        return np.divide(self.total_flow, self.reporting, out=np.full(len(self.total_flow), np.nan),
+                         where=self.reporting > 0)
+
+
+def run_fleet(grid, root=FLEET_DIR, cabin_ids=None, freq=energy.GRID_FREQ, workers=None, group_size=16):
+    """Resample every cabin of the fleet store onto ``grid`` in parallel."""
+    store = datastore.FleetStore(root)
+    cabin_ids = list(cabin_ids) if cabin_ids is not None else store.cabins()
+    step = resample.freq_to_ns(freq)
+    grid = np.asarray(grid, dtype=np.int64)
+    groups = [cabin_ids[i:i + group_size] for i in range(0, len(cabin_ids), group_size)]
+
+    total = np.zeros(len(grid))
+    reporting = np.zeros(len(grid), dtype=np.int32)
+    stats = []
+    if workers == 1 or len(groups) <= 1:
+        _init_worker(root, grid, step)
+        results = map(_process_cabins, groups)
+        for flow_sum, rep, st in results:
+            total += flow_sum
+            reporting += rep
+            stats.extend(st)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(root, grid, step)) as pool:
+            for flow_sum, rep, st in pool.map(_process_cabins, groups):
+                total += flow_sum
+                reporting += rep
+                stats.extend(st)
+    return FleetResult(grid, total, reporting, pd.DataFrame(stats, columns=["cabin", "samples", "coverage", "mean_flow_m3h"]))
+
+
+def weather_grid(df_w, freq=energy.GRID_FREQ, max_gap=None):
+    """Route weather resampled onto its own model grid; with ``max_gap`` longer gaps stay NaN."""
+    times, cols = resample.frame_to_arrays(df_w)
+    grid, cols = resample.to_grid(times, cols, resample.freq_to_ns(freq))
+    if max_gap is not None:
+        covered = quality.service_mask(times, grid, max_gap)
+        cols = {name: np.where(covered, values, np.nan) for name, values in cols.items()}
+    return pd.DataFrame(cols, index=pd.DatetimeIndex(grid.view("datetime64[ns]")))
+
+
+def fleet_model(weather_df, result):
+    """Energy model driven by the measured fleet flow; evaluate it with ``num_cabins=result.num_cabins``.
+
+    Cabins without data at a grid point are left out of its average rather
+    than counted as zero flow; points where no cabin reports have the fan off.
+    """
+    return energy.EnergyModel(weather_df, cabin_flow=result.mean_flow)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet energy from per-cabin sensor partitions.")
+    parser.add_argument("--store", default=FLEET_DIR)
+    parser.add_argument("--weather", default="weather_oslo", help="datastore dataset with the route weather")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    weather_df = weather_grid(datastore.load_clean_frame(args.weather),
+                              max_gap=quality.RULES.get(args.weather, quality.Rules()).max_gap)
+    result = run_fleet(weather_df.index.asi8, args.store, workers=args.workers)
+    model = fleet_model(weather_df, result)
+    res = model.evaluate(energy.EnergyConfig(num_cabins=result.num_cabins))
+    print(f"{result.num_cabins} cabins, mean coverage {result.cabins['coverage'].mean():.1%}")
+    for kind, orig, dcv in energy.result_columns():
+        print(f"{kind:>14}: baseline {res[orig]:,.0f} kWh, DCV {res[dcv]:,.0f} kWh")
+
+
+if __name__ == "__main__":
+    main()
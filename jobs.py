@@ -0,0 +1,95 @@
+"""Background execution of long computations with a keyed result cache.
+
+The dashboard submits a computation under a key that captures everything
+its result depends on (route, configuration, dataset version). Jobs run on
+a thread pool, so the Streamlit script returns immediately and only polls
+progress. Finished results stay in a bounded LRU cache: submitting a key
+that is cached returns the finished job, and submitting a key that is
+still running returns the running job instead of starting it twice.
+"""
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.status = "pending"   # pending -> running -> done | failed
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.traceback = None
+        self.profile = None
+        self.started = self.finished = None
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def report(self, progress, message):
+        """Progress callback handed to the computation (``progress`` in 0..1)."""
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        self.message = message
+
+
+class JobExecutor:
+    def __init__(self, max_workers=2, max_cached=64):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()    # key -> Job, running and finished, in LRU order
+        self._max_cached = max_cached
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """Run ``func(*args, report=job.report, **kwargs)`` unless ``key`` is cached or running."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "failed":
+                self._jobs.move_to_end(key)
+                return job
+            job = Job(key)
+            self._jobs[key] = job
+            self._evict()
+        self._pool.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+            return job
+
+    def _run(self, job, func, args, kwargs):
+        job.status, job.started = "running", time.monotonic()
+        job.report(0.0, "Starting")
+        # Stages of the job are recorded on its own profiler (shown in the ?debug=1 panel)
+        job.profile = profiling.activate(profiling.Profiler())
+        try:
+            job.result = func(*args, report=job.report, **kwargs)
+            job.report(1.0, "Done")
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{e}"
+            job.traceback = traceback.format_exc()
+            job.status = "failed"
+        finally:
+            job.finished = time.monotonic()
+
+    def _evict(self):
+        # Only finished jobs are dropped; running ones are still being polled
+        finished = [k for k, j in self._jobs.items() if j.done]
+        excess = len(self._jobs) - self._max_cached
+        for key in finished[:max(excess, 0)]:
+            del self._jobs[key]
@@ -1,13 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import base64
 import os
-import numpy as np
-from CoolProp.HumidAirProp import HAPropsSI
-from scipy.integrate import simpson
 import datetime
+import threading
+import urllib.parse
+from functools import lru_cache, partial
+import profiling
+# numpy/pandas, plotly, scipy and CoolProp are imported by the pages that use them (see PAGE CONTENT LOGIC)
 
 # 1. Page Config
 st.set_page_config(page_title="Ventilation Dashboard", layout="wide")
@@ -16,22 +15,94 @@ st.set_page_config(page_title="Ventilation Dashboard", layout="wide")
 query_params = st.query_params
 current_page = query_params.get("page", "seazero")
 
-# Function to encode local image to base64
-def get_base64_of_bin_file(bin_file):
-    if os.path.exists(bin_file):
-        with open(bin_file, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    return None
+# --- PROFILING: ?debug=1 shows a per-stage breakdown, DASHBOARD_PROFILE_LOG=<path> appends every run as JSON lines ---
+debug_mode = query_params.get("debug") == "1"
+profile_log = os.environ.get(profiling.LOG_ENV)
+profiler = profiling.activate(profiling.Profiler() if debug_mode or profile_log else None)
+
+# Images are served by Streamlit's static file server (.streamlit/config.toml) instead of being inlined
+# into every rerun; without static serving they fall back to a data URI encoded once per process
+STATIC_DIR = "static"
+
+@lru_cache(maxsize=None)
+def image_src(filename):
+    path = os.path.join(STATIC_DIR, filename)
+    if not os.path.exists(path):
+        return None
+    if st.get_option("server.enableStaticServing"):
+        return f"app/static/{urllib.parse.quote(filename)}"
+    with open(path, 'rb') as f:
+        return f"data:image/png;base64,{base64.b64encode(f.read()).decode()}"
+
+# Parsed datasets are shared by all sessions; the version key changes when a CSV is edited
+@st.cache_resource(show_spinner=False)
+def load_dataset(name, version):
+    return datastore.load_frame(name)
+
+def get_dataset(name):
+    return load_dataset(name, datastore.signature(name))
+
+# Per-month coverage of every dataset, refreshed when any CSV changes
+@st.cache_data(show_spinner=False)
+def load_coverage(versions):
+    import quality
+    return quality.report()
+
+# Month -> row range lookup over the (time-sorted) cached dataset
+@st.cache_resource(show_spinner=False)
+def load_time_index(name, version):
+    return TimeIndex(load_dataset(name, version)['Time'].to_numpy())
+
+def get_time_index(name):
+    return load_time_index(name, datastore.signature(name))
+
+# Monthly original vs. DCV fresh-air volumes integrated from the measured flowrate
+@st.cache_resource(show_spinner=False)
+def load_flow_rollup(version):
+    df = load_dataset("flowrate", version)
+    return MonthlyRollup.from_series(df['Time'].to_numpy(), df['SmartCabin - Supply flowrate'].to_numpy())
+
+def get_flow_rollup():
+    return load_flow_rollup(datastore.signature("flowrate"))
+
+# Occupied intervals detected from the CO2 trace (also cached on disk by content)
+@st.cache_resource(show_spinner=False)
+def load_occupancy(version):
+    return occupancy.detect_dataset("co2")
+
+def get_occupancy():
+    return load_occupancy(datastore.signature("co2"))
+
+# Reader of the live sensor store; refreshed incrementally by the live section
+@st.cache_resource(show_spinner=False)
+def get_live_view(path):
+    return streaming.LiveView(datastore.LiveStore(path))
+
+# Routes load and resample their data on first use, then stay cached per process
+@st.cache_resource(show_spinner=False)
+def get_route_registry():
+    return RouteRegistry()
+
+# Energy runs execute in the background; finished results are kept by route, configuration and data version
+@st.cache_resource(show_spinner=False)
+def get_job_executor():
+    return JobExecutor()
+
+# Measurement charts of the latest months are built once per process in a background thread, started after
+# the first measurement chart is rendered, so other pages never pay for it and month switches hit the cache
+@st.cache_resource(show_spinner=False)
+def start_figure_prewarm():
+    def prewarm():
+        import figures
+        figures.prewarm()
+    thread = threading.Thread(target=prewarm, name="figure-prewarm", daemon=True)
+    thread.start()
+    return thread
 
 # Path to your logo and SeaZero image
-logo_path = "resource/Teknotherm_logo_2020.png"
-seazero_img_path = "resource/Screenshot 2026-01-01 173700.png"
+logo_src = image_src("Teknotherm_logo_2020.png")
 
-logo_base64 = get_base64_of_bin_file(logo_path)
-seazero_base64 = get_base64_of_bin_file(seazero_img_path)
-
-logo_html = f'<img src="data:image/png;base64,{logo_base64}" class="nav-logo-img">' if logo_base64 else '<span class="nav-logo" style="color:#000000; font-weight:900;">TEKNOTHERM</span>'
+logo_html = f'<img src="{logo_src}" class="nav-logo-img">' if logo_src else '<span class="nav-logo" style="color:#000000; font-weight:900;">TEKNOTHERM</span>'
 
 # Enhanced CSS (Consolidated)
 st.markdown(f"""
@@ -142,10 +213,11 @@ if current_page == "seazero":
         """, unsafe_allow_html=True)
     
     with col2:
-        if seazero_base64:
+        seazero_src = image_src("Screenshot 2026-01-01 173700.png")
+        if seazero_src:
             st.markdown(f"""
                 <div style="display: flex; justify-content: center; align-items: center; height: 100%;">
-                    <img src="data:image/png;base64,{seazero_base64}" style="width: 100%; border-radius: 12px; border: 1px solid #E2E8F0;">
+                    <img src="{seazero_src}" style="width: 100%; border-radius: 12px; border: 1px solid #E2E8F0;">
                 </div>
             """, unsafe_allow_html=True)
         else:
@@ -201,33 +273,52 @@ if current_page == "seazero":
         """, unsafe_allow_html=True)
 
 elif current_page == "measurement":
+    with profiling.stage("imports"):
+        import numpy as np
+        from plotly.subplots import make_subplots
+        import datastore
+        import downsample
+        import figures
+        import occupancy
+        import streaming
+        from rollup import MonthlyRollup
+        from timeindex import TimeIndex
     try:
-        dataset_CO2 = pd.read_csv("dataset/updated_file_summary_2025_07_2025_12_co2.csv")
-        dataset_flowrate = pd.read_csv("dataset/updated_file_summary_2025_07_2025_12_flowrate.csv")
-        dataset_CO2['Time'] = pd.to_datetime(dataset_CO2['Time'])
-        dataset_flowrate['Time'] = pd.to_datetime(dataset_flowrate['Time'])
-        dataset_CO2['Month_Display'] = dataset_CO2['Time'].dt.strftime('%Y.%m')
-
-        kpi_table = {
-            "2025.07": {"orig": "57,862", "dcv": "57,862", "save": "0%"},
-            "2025.08": {"orig": "57,862", "dcv": "57,862", "save": "0%"},
-            "2025.09": {"orig": "55,956", "dcv": "55,956", "save": "0%"},
-            "2025.10": {"orig": "57,862", "dcv": "57,862", "save": "0%"},
-            "2025.11": {"orig": "55,956", "dcv": "32,148", "save": "42.5%"},
-            "2025.12": {"orig": "57,862", "dcv": "38,635", "save": "33.2%"}
-        }
+        # Cached frames are shared between sessions, so they are never modified in place
+        with profiling.stage("load datasets") as s:
+            dataset_CO2 = get_dataset("co2")
+            dataset_flowrate = get_dataset("flowrate")
+            s.rows = len(dataset_CO2) + len(dataset_flowrate)
+        with profiling.stage("time indexes"):
+            co2_index = get_time_index("co2")
+            flowrate_index = get_time_index("flowrate")
+
+        with profiling.stage("monthly rollup"):
+            flow_rollup = get_flow_rollup()
+        with profiling.stage("occupancy"):
+            co2_occupancy = get_occupancy()
 
         header_col, selector_col = st.columns([8, 2])
         with header_col:
             st.markdown('<div class="main-title">Demand Control Ventilation of the Smart Cabin in Hurtigruten MS Trollfjord</div>', unsafe_allow_html=True)
         with selector_col:
-            display_options = sorted(list(kpi_table.keys()))
-            selected_display = st.selectbox("", options=display_options, index=5)
-
-        monthly_values = kpi_table.get(selected_display, {"orig": "0", "dcv": "0", "save": "0%"})
+            display_options = flow_rollup.months()
+            selected_display = st.selectbox("", options=display_options, index=len(display_options) - 1)
+
+        month_kpi = flow_rollup.get(selected_display)
+        # Months before DCV can integrate slightly above design flow; they count as no savings
+        monthly_values = {
+            "orig": f"{month_kpi['orig']:,.0f}",
+            "dcv": f"{month_kpi['dcv']:,.0f}",
+            "save": f"{max(month_kpi['save'], 0):.1f}%",
+        } if month_kpi else {"orig": "0", "dcv": "0", "save": "0%"}
         
+        month_start, month_end = figures.month_bounds(selected_display)
+        occupied_starts, occupied_ends = co2_occupancy.intervals(0, month_start, month_end)
+        occupied_h = (occupied_ends - occupied_starts).sum() / 3.6e12
+
         # Updated KPI Section using Energy Result Card format
-        kpi_1, kpi_2, kpi_3, kpi_spacer = st.columns([1.5, 1.5, 1.5, 5.5])
+        kpi_1, kpi_2, kpi_3, kpi_4, kpi_spacer = st.columns([1.5, 1.5, 1.5, 1.5, 4])
         with kpi_1:
             st.markdown(f'<div class="result-card"><div class="kpi-label-alt">Original Fresh Air Amount</div><div class="kpi-value-alt">{monthly_values["orig"]}<span style="font-size:11px;"> m³/month</span></div></div>', unsafe_allow_html=True)
         with kpi_2:
@@ -241,46 +332,70 @@ elif current_page == "measurement":
                     </div>
                 </div>
             """, unsafe_allow_html=True)
+        with kpi_4:
+            st.markdown(f'<div class="result-card"><div class="kpi-label-alt">Occupied Time (CO2)</div><div class="kpi-value-alt">{occupied_h:,.0f}<span style="font-size:11px;"> h/month</span></div></div>', unsafe_allow_html=True)
 
-        f_co2 = dataset_CO2[dataset_CO2['Month_Display'] == selected_display]
-        f_vel = dataset_flowrate[dataset_flowrate['Time'].dt.strftime('%Y.%m') == selected_display]
-
-        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1, subplot_titles=("CO2 Concentration", "VAV Supply Air Flowrate"))
-        fig.add_trace(go.Scatter(x=f_co2['Time'], y=f_co2['CO2_SENSOR'], mode='lines', line=dict(color='#ff730f', width=1), fill='tozeroy', fillcolor='rgba(255, 115, 15, 0.05)'), row=1, col=1)
-        fig.add_trace(go.Scatter(x=f_vel['Time'], y=f_vel['SmartCabin - Supply flowrate'], mode='lines', line=dict(color='#004499', width=1), fill='tozeroy', fillcolor='rgba(0, 68, 153, 0.05)'), row=2, col=1)
-        fig.update_layout(height=500, margin=dict(l=20, r=0, t=50, b=20), showlegend=False, template="plotly_white")
-        fig.update_annotations(
-                font_size=13, 
-                font_family="Satoshi, sans-serif",
-                x=0.5, 
-                xanchor='left'
-            )
-        fig.update_xaxes(tickfont=dict(size=12), gridcolor='#F5F5F5')
-        # Row 1 Y-axis
-        fig.update_yaxes(
-            title_text="ppm",
-            title_font=dict(size=12, family="Satoshi, sans-serif"), # Reduced size
-            title_standoff=0,                                      # Moves title closer to ticks
-            tickfont=dict(size=12),                                # Slightly smaller ticks to save space
-            gridcolor='#F5F5F5',
-            row=1, col=1
+        # Zoom window within the month; narrow windows fall under the point budget and are drawn at full resolution
+        zoom_start, zoom_end = st.slider(
+            "Zoom window", min_value=month_start, max_value=month_end, value=(month_start, month_end),
+            step=datetime.timedelta(hours=1), format="MM/DD HH:mm", key=f"zoom_{selected_display}",
         )
 
-        # Row 2 Y-axis
-        fig.update_yaxes(
-            title_text="m³/h",
-            title_font=dict(size=12, family="Satoshi, sans-serif"), # Reduced size
-            title_standoff=0,                                      # Moves title closer to ticks
-            tickfont=dict(size=12),                                # Slightly smaller ticks to save space
-            gridcolor='#F5F5F5',
-            row=2, col=1
-        )
-        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+        # Charts are served as cached JSON shared by all sessions; only the first view of a window builds it
+        with profiling.stage("build chart"):
+            charts = figures.MeasurementCharts(dataset_CO2, dataset_flowrate, co2_index, flowrate_index, co2_occupancy,
+                                               figures.measurement_version())
+            fig = charts.figure(zoom_start, zoom_end)
+        with profiling.stage("render chart"):
+            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+        start_figure_prewarm()
+
+        # --- Live data: shown while an ingestion process (streaming.py) writes to the live store ---
+        @st.fragment(run_every=5)
+        def live_section():
+            live_view = get_live_view(streaming.LIVE_DIR)
+            live_view.refresh()
+            st.markdown("<hr style='border-top: 1px solid #F1F5F9; margin: 30px 0;'>", unsafe_allow_html=True)
+            st.markdown('<div class="main-title">Live Smart Cabin Data</div>', unsafe_allow_html=True)
+            if not len(live_view):
+                st.info("Waiting for live samples...")
+                return
+
+            recent = live_view.last(np.timedelta64(24, 'h'))
+            live_month = live_view.rollup.months()[-1]
+            live_kpi = live_view.rollup.get(live_month)
+            live_1, live_2, live_3, live_spacer = st.columns([1.5, 1.5, 1.5, 5.5])
+            with live_1:
+                st.markdown(f'<div class="result-card"><div class="kpi-label-alt">CO2 Now</div><div class="kpi-value-alt">{recent["CO2_SENSOR"][-1]:,.0f}<span style="font-size:11px;"> ppm</span></div></div>', unsafe_allow_html=True)
+            with live_2:
+                st.markdown(f'<div class="result-card"><div class="kpi-label-alt">Supply Flowrate Now</div><div class="kpi-value-alt">{recent[streaming.FLOW_COLUMN][-1]:,.1f}<span style="font-size:11px;"> m³/h</span></div></div>', unsafe_allow_html=True)
+            with live_3:
+                st.markdown(f'<div class="result-card"><div class="kpi-label-alt">DCV Fresh Air {live_month}</div><div class="kpi-value-alt">{live_kpi["dcv"]:,.0f}<span style="font-size:11px;"> m³ (-{max(live_kpi["save"], 0):.1f}%)</span></div></div>', unsafe_allow_html=True)
+
+            recent_time = recent['Time'].view('datetime64[ns]')
+            live_fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1, subplot_titles=("CO2 Concentration (last 24 h)", "VAV Supply Air Flowrate (last 24 h)"))
+            live_fig.add_trace(downsample.line_trace(recent_time, recent['CO2_SENSOR'], line=dict(color='#ff730f', width=1)), row=1, col=1)
+            live_fig.add_trace(downsample.line_trace(recent_time, recent[streaming.FLOW_COLUMN], line=dict(color='#004499', width=1)), row=2, col=1)
+            live_fig.update_layout(height=400, margin=dict(l=20, r=0, t=50, b=20), showlegend=False, template="plotly_white")
+            live_fig.update_xaxes(tickfont=dict(size=12), gridcolor='#F5F5F5')
+            live_fig.update_yaxes(tickfont=dict(size=12), gridcolor='#F5F5F5')
+            st.plotly_chart(live_fig, use_container_width=True, config={'displayModeBar': False})
+
+        if os.path.isdir(streaming.LIVE_DIR):
+            live_section()
     except Exception as e:
         st.error(f"Error loading datasets: {e}")
 
 
 elif current_page == "energy":
+    with profiling.stage("imports"):
+        import numpy as np
+        import pandas as pd
+        import energy
+        import export
+        from energyindex import EnergyIndex
+        from jobs import JobExecutor
+        from routes import RouteRegistry
     # --- 1. CONSOLIDATED CSS STYLING ---
     st.markdown("""
         <style>
@@ -449,23 +564,32 @@ elif current_page == "energy":
 
 
 
-    # --- 2. LOGIC FUNCTIONS (From Code 2) ---
-    def get_enthalpy(T_c, RH_pct, P_asm):
-        if np.isnan(T_c) or np.isnan(RH_pct) or T_c == 0: return 0.0
-        try: return HAPropsSI('H', 'T', T_c + 273.15, 'P', P_asm, 'R', RH_pct / 100.0) / 1000.0
-        except: return 0.0
+    RANGE_LABELS = {"fan": "Fan Power", "heat_harbour": "Heating (Harbour Mode)", "heat_24h": "Heating (Full Day)"}
 
-    def get_air_density(T_c, RH_pct, P_asm):
-        if np.isnan(T_c) or T_c <= -273.15 or T_c == 0: return 1.225
-        try:
-            vol = HAPropsSI('V', 'T', T_c + 273.15, 'P', P_asm, 'R', RH_pct / 100.0)
-            return 1.0 / vol
-        except: return 1.225
+    # --- 2. ENERGY PIPELINE (runs on the job executor, reports progress) ---
+    # The job thread has no script run context, so the registry is resolved by the caller and passed in
+    def run_energy(route_registry, route, config, report):
+        # 1. Route data, resampled onto the shared 10-minute grid (cached per route)
+        report(0.05, "Loading and resampling route data")
+        with profiling.stage("1. route model") as s:
+            model = route_registry.model(route)
+            s.rows = len(model.master_df)
 
-    def fan_poly(flow, d_flow, design_fan_power_kw_const):
-        if d_flow <= 0 or flow <= 0: return 0.0
-        x = flow / d_flow
-        return (0.0013 + 0.147*x + 0.9506*x**2 - 0.0998*x**3) * design_fan_power_kw_const
+        # 2. Physics, flow, fan and heating power + Simpson integration (see energy.py),
+        #    plus the cumulative energy index for date-range queries
+        report(0.5, "Integrating fan and heating power")
+        with profiling.stage("2. evaluate configuration"):
+            res = route_registry.evaluate(route, config)
+        report(0.7, "Building the date-range index")
+        with profiling.stage("2. energy index"):
+            index = EnergyIndex.from_model(model, config)
+
+        # 5. Savings vs. vessel size for the same route and constants
+        report(0.85, "Sweeping cabin numbers")
+        with profiling.stage("5. cabin number sweep") as s:
+            sweep = model.sweep(num_cabins=np.arange(20, 401, 20))
+            s.rows = len(sweep)
+        return {'res': res, 'index': index, 'sweep': sweep}
 
     # --- 3. PAGE LAYOUT ---
     left_col, right_col = st.columns([1, 2], gap="large")
@@ -478,101 +602,51 @@ elif current_page == "energy":
         cabin_input = st.text_input("Vessel Cabin number", value="120")
         
         st.markdown('<p style="font-size: 14px; margin-bottom: 8px; font-weight: 500;">Sailing Route</p>', unsafe_allow_html=True)
-        route = st.selectbox("", options=["Oslo - Honningsvåg - Oslo", "Bergen - Kirkenes - Bergen"], index=0, label_visibility="collapsed")
+        route_registry = get_route_registry()
+        route = st.selectbox("", options=route_registry.names(), index=0, label_visibility="collapsed")
         
         run_calc = st.button("Run Calculation")
 
     with right_col:
+        job_executor = get_job_executor()
         if run_calc:
             try:
-                # Constants
-                P_asm, T_supply_c, RH_supply = 101325, 15, 0.85
-                duct_diameter_m, design_flow_per_cabin = 0.08, 87
-                SFP, COP, dt = 2.5, 3.0, 10 / 60 
                 num_cabins = int(cabin_input)
+                config = energy.EnergyConfig(num_cabins=num_cabins)
+                # Same route, configuration and source files -> the finished (or running) job is reused
+                job_key = (route, config, route_registry.version(route))
+                job_executor.submit(job_key, run_energy, route_registry, route, config)
+                st.session_state['energy_run'] = {'route': route, 'config': config, 'key': job_key}
+            except Exception as e:
+                st.session_state.pop('energy_run', None)
+                st.error(f"Calculation Error: {e}")
 
-                # 1. Load Data (Simplified loading logic)
-                # Adjust these paths to your actual environment
-                df_w = pd.read_csv("dataset/hourly_schedule_weather_updated.csv")
-                df_v = pd.read_csv("dataset/VAV_velocity_Oslo-Honningsvåg-Oslo_updated.csv")
-                
-                # --- 2. Process Weather Data ---
-                df_w['Time'] = pd.to_datetime(df_w['Time'])
-                # Numeric columns only for resampling
-                cols_w = df_w.select_dtypes(include=['number']).columns
-                df_w = df_w.groupby('Time')[cols_w].mean().sort_index()
-
-                w_grid = pd.date_range(start=df_w.index.min().floor('10min'), end=df_w.index.max().ceil('10min'), freq='10min')
-                df_w_res = df_w.reindex(df_w.index.union(w_grid)).interpolate(method='linear').reindex(w_grid)
-
-                # --- 3. Process Velocity Data ---
-                df_v['Time'] = pd.to_datetime(df_v['Time'])
-                cols_v = df_v.select_dtypes(include=['number']).columns
-                df_v = df_v.groupby('Time')[cols_v].mean().sort_index()
-
-                v_grid = pd.date_range(start=df_v.index.min().floor('10min'), end=df_v.index.max().ceil('10min'), freq='10min')
-                df_v_res = df_v.reindex(df_v.index.union(v_grid)).interpolate(method='linear').reindex(v_grid)
-
-                # --- 4. Merge into One Dataframe ---
-                # Using suffixes ensures that if both files have a column named 'Value', they become 'Value_w' and 'Value_v'
-                master_df = pd.merge(df_w_res, df_v_res, left_index=True, right_index=True, how='outer', suffixes=('_w', '_v'))
-
-                # 2. Physics Calculations
-                h_supply = HAPropsSI('H', 'T', T_supply_c + 273.15, 'P', P_asm, 'R', RH_supply) / 1000.0
-                
-                master_df['ambient_enthalpy_kj_kg'] = np.vectorize(get_enthalpy)(master_df['temperature'], master_df['relative_humidity'], P_asm)
-                master_df['air_density_kg_m3'] = np.vectorize(get_air_density)(master_df['temperature'], master_df['relative_humidity'], P_asm)
+        energy_run = st.session_state.get('energy_run')
+        energy_job = None
+        if energy_run:
+            energy_job = job_executor.get(energy_run['key'])
+            if energy_job is None:
+                # Dropped from the result cache since; compute it again
+                energy_job = job_executor.submit(energy_run['key'], run_energy, route_registry, energy_run['route'], energy_run['config'])
+
+        if energy_job is not None and not energy_job.done:
+            # Only this fragment reruns while the job is busy, so the rest of the page stays responsive
+            @st.fragment(run_every=0.5)
+            def job_progress():
+                st.progress(energy_job.progress, text=energy_job.message)
+                if energy_job.done:
+                    st.rerun()
+            job_progress()
+        elif energy_job is not None and energy_job.status == "failed":
+            st.error(f"Calculation Error: {energy_job.error}")
+        elif energy_job is not None:
+            try:
+                res = energy_job.result['res']
+                fan_orig, fan_dcv = res['fan_orig'], res['fan_dcv']
+                heat_orig, heat_dcv = res['heat_orig_harbour'], res['heat_dcv_harbour']
+                heat_orig_24h, heat_dcv_24h = res['heat_orig_24h'], res['heat_dcv_24h']
 
-                # 3. Flow & Fan Power
-                master_df['actual_flow_rate_m3h'] = master_df['Velocity'] * (np.pi * (duct_diameter_m/2)**2) * 3600 * num_cabins
-                design_total_flow = design_flow_per_cabin * num_cabins
-                design_fan_power_kw_const = (design_total_flow / 3600) * SFP
-                
-                master_df['design_fan_power_kw'] = np.where(master_df['Velocity'] > 0, design_fan_power_kw_const, 0)
-                master_df['actual_fan_power_kw'] = np.vectorize(fan_poly)(master_df['actual_flow_rate_m3h'], design_total_flow, design_fan_power_kw_const)
-
-                # 4. Heating Power
-                def heat_calc(flow, h_amb, dens):
-                    if h_amb >= h_supply or h_amb == 0 or flow <= 0: return 0.0
-                    return ((flow / 3600) * dens * (h_supply - h_amb)) / COP
-
-                master_df['actual_heating_kw'] = np.vectorize(heat_calc)(master_df['actual_flow_rate_m3h'], master_df['ambient_enthalpy_kj_kg'], master_df['air_density_kg_m3'])
-                master_df['design_heating_kw'] = np.vectorize(heat_calc)(design_total_flow, master_df['ambient_enthalpy_kj_kg'], master_df['air_density_kg_m3'])
-
-                # 5. Apply Heating Mask (e.g., 08:00 to 14:00)
-                heating_mask = master_df.index.isin(master_df.between_time('08:00', '14:00').index)
-                master_df.loc[~heating_mask, ['actual_heating_kw', 'design_heating_kw']] = 0
-
-                # 6. Integration (Simpson)
-                df_clean = master_df.fillna(0)
-                fan_dcv = simpson(y=df_clean['actual_fan_power_kw'].values, dx=dt)
-                fan_orig = simpson(y=df_clean['design_fan_power_kw'].values, dx=dt)
-                heat_dcv = simpson(y=df_clean['actual_heating_kw'].values, dx=dt)
-                heat_orig = simpson(y=df_clean['design_heating_kw'].values, dx=dt)
-
-
-
-                # ... existing integration code ...
-                heat_orig = simpson(y=df_clean['design_heating_kw'].values, dx=dt)
-
-                # --- NEW: 24-Hour Heating Calculation (No Mask) ---
-                # Calculate heating for the full day by NOT applying the 08:00-14:00 mask
-                master_df['actual_heating_24h_kw'] = np.vectorize(heat_calc)(
-                    master_df['actual_flow_rate_m3h'], 
-                    master_df['ambient_enthalpy_kj_kg'], 
-                    master_df['air_density_kg_m3']
-                )
-                master_df['design_heating_24h_kw'] = np.vectorize(heat_calc)(
-                    design_total_flow, 
-                    master_df['ambient_enthalpy_kj_kg'], 
-                    master_df['air_density_kg_m3']
-                )
-
-                df_clean_24 = master_df.fillna(0)
-                heat_dcv_24h = simpson(y=df_clean_24['actual_heating_24h_kw'].values, dx=dt)
-                heat_orig_24h = simpson(y=df_clean_24['design_heating_24h_kw'].values, dx=dt)
-
-                # 7. UI Display Results
+                # 3. UI Display Results (the job key stays in session state so later widget changes keep them)
                 st.markdown('### Detailed Calculation Results')
 
                 results = [
@@ -602,6 +676,42 @@ elif current_page == "energy":
                             </div>''', unsafe_allow_html=True)
 
 
+                # Export of the 10-minute series and monthly KPIs; files are generated when a button is clicked
+                st.markdown('<p style="font-weight: 700; color: #1E293B; font-size: 12px; margin-top: 20px; text-transform: uppercase;">Export</p>', unsafe_allow_html=True)
+                export_model = route_registry.model(energy_run['route'])
+                export_meta = {"route": energy_run['route']}
+                export_name = energy_run['route'].split(" - ")[0].lower()
+                for export_col, (table, fmt, label) in zip(st.columns(4), [
+                    ("series", "parquet", "10-min series (Parquet)"), ("series", "arrow", "10-min series (Arrow)"),
+                    ("kpis", "parquet", "Monthly KPIs (Parquet)"), ("kpis", "arrow", "Monthly KPIs (Arrow)"),
+                ]):
+                    mime, ext = export.FORMATS[fmt]
+                    with export_col:
+                        st.download_button(label, data=partial(export.export, export_model, table, fmt, config=energy_run['config'], metadata=export_meta),
+                                           file_name=f"{export_name}-{energy_run['config'].num_cabins}-{table}{ext}", mime=mime, on_click="ignore")
+
+                # 4. Energy for any date range from the prefix-sum index
+                energy_index = energy_job.result['index']
+                st.markdown('<p style="font-weight: 700; color: #1E293B; font-size: 12px; margin-top: 20px; text-transform: uppercase;">Energy for a Date Range</p>', unsafe_allow_html=True)
+                first_day = pd.Timestamp(energy_index.start).date()
+                last_day = pd.Timestamp(energy_index.end).date()
+                picked = st.date_input("Date range", value=(first_day, last_day), min_value=first_day, max_value=last_day)
+                if len(picked) == 2:
+                    range_start, range_end = picked
+                    with profiling.stage("4. date range query"):
+                        range_rows = [
+                            {"": RANGE_LABELS.get(kind, kind), "Baseline [kWh]": orig, "DCV Mode [kWh]": dcv,
+                             "Savings [kWh]": orig - dcv, "Savings [%]": (orig - dcv) / orig * 100 if orig > 0 else 0}
+                            for kind, orig, dcv in energy_index.savings(range_start, range_end + datetime.timedelta(days=1))
+                        ]
+                    st.dataframe(pd.DataFrame(range_rows).round(1), hide_index=True, use_container_width=True)
+
+                # 5. Savings vs. vessel size for the same route and constants
+                with st.expander("Savings vs. cabin number"):
+                    sweep = energy_job.result['sweep']
+                    st.plotly_chart(energy.sweep_figure(sweep, x="num_cabins"), use_container_width=True, config={'displayModeBar': False})
+                    st.dataframe(sweep[['num_cabins', 'fan_saving', 'heat_harbour_saving', 'heat_24h_saving']].round(0), hide_index=True)
+
             except Exception as e:
                 st.error(f"Calculation Error: {e}")
         else:
@@ -636,3 +746,28 @@ elif current_page == "energy":
         <div style="margin-bottom: 80px;"></div>
 
     """, unsafe_allow_html=True)
+
+# --- PROFILING OUTPUT ---
+if profiler is not None:
+    if profile_log:
+        profiler.write_jsonl(profile_log, page=current_page)
+    if debug_mode:
+        with st.expander(f"Profiling ({profiler.total_seconds * 1e3:,.0f} ms this run)"):
+            st.dataframe(profiler.to_frame().round(2), hide_index=True, use_container_width=True)
+            if current_page == "energy" and energy_job is not None and energy_job.profile is not None:
+                st.caption(f"Background energy job: {energy_job.status}, {energy_job.seconds * 1e3:,.0f} ms")
+                st.dataframe(energy_job.profile.to_frame().round(2), hide_index=True, use_container_width=True)
+        with st.expander(f"Memory budget (process RSS {profiling.rss_bytes() / 2**20:,.0f} MB)"):
+            import datastore
+            from routes import RouteRegistry
+            st.caption("Datasets are memory-mapped read-only: mapped MB are shared by all sessions and processes on the host. "
+                       "Route grids and models prepared in this process are listed below them.")
+            st.dataframe(datastore.memory_budget(derived=get_route_registry().footprint()).round(2), hide_index=True, use_container_width=True)
+            if current_page == "measurement":
+                stats = figures.default_cache().stats()
+                st.caption(f"Figure cache: {stats['entries']} charts, {stats['mb']:,.1f} / {stats['max_mb']:,.0f} MB, "
+                           f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evicted")
+        with st.expander("Data coverage"):
+            st.caption("Rows per month by quality flag; coverage is the share of the month within the gap limit of usable samples.")
+            st.dataframe(load_coverage(tuple(datastore.signature(n) for n in datastore.SCHEMAS)).round(1),
+                         hide_index=True, use_container_width=True)
@@ -0,0 +1,239 @@
+"""Cabin occupancy detected from the CO2 trace.
+
+People in a cabin raise CO2 until it levels off at an occupied steady state
+well above the empty-cabin level; once they leave it decays back. On a
+regular grid the detector therefore looks at two vectorized window
+statistics per sample:
+
+* the least-squares CO2 slope over ``slope_window`` (one correlation with a
+  fixed kernel), and
+* the level above a rolling ``baseline_window`` minimum (the empty level).
+
+A sample is occupied when CO2 rises faster than ``rise_ppm_h``, or sits more
+than ``margin_ppm`` above the baseline without decaying faster than
+``fall_ppm_h``. Run-length encoding then closes unoccupied gaps shorter
+than ``min_gap`` and drops occupied runs shorter than ``min_occupied``.
+Samples further than ``max_gap`` from a measurement are never occupied.
+
+Many cabins are processed at once as a (cabins x timesteps) array, and the
+result is kept as compact intervals (cabin, start, end), split at month
+boundaries, in the :mod:`artifacts` cache.
+"""
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.ndimage import correlate1d, minimum_filter1d
+
+import artifacts
+import datastore
+import resample
+from timeindex import month_label
+
+CO2_COLUMN = "CO2_SENSOR"
+NS_PER_HOUR = 3600 * 10**9
+
+
+@dataclass(frozen=True)
+class OccupancyParams:
+    step: str = "5min"             # detection grid
+    slope_window: str = "30min"    # window of the least-squares slope
+    baseline_window: str = "24h"   # rolling minimum taken as the empty-cabin level
+    rise_ppm_h: float = 60.0       # rising faster than this means people are in
+    fall_ppm_h: float = -60.0      # decaying faster than this means the cabin emptied
+    margin_ppm: float = 150.0      # steady-state excess over the baseline when occupied
+    min_occupied: str = "30min"    # shorter occupied runs are dropped
+    min_gap: str = "30min"         # shorter unoccupied gaps are closed
+    max_gap: str = "30min"         # grid points further than this from a sample are unknown
+
+
+def _steps(duration, step):
+    return max(int(pd.Timedelta(duration).value // step), 1)
+
+
+def runs(mask):
+    """Run-length encoding of a 2-D bool array along its rows: ``(row, start, length, value)``."""
+    rows, cols = mask.shape
+    flat = mask.ravel()
+    if not len(flat):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty, np.empty(0, dtype=bool)
+    # A run starts where the value changes or a new row begins
+    change = np.ones(len(flat), dtype=bool)
+    change[1:] = flat[1:] != flat[:-1]
+    change[::cols] = True
+    starts = np.flatnonzero(change)
+    lengths = np.diff(np.append(starts, len(flat)))
+    return starts // cols, starts % cols, lengths, flat[starts]
+
+
+def _flip_short(mask, value, min_len, interior_only):
+    """Invert runs of ``value`` shorter than ``min_len``; with ``interior_only`` runs touching a row edge are kept."""
+    row, start, length, values = runs(mask)
+    short = (values == value) & (length < min_len)
+    if interior_only:
+        short &= (start > 0) & (start + length < mask.shape[1])
+    if not short.any():
+        return mask
+    return np.repeat(values ^ short, length).reshape(mask.shape)
+
+
+def detect(co2, step_ns, params=None):
+    """Occupied mask of ``co2`` given as (cabins x timesteps) on a regular grid; NaN marks unknown samples."""
+    params = params or OccupancyParams()
+    # ppm readings: float32 halves the memory traffic of the window filters
+    co2 = np.atleast_2d(np.asarray(co2, dtype=np.float32))
+    known = ~np.isnan(co2)
+    filled = np.where(known, co2, np.float32(0))
+
+    # Least-squares slope over the window: correlation with centred sample offsets
+    n = _steps(params.slope_window, step_ns) | 1
+    offsets = np.arange(n) - n // 2
+    kernel = offsets / (offsets @ offsets) * (NS_PER_HOUR / step_ns)
+    slope = correlate1d(filled, kernel, axis=1, mode="nearest")
+    complete = minimum_filter1d(known.view(np.uint8), n, axis=1, mode="nearest").view(bool)
+
+    baseline = minimum_filter1d(np.where(known, co2, np.float32(np.inf)), _steps(params.baseline_window, step_ns), axis=1,
+                                mode="nearest")
+    elevated = co2 - baseline > params.margin_ppm
+
+    occupied = known & complete & ((slope > params.rise_ppm_h) | (elevated & (slope >= params.fall_ppm_h)))
+    occupied = _flip_short(occupied, False, _steps(params.min_gap, step_ns), interior_only=True)
+    occupied = _flip_short(occupied, True, _steps(params.min_occupied, step_ns), interior_only=False)
+    return occupied & known
+
+
+def co2_grid(times, co2, step_ns, grid=None, max_gap="30min"):
+    """CO2 resampled onto a regular grid, NaN further than ``max_gap`` from any sample."""
+    times = np.asarray(times, dtype=np.int64)
+    co2 = np.asarray(co2, dtype=np.float64)
+    valid = ~np.isnan(co2)
+    times, co2 = times[valid], co2[valid]
+    grid, cols = resample.to_grid(times, {CO2_COLUMN: co2}, step_ns, grid)
+    values = cols[CO2_COLUMN]
+    if len(times):
+        pos = np.clip(np.searchsorted(times, grid), 1, len(times) - 1)
+        nearest = np.minimum(np.abs(grid - times[pos - 1]), np.abs(times[pos] - grid))
+        values[nearest > pd.Timedelta(max_gap).value] = np.nan
+    return grid, values
+
+
+class OccupancyTimeline:
+    """Occupied intervals ``[start, end)`` (epoch ns) per cabin, split at month boundaries."""
+
+    def __init__(self, cabins, cabin, start, end):
+        self.cabins = list(cabins)
+        self.cabin = np.asarray(cabin, dtype=np.int32)
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+
+    @classmethod
+    def from_mask(cls, cabins, grid, occupied):
+        step = int(grid[1] - grid[0]) if len(grid) > 1 else 0
+        row, start, length, values = runs(occupied)
+        row, start, length = row[values], start[values], length[values]
+        stop = start + length
+        ends = np.where(stop < len(grid), grid[np.minimum(stop, len(grid) - 1)], grid[-1] + step)
+        idx, starts, ends = split_months(grid[start], ends)
+        return cls(cabins, row[idx], starts, ends)
+
+    def to_arrays(self):
+        return {"cabin": self.cabin, "start": self.start, "end": self.end}
+
+    @classmethod
+    def from_arrays(cls, cabins, arrays):
+        return cls(cabins, arrays["cabin"], arrays["start"], arrays["end"])
+
+    def __len__(self):
+        return len(self.start)
+
+    def intervals(self, cabin=0, start=None, end=None):
+        """``(starts, ends)`` of one cabin (index or id) overlapping ``[start, end)``, clipped to it."""
+        if not isinstance(cabin, (int, np.integer)):
+            cabin = self.cabins.index(cabin)
+        keep = self.cabin == cabin
+        lo = np.iinfo(np.int64).min if start is None else pd.Timestamp(start).value
+        hi = np.iinfo(np.int64).max if end is None else pd.Timestamp(end).value
+        keep &= (self.end > lo) & (self.start < hi)
+        return np.maximum(self.start[keep], lo), np.minimum(self.end[keep], hi)
+
+    def monthly(self):
+        """Occupied hours and number of occupied intervals per cabin and month."""
+        month = self.start.view("datetime64[ns]").astype("datetime64[M]")
+        df = pd.DataFrame({
+            "cabin": np.asarray(self.cabins, dtype=object)[self.cabin] if self.cabins else self.cabin,
+            "month": [month_label(m) for m in month],
+            "occupied_h": (self.end - self.start) / NS_PER_HOUR,
+        })
+        return df.groupby(["cabin", "month"], sort=True).agg(
+            intervals=("occupied_h", "size"), occupied_h=("occupied_h", "sum")).reset_index()
+
+
+def split_months(start, end):
+    """Split ``[start, end)`` intervals (epoch ns) at calendar month boundaries.
+
+    Returns the index of the source interval of every piece and the pieces' bounds.
+    """
+    if not len(start):
+        return np.empty(0, dtype=np.intp), start, end
+    first = start.min().view("datetime64[ns]").astype("datetime64[M]")
+    last = (end.max() - 1).view("datetime64[ns]").astype("datetime64[M]")
+    bounds = np.arange(first, last + 2).astype("datetime64[ns]").view(np.int64)
+    m0 = np.searchsorted(bounds, start, side="right") - 1
+    m1 = np.searchsorted(bounds, end - 1, side="right") - 1
+    count = m1 - m0 + 1
+    idx = np.repeat(np.arange(len(start)), count)
+    month = m0[idx] + np.arange(len(idx)) - np.repeat(np.cumsum(count) - count, count)
+    return idx, np.maximum(start[idx], bounds[month]), np.minimum(end[idx], bounds[month + 1])
+
+
+def detect_series(cabins, series, params=None, grid=None):
+    """Timeline of several cabins; ``series`` is a list of ``(times, co2)`` pairs, one per cabin.
+
+    All cabins are resampled onto one shared grid (their joint span unless
+    ``grid`` is given) and detected in one (cabins x timesteps) pass.
+    """
+    params = params or OccupancyParams()
+    step = resample.freq_to_ns(params.step)
+    if grid is None:
+        first = min(int(np.min(t)) for t, _ in series if len(t))
+        last = max(int(np.max(t)) for t, _ in series if len(t))
+        grid = resample.make_grid(first, last, step)
+    co2 = np.full((len(series), len(grid)), np.nan)
+    for i, (times, values) in enumerate(series):
+        if len(times):
+            co2[i] = co2_grid(times, values, step, grid, params.max_gap)[1]
+    return OccupancyTimeline.from_mask(cabins, grid, detect(co2, step, params))
+
+
+def detect_dataset(name="co2", params=None, cache=None):
+    """Timeline of the single cabin of a measurement dataset, cached by its content and ``params``."""
+    params = params or OccupancyParams()
+    cache = cache or artifacts.default_cache()
+    key = artifacts.make_key("occupancy", artifacts.dataset_digest(name), asdict(params))
+
+    def compute():
+        arrays = datastore.load_arrays(name)
+        valid = datastore.load_validity(name)[CO2_COLUMN]
+        return detect_series([name], [(arrays["Time"][valid], arrays[CO2_COLUMN][valid])], params).to_arrays()
+    return OccupancyTimeline.from_arrays([name], cache.arrays(key, compute))
+
+
+def detect_fleet(store, params=None, cache=None):
+    """Timelines of every cabin partition of a :class:`datastore.FleetStore` that reports CO2."""
+    params = params or OccupancyParams()
+    cache = cache or artifacts.default_cache()
+    key = artifacts.make_key("occupancy-fleet", store.version(), asdict(params))
+
+    def compute():
+        cabins, series = [], []
+        for cabin_id in store.cabins():
+            arrays, _ = store.partition(cabin_id).read()
+            if CO2_COLUMN in arrays:
+                cabins.append(cabin_id)
+                series.append((arrays["Time"], arrays[CO2_COLUMN]))
+        if not cabins:
+            return {"cabins": np.array([], dtype=str), **OccupancyTimeline([], [], [], []).to_arrays()}
+        return {"cabins": np.array(cabins, dtype=str), **detect_series(cabins, series, params).to_arrays()}
+    arrays = cache.arrays(key, compute)
+    return OccupancyTimeline.from_arrays(np.asarray(arrays["cabins"]).tolist(), arrays)
@@ -0,0 +1,129 @@
+"""Lightweight per-stage timing for the dashboard pipelines.
+
+Code marks stages with ``with profiling.stage("name") as s:`` and may set
+``s.rows`` to the number of rows the stage produced. Stages are recorded
+only while a :class:`Profiler` is active for the current context (one
+Streamlit script run); otherwise ``stage`` costs a context-variable lookup.
+Each record holds wall time, rows, the change in resident memory and the
+nesting depth, so nested stages (e.g. resampling inside a route load)
+show up under their parent.
+
+Records can be appended to a JSON-lines file, one line per run, to track
+production runs over time.
+"""
+import contextvars
+import datetime
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+LOG_ENV = "DASHBOARD_PROFILE_LOG"
+
+_active = contextvars.ContextVar("profiler", default=None)
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def rss_bytes():
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    if _PAGE_SIZE:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except OSError:
+            pass
+    try:
+        import resource
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    depth: int
+    seconds: float = 0.0
+    rows: int = None
+    mem_delta_mb: float = 0.0
+
+
+class _NullRecord:
+    """Stand-in yielded when profiling is off; attribute writes are ignored."""
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _NullRecord()
+
+
+class Profiler:
+    def __init__(self):
+        self.records = []
+        self._depth = 0
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = StageRecord(name, self._depth, rows=rows)
+        self.records.append(record)
+        self._depth += 1
+        mem, t = rss_bytes(), time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - t
+            record.mem_delta_mb = (rss_bytes() - mem) / 2**20
+            self._depth -= 1
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def to_frame(self):
+        import pandas as pd
+        df = pd.DataFrame([asdict(r) for r in self.records], columns=["stage", "depth", "seconds", "rows", "mem_delta_mb"])
+        df["stage"] = ["· " * d + s for d, s in zip(df.pop("depth"), df["stage"])]
+        df["rows"] = df["rows"].astype("Int64")
+        df["ms"] = df.pop("seconds") * 1e3
+        return df[["stage", "ms", "rows", "mem_delta_mb"]]
+
+    def write_jsonl(self, path, **context):
+        """Append this run as one JSON line; ``context`` adds fields such as the page."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        line = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            **context,
+            "total_s": round(self.total_seconds, 6),
+            "stages": [asdict(r) for r in self.records],
+        }
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line) + "\n")
+
+
+def activate(profiler):
+    """Make ``profiler`` record the stages of the current context (``None`` turns profiling off)."""
+    _active.set(profiler)
+    return profiler
+
+
+def current():
+    return _active.get()
+
+
+@contextmanager
+def stage(name, rows=None):
+    profiler = _active.get()
+    if profiler is None:
+        yield _NULL
+        return
+    with profiler.stage(name, rows) as record:
+        yield record
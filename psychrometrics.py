@@ -0,0 +1,155 @@
+"""Vectorized psychrometric properties of humid air.
+
+CoolProp's ``HAPropsSI`` is accurate but costs a few tens of microseconds per
+call. The energy model needs enthalpy and density for every 10-minute row, so
+the properties are tabulated once on a (T, RH) grid and evaluated with
+bilinear interpolation. The table is checked against CoolProp when it is
+built and rejected if the interpolation error exceeds the requested bound;
+validated tables are kept in the :mod:`artifacts` cache, so later
+processes skip both steps.
+"""
+import functools
+
+import CoolProp
+import numpy as np
+from CoolProp.HumidAirProp import HAPropsSI
+
+import artifacts
+
+P_ATM = 101325
+
+# Table range covers Norwegian coastal weather with margin; anything outside
+# falls back to direct CoolProp calls.
+T_MIN_C, T_MAX_C = -40.0, 50.0
+
+
+class PsychroTable:
+    """Enthalpy [kJ/kg] and density [kg/m3] of humid air tabulated over (T, RH)."""
+
+    def __init__(self, P=P_ATM, t_step=0.5, rh_step=1.0, t_min=T_MIN_C, t_max=T_MAX_C, tables=None):
+        """``tables``: precomputed ``(h, rho)`` arrays for this grid instead of CoolProp calls."""
+        self.P = P
+        self.t_min, self.t_step = t_min, t_step
+        self.rh_step = rh_step
+        self.t_grid = np.arange(t_min, t_max + t_step / 2, t_step)
+        self.rh_grid = np.arange(0.0, 100.0 + rh_step / 2, rh_step)
+        self.t_max, self.rh_max = self.t_grid[-1], self.rh_grid[-1]
+
+        if tables is not None:
+            self.h, self.rho = tables
+            return
+        T, RH = np.meshgrid(self.t_grid, self.rh_grid, indexing="ij")
+        self.h = _coolprop("H", T, RH, P) / 1000.0
+        self.rho = 1.0 / _coolprop("V", T, RH, P)
+
+    def _interp(self, table, T_c, RH_pct):
+        fi = (T_c - self.t_min) / self.t_step
+        fj = RH_pct / self.rh_step
+        i = np.clip(np.floor(fi).astype(np.intp), 0, len(self.t_grid) - 2)
+        j = np.clip(np.floor(fj).astype(np.intp), 0, len(self.rh_grid) - 2)
+        u, v = fi - i, fj - j
+        return ((1 - u) * (1 - v) * table[i, j] + u * (1 - v) * table[i + 1, j]
+                + (1 - u) * v * table[i, j + 1] + u * v * table[i + 1, j + 1])
+
+    def in_range(self, T_c, RH_pct):
+        return (T_c >= self.t_min) & (T_c <= self.t_max) & (RH_pct >= 0) & (RH_pct <= self.rh_max)
+
+    def enthalpy(self, T_c, RH_pct):
+        return self._interp(self.h, T_c, RH_pct)
+
+    def density(self, T_c, RH_pct):
+        return self._interp(self.rho, T_c, RH_pct)
+
+    def max_error(self):
+        """Largest absolute enthalpy and relative density error over the centres of all cells.
+
+        The centre is where bilinear interpolation is furthest from both
+        neighbouring grid lines, so it bounds the error inside its cell.
+        """
+        t_mid = self.t_grid[:-1] + self.t_step / 2
+        rh_mid = self.rh_grid[:-1] + self.rh_step / 2
+        T, RH = np.meshgrid(t_mid, rh_mid, indexing="ij")
+        h_ref = _coolprop("H", T, RH, self.P) / 1000.0
+        rho_ref = 1.0 / _coolprop("V", T, RH, self.P)
+        h_err = np.max(np.abs(self.enthalpy(T, RH) - h_ref))
+        rho_err = np.max(np.abs(self.density(T, RH) - rho_ref) / rho_ref)
+        return float(h_err), float(rho_err)
+
+
+def _coolprop(prop, T_c, RH_pct, P):
+    T_c, RH_pct = np.asarray(T_c, dtype=float), np.asarray(RH_pct, dtype=float)
+    out = HAPropsSI(prop, "T", T_c.ravel() + 273.15, "P", P, "R", RH_pct.ravel() / 100.0)
+    return np.asarray(out, dtype=float).reshape(T_c.shape)
+
+
+def _coolprop_point(prop, T_c, RH_pct, P, fallback):
+    try:
+        return HAPropsSI(prop, "T", T_c + 273.15, "P", P, "R", RH_pct / 100.0)
+    except Exception:
+        return fallback
+
+
+@functools.lru_cache(maxsize=8)
+def get_table(P=P_ATM, t_step=0.5, rh_step=1.0, h_tol=0.05, rho_rtol=1e-4):
+    """Build (once per process) and validate the lookup table for pressure ``P``.
+
+    ``h_tol`` is the allowed enthalpy error in kJ/kg and ``rho_rtol`` the
+    allowed relative density error, both measured against CoolProp.
+    """
+    def build():
+        table = PsychroTable(P, t_step=t_step, rh_step=rh_step)
+        h_err, rho_err = table.max_error()
+        if h_err > h_tol or rho_err > rho_rtol:
+            raise ValueError(
+                f"Psychrometric table error too large (h: {h_err:.3g} kJ/kg, rho: {rho_err:.3g}); "
+                f"use a finer t_step/rh_step"
+            )
+        return {"h": table.h, "rho": table.rho}
+
+    key = artifacts.make_key("psychro-table", P, t_step, rh_step, T_MIN_C, T_MAX_C, h_tol, rho_rtol,
+                             "all-cells", CoolProp.__version__)
+    arrays = artifacts.default_cache().arrays(key, build)
+    return PsychroTable(P, t_step=t_step, rh_step=rh_step, tables=(arrays["h"], arrays["rho"]))
+
+
+def _evaluate(prop, T_c, RH_pct, P, table, invalid, fallback):
+    T_c = np.asarray(T_c, dtype=float)
+    RH_pct = np.asarray(RH_pct, dtype=float)
+    T_c, RH_pct = np.broadcast_arrays(T_c, RH_pct)
+    table = table or get_table(P)
+
+    out = np.full(T_c.shape, fallback, dtype=float)
+    inside = ~invalid & table.in_range(T_c, RH_pct)
+    values = table.h if prop == "H" else table.rho
+    out[inside] = table._interp(values, T_c[inside], RH_pct[inside])
+
+    # Rare points outside the table go through CoolProp one by one
+    outside = np.flatnonzero(~invalid & ~inside)
+    if outside.size:
+        flat_T, flat_RH, flat_out = T_c.ravel(), RH_pct.ravel(), out.reshape(-1)
+        for k in outside:
+            v = _coolprop_point(prop, flat_T[k], flat_RH[k], P, None)
+            if v is not None:
+                flat_out[k] = v / 1000.0 if prop == "H" else 1.0 / v
+    return out
+
+
+def enthalpy(T_c, RH_pct, P=P_ATM, table=None):
+    """Specific enthalpy in kJ/kg; NaN for missing readings (padding is removed by :mod:`quality`)."""
+    T_c = np.asarray(T_c, dtype=float)
+    RH_pct = np.asarray(RH_pct, dtype=float)
+    invalid = np.isnan(T_c) | np.isnan(RH_pct)
+    return _evaluate("H", T_c, RH_pct, P, table, invalid, np.nan)
+
+
+def air_density(T_c, RH_pct, P=P_ATM, table=None):
+    """Density in kg/m3; NaN for missing readings."""
+    T_c = np.asarray(T_c, dtype=float)
+    RH_pct = np.asarray(RH_pct, dtype=float)
+    invalid = np.isnan(T_c) | (T_c <= -273.15) | np.isnan(RH_pct)
+    return _evaluate("V", T_c, RH_pct, P, table, invalid, np.nan)
+
+
+def enthalpy_point(T_c, RH_pct, P=P_ATM):
+    """Exact CoolProp enthalpy in kJ/kg for a single state (e.g. supply air)."""
+    return HAPropsSI("H", "T", T_c + 273.15, "P", P, "R", RH_pct / 100.0) / 1000.0
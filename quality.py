@@ -0,0 +1,188 @@
+"""Data-quality flags computed once at ingestion.
+
+Every row of a dataset gets a bit set of :data:`FLAGS`, computed with
+vectorized comparisons over whole columns:
+
+* ``padding``: an all-zero row at the edge of a long gap. The ``_updated``
+  exports insert such rows (``1/1/2025 0:00,0``, ``2025-01-1T00:00,0,0``)
+  to mark periods outside the sailing schedule;
+* ``duplicate``: an exact repeat of the previous row;
+* ``repeated_time``: same timestamp as the previous row but different values
+  (e.g. the repeated hour at the end of daylight saving). Such rows are kept
+  and averaged by :mod:`resample`;
+* ``out_of_range``: at least one value outside the column's physical range;
+* ``missing``: at least one value is NaN;
+* ``gap_before``: more than ``max_gap`` since the previous usable row.
+
+:func:`clean` turns the flags into usable arrays: padding and duplicate
+rows are dropped and out-of-range values become NaN. :func:`service_mask`
+tells which points of a resampling grid are covered by usable samples, so
+long gaps read as "no data" instead of being interpolated across or
+encoded as zeros. :func:`coverage` summarises the flags per month::
+
+    python quality.py weather_oslo vav_oslo
+"""
+import argparse
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from timeindex import month_label
+
+PADDING, DUPLICATE, REPEATED_TIME, OUT_OF_RANGE, MISSING, GAP_BEFORE = (1 << i for i in range(6))
+FLAGS = {
+    "padding": PADDING, "duplicate": DUPLICATE, "repeated_time": REPEATED_TIME,
+    "out_of_range": OUT_OF_RANGE, "missing": MISSING, "gap_before": GAP_BEFORE,
+}
+# Rows with these flags carry no usable data
+DROP = PADDING | DUPLICATE
+
+
+@dataclass(frozen=True)
+class Rules:
+    # column -> (min, max) of physically possible values
+    ranges: dict = field(default_factory=dict)
+    # Longer intervals between usable samples are gaps
+    max_gap: str = "30min"
+
+
+RULES = {
+    "co2": Rules({"TEMPERATURE": (-10, 50), "HUMIDITY": (0, 100), "CO2_SENSOR": (300, 10_000)}),
+    "flowrate": Rules({"SmartCabin - Supply velocity": (0, 15), "SmartCabin - Supply flowrate": (0, 300)}),
+    "velocity": Rules({"SmartCabin - Supply velocity": (0, 15)}),
+    "weather_oslo": Rules({"temperature": (-50, 50), "relative_humidity": (0, 100)}, max_gap="3h"),
+    "vav_oslo": Rules({"Velocity": (0, 15)}),
+}
+
+
+def _gap_ns(rules):
+    return pd.Timedelta(rules.max_gap).value
+
+
+def flag_rows(times, columns, rules=Rules()):
+    """``uint8`` flags of every row; ``times`` sorted epoch ns, ``columns`` ``{name: values}``."""
+    times = np.asarray(times, dtype=np.int64)
+    values = np.stack([np.asarray(v, dtype=np.float64) for v in columns.values()]) if columns else np.empty((0, len(times)))
+    flags = np.zeros(len(times), dtype=np.uint8)
+    if not len(times):
+        return flags
+
+    nan = np.isnan(values)
+    flags[nan.any(axis=0)] |= MISSING
+    for row, name in enumerate(columns):
+        lo, hi = rules.ranges.get(name, (-np.inf, np.inf))
+        with np.errstate(invalid="ignore"):
+            flags[(values[row] < lo) | (values[row] > hi)] |= OUT_OF_RANGE
+
+    same_time = np.zeros(len(times), dtype=bool)
+    same_time[1:] = times[1:] == times[:-1]
+    same_values = np.zeros(len(times), dtype=bool)
+    same_values[1:] = np.all((values[:, 1:] == values[:, :-1]) | (nan[:, 1:] & nan[:, :-1]), axis=0)
+    flags[same_time & same_values] |= DUPLICATE
+    flags[same_time & ~same_values] |= REPEATED_TIME
+
+    # Padding: all-zero rows next to a gap (all-zero rows inside the data are real readings)
+    gap = _gap_ns(rules)
+    dt = np.diff(times)
+    gap_next = np.append(dt > gap, True)
+    gap_prev = np.insert(dt > gap, 0, True)
+    flags[np.all(values == 0, axis=0) & (gap_prev | gap_next)] |= PADDING
+
+    usable = np.flatnonzero(flags & DROP == 0)
+    if len(usable) > 1:
+        flags[usable[1:][np.diff(times[usable]) > gap]] |= GAP_BEFORE
+    return flags
+
+
+def clean(times, columns, flags, rules=Rules()):
+    """``(times, columns)`` without padding/duplicate rows and with out-of-range values set to NaN."""
+    keep = (np.asarray(flags) & DROP) == 0
+    times = np.asarray(times)[keep]
+    out = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)[keep]
+        lo, hi = rules.ranges.get(name, (-np.inf, np.inf))
+        out[name] = np.where((values >= lo) & (values <= hi), values, np.nan)
+    return times, out
+
+
+def service_mask(times, grid, max_gap):
+    """Grid points within ``max_gap`` of both surrounding samples of ``times`` (sorted epoch ns)."""
+    times = np.asarray(times, dtype=np.int64)
+    grid = np.asarray(grid, dtype=np.int64)
+    if not len(times):
+        return np.zeros(len(grid), dtype=bool)
+    gap = pd.Timedelta(max_gap).value
+    nxt = np.searchsorted(times, grid, side="left")
+    prev = nxt - 1
+    exact = (nxt < len(times)) & (times[np.minimum(nxt, len(times) - 1)] == grid)
+    # Inside the data: the bracketing samples are no further apart than max_gap
+    inside = (prev >= 0) & (nxt < len(times))
+    span = np.where(inside, times[np.minimum(nxt, len(times) - 1)] - times[np.maximum(prev, 0)], np.iinfo(np.int64).max)
+    # Outside the data: within max_gap of the first/last sample
+    before = (nxt == 0) & (times[0] - grid <= gap)
+    after = (nxt == len(times)) & (grid - times[-1] <= gap)
+    return exact | (inside & (span <= gap)) | before | after
+
+
+def coverage(times, flags, rules=Rules()):
+    """Per-month rows, flag counts and the share of the month covered by usable samples."""
+    times = np.asarray(times, dtype=np.int64)
+    flags = np.asarray(flags)
+    if not len(times):
+        return pd.DataFrame(columns=["month", "rows", "usable", *FLAGS, "coverage_pct"])
+    months = times.view("datetime64[ns]").astype("datetime64[M]")
+    first, last = months[0], months[-1]
+    bounds = np.arange(first, last + 2).astype("datetime64[ns]").view(np.int64)
+    month_idx = np.searchsorted(bounds, times, side="right") - 1
+    n_months = len(bounds) - 1
+
+    table = {"month": [month_label(m) for m in np.arange(first, last + 1)],
+             "rows": np.bincount(month_idx, minlength=n_months)}
+    usable = (flags & (DROP | OUT_OF_RANGE | MISSING)) == 0
+    table["usable"] = np.bincount(month_idx, weights=usable, minlength=n_months).astype(np.int64)
+    for name, bit in FLAGS.items():
+        table[name] = np.bincount(month_idx, weights=(flags & bit) != 0, minlength=n_months).astype(np.int64)
+
+    # Covered time: intervals between consecutive usable samples no longer than max_gap, split at month bounds
+    t = times[(flags & DROP) == 0]
+    covered = np.zeros(n_months)
+    if len(t) > 1:
+        start, end = t[:-1], t[1:]
+        ok = end - start <= _gap_ns(rules)
+        start, end = start[ok], end[ok]
+        cum = np.concatenate([[0], np.cumsum(end - start)])
+
+        def covered_until(x):
+            # Total covered ns before instant x
+            k = np.searchsorted(end, x, side="left")
+            partial = np.clip(x - start[np.minimum(k, len(start) - 1)], 0, None) * (k < len(start))
+            return cum[k] + partial
+        covered = np.diff(covered_until(bounds)) if len(start) else covered
+    table["coverage_pct"] = covered / np.diff(bounds) * 100
+    return pd.DataFrame(table)
+
+
+def report(names=None):
+    """:func:`coverage` of datasets from :mod:`datastore`, one block of months per dataset."""
+    import datastore
+
+    frames = []
+    for name in names or datastore.SCHEMAS:
+        times = datastore.load_arrays(name)["Time"]
+        df = coverage(times, datastore.load_flags(name), RULES.get(name, Rules()))
+        df.insert(0, "dataset", name)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-month data coverage and quality flags of the datasets.")
+    parser.add_argument("datasets", nargs="*", help="dataset names (default: all)")
+    args = parser.parse_args(argv)
+    print(report(args.datasets).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Resampling of irregular sensor/weather series onto a regular time grid.
+
+Works on plain arrays: int64 epoch-nanosecond times and one float array per
+column. Duplicate timestamps are averaged with sorted-unique reductions and
+each column is interpolated straight onto the grid with ``np.interp``, so
+no intermediate union-index frames are built. Several sources can be
+aligned onto one shared grid, and :func:`resample_stream` does the same
+over time-ordered chunks with bounded memory.
+
+Grid semantics follow the previous pandas pipeline: a source covers the
+grid from ``floor(first sample)`` to ``ceil(last sample)``; inside that
+span values are linearly interpolated in time, grid points before the
+first valid sample are NaN and points after the last valid sample hold
+that last value. Outside its span a source is NaN.
+"""
+import numpy as np
+import pandas as pd
+
+MIN_FREQ, MAX_FREQ = pd.Timedelta("1min"), pd.Timedelta("1h")
+
+
+def freq_to_ns(freq):
+    """Grid step in nanoseconds; ``freq`` is a pandas offset string like ``'10min'``."""
+    step = pd.Timedelta(freq)
+    if not MIN_FREQ <= step <= MAX_FREQ:
+        raise ValueError(f"Grid resolution must be between {MIN_FREQ} and {MAX_FREQ}, got {freq}")
+    return step.value
+
+
+def make_grid(start, end, step):
+    """Grid from ``floor(start)`` to ``ceil(end)`` (all int64 ns)."""
+    first = start // step * step
+    last = -(-end // step) * step
+    return np.arange(first, last + step, step, dtype=np.int64)
+
+
+def dedupe(times, columns):
+    """Average rows with equal timestamps (NaN-aware); returns sorted unique times."""
+    times = np.asarray(times, dtype=np.int64)
+    if len(times) > 1 and np.any(times[1:] < times[:-1]):
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        columns = {k: np.asarray(v)[order] for k, v in columns.items()}
+    if len(times) < 2 or np.all(times[1:] != times[:-1]):
+        return times, {k: np.asarray(v, dtype=np.float64) for k, v in columns.items()}
+
+    starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+    out = {}
+    for k, v in columns.items():
+        v = np.asarray(v, dtype=np.float64)
+        valid = ~np.isnan(v)
+        sums = np.add.reduceat(np.where(valid, v, 0.0), starts)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[k] = np.where(counts > 0, sums / counts, np.nan)
+    return times[starts], out
+
+
+def interp_column(times, values, grid, span_end=None):
+    """Interpolate one column onto ``grid``; see module docstring for edge handling."""
+    valid = ~np.isnan(values)
+    t, v = times[valid], values[valid]
+    if not len(t):
+        return np.full(len(grid), np.nan)
+    out = np.interp(grid, t, v, left=np.nan, right=v[-1])
+    if span_end is not None:
+        out[grid > span_end] = np.nan
+    return out
+
+
+def to_grid(times, columns, step, grid=None):
+    """Resample one source; the grid defaults to the source's own span."""
+    times, columns = dedupe(times, columns)
+    span_start, span_end = times[0] // step * step, -(-times[-1] // step) * step
+    if grid is None:
+        grid = make_grid(times[0], times[-1], step)
+    out = {}
+    for k, v in columns.items():
+        col = interp_column(times, v, grid, span_end)
+        col[grid < span_start] = np.nan
+        out[k] = col
+    return grid, out
+
+
+def align(sources, freq="10min"):
+    """Resample several sources onto one shared grid without merging frames.
+
+    ``sources`` maps a source name to ``(times, {column: values})``. Column
+    names that appear in more than one source get the source name appended.
+    """
+    step = freq_to_ns(freq)
+    prepared = {name: dedupe(t, cols) for name, (t, cols) in sources.items()}
+    start = min(t[0] for t, _ in prepared.values())
+    end = max(t[-1] for t, _ in prepared.values())
+    grid = make_grid(start, end, step)
+
+    seen = {}
+    for _, cols in prepared.values():
+        for k in cols:
+            seen[k] = seen.get(k, 0) + 1
+    out = {}
+    for name, (t, cols) in prepared.items():
+        _, resampled = to_grid(t, cols, step, grid)
+        for k, v in resampled.items():
+            out[k if seen[k] == 1 else f"{k}_{name}"] = v
+    return grid, out
+
+
+def resample_stream(chunks, freq="10min", grid=None):
+    """Resample a time-ordered stream of ``(times, {column: values})`` chunks.
+
+    Yields ``(grid_times, {column: values})`` segments as soon as they are
+    fully determined. Only the last timestamp group (which may continue in
+    the next chunk) and, per column, the valid samples still needed to
+    bracket unemitted grid points are kept between chunks. Concatenating the
+    segments gives the same result as :func:`to_grid` on the whole series,
+    on the series' own grid or, when ``grid`` is given, on every point of it.
+    """
+    step = freq_to_ns(freq)
+    if grid is not None:
+        grid = np.asarray(grid, dtype=np.int64)
+    held_t, held = None, None
+    buffers = {}        # column -> (times, values) of retained valid samples
+    span_start = next_point = last_time = None
+    span_end = np.iinfo(np.int64).max
+
+    def absorb(times, columns):
+        nonlocal span_start, next_point
+        t_u, cols_u = dedupe(times, columns)
+        if span_start is None:
+            span_start = t_u[0] // step * step
+            next_point = span_start if grid is None else grid[0] if len(grid) else span_start
+        for k, v in cols_u.items():
+            valid = ~np.isnan(v)
+            t_k, v_k = buffers.get(k, (np.empty(0, np.int64), np.empty(0)))
+            buffers[k] = (np.r_[t_k, t_u[valid]], np.r_[v_k, v[valid]])
+        return t_u[-1]
+
+    def emit(upto):
+        nonlocal next_point
+        if grid is None:
+            points = np.arange(next_point, upto + 1, step, dtype=np.int64)
+        else:
+            points = grid[np.searchsorted(grid, next_point):np.searchsorted(grid, upto, side="right")]
+        if not len(points):
+            return None
+        out = {}
+        for k, (t_k, v_k) in buffers.items():
+            col = (np.interp(points, t_k, v_k, left=np.nan, right=v_k[-1]) if len(t_k)
+                   else np.full(len(points), np.nan))
+            col[(points < span_start) | (points > span_end)] = np.nan
+            out[k] = col
+        next_point = points[-1] + (step if grid is None else 1)
+        # Keep only the samples that can still bracket later grid points
+        for k, (t_k, v_k) in buffers.items():
+            first = max(int(np.searchsorted(t_k, next_point, side="right")) - 1, 0)
+            buffers[k] = (t_k[first:], v_k[first:])
+        return points, out
+
+    for times, columns in chunks:
+        times = np.asarray(times, dtype=np.int64)
+        if not len(times):
+            continue
+        if np.any(times[1:] < times[:-1]) or (last_time is not None and times[0] < last_time):
+            raise ValueError("resample_stream needs sorted chunks in time order")
+        last_time = times[-1]
+        columns = {k: np.asarray(v, dtype=np.float64) for k, v in columns.items()}
+        if held_t is not None:
+            times = np.concatenate([held_t, times])
+            columns = {k: np.concatenate([held[k], v]) for k, v in columns.items()}
+        # The last timestamp may continue in the next chunk, so it is held back
+        hold = times == times[-1]
+        held_t, held = times[hold], {k: v[hold] for k, v in columns.items()}
+        if hold.all():
+            continue
+        absorb(times[~hold], {k: v[~hold] for k, v in columns.items()})
+
+        # Grid points past a column's last valid sample need the next chunk
+        ends = [t_k[-1] for t_k, _ in buffers.values() if len(t_k)]
+        if ends:
+            segment = emit(min(ends))
+            if segment is not None:
+                yield segment
+
+    if held_t is None:
+        return
+    span_end = -(-absorb(held_t, held) // step) * step
+    segment = emit(span_end if grid is None else grid[-1] if len(grid) else span_end)
+    if segment is not None:
+        yield segment
+
+
+def frame_to_arrays(df, time_column="Time"):
+    """``(times, {column: values})`` from a frame's time and numeric columns."""
+    times = df[time_column].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    numeric = df.select_dtypes(include=["number"]).columns
+    return times, {c: df[c].to_numpy(dtype=np.float64) for c in numeric}
@@ -0,0 +1,126 @@
+"""Registry of sailing routes and their data sources.
+
+A route names the ``datastore`` datasets that hold its weather, port-call
+schedule and VAV velocity trace. Nothing is read until a route is first
+used; its merged 10-minute grid and :class:`energy.EnergyModel` are then
+kept per route (and per source-file version), so switching routes never
+reloads or resamples data that was already prepared. Both are also stored
+in the on-disk :mod:`artifacts` cache under the hash of the source file
+contents, so other processes load them without touching the CSVs.
+"""
+import threading
+from dataclasses import asdict, dataclass
+
+import artifacts
+import datastore
+import energy
+import profiling
+import quality
+from scenarios import DEFAULT_WINDOWS
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    weather: str = None
+    velocity: str = None
+    # Separate port-call schedule; None when the weather export already follows the schedule
+    schedule: str = None
+
+    @property
+    def available(self):
+        return self.weather is not None and self.velocity is not None
+
+    def sources(self):
+        return tuple(s for s in (self.weather, self.velocity, self.schedule) if s)
+
+
+ROUTES = (
+    Route("Oslo - Honningsvåg - Oslo", weather="weather_oslo", velocity="vav_oslo"),
+    Route("Bergen - Kirkenes - Bergen"),
+)
+
+
+class RouteRegistry:
+    def __init__(self, routes=ROUTES, load_frame=datastore.load_clean_frame, signature=datastore.signature,
+                 digest=artifacts.dataset_digest, cache=None):
+        self._routes = {r.name: r for r in routes}
+        self._load_frame = load_frame
+        self._signature = signature
+        self._digest = digest
+        self._cache = cache or artifacts.default_cache()
+        self._prepared = {}
+        self._lock = threading.Lock()
+
+    def register(self, route):
+        self._routes[route.name] = route
+
+    def names(self):
+        return list(self._routes)
+
+    def get(self, name):
+        try:
+            return self._routes[name]
+        except KeyError:
+            raise KeyError(f"Unknown route '{name}'") from None
+
+    def version(self, name):
+        """Version tag of all source files of a route."""
+        return tuple(self._signature(s) for s in self.get(name).sources())
+
+    def _prepare(self, name):
+        route = self.get(name)
+        if not route.available:
+            raise ValueError(f"No weather/velocity data registered for route '{name}'")
+        version = self.version(name)
+        with self._lock:
+            cached = self._prepared.get(name)
+            if cached is None or cached[0] != version:
+                digests = [self._digest(s) for s in (route.weather, route.velocity)]
+                grid_key = artifacts.make_key("master-grid", digests, energy.GRID_FREQ)
+                with profiling.stage("route grid") as s:
+                    master_df = self._cache.frame(grid_key, lambda: self._build_grid(route))
+                    s.rows = len(master_df)
+                model_key = artifacts.make_key("energy-model", grid_key, energy.P_ATM, energy.DUCT_DIAMETER_M)
+                with profiling.stage("route model", rows=len(master_df)):
+                    arrays = self._cache.arrays(model_key, lambda: energy.EnergyModel(master_df).to_arrays())
+                    model = energy.EnergyModel.from_arrays(arrays, master_df=master_df)
+                cached = (version, master_df, model, model_key)
+                self._prepared[name] = cached
+        return cached
+
+    def _build_grid(self, route):
+        with profiling.stage("load route data") as s:
+            df_w, df_v = self._load_frame(route.weather), self._load_frame(route.velocity)
+            s.rows = len(df_w) + len(df_v)
+        with profiling.stage("resample to grid") as s:
+            # Long gaps in either source stay NaN on the grid instead of being interpolated across
+            max_gaps = [quality.RULES.get(n, quality.Rules()).max_gap for n in (route.weather, route.velocity)]
+            master_df = energy.build_master_grid(df_w, df_v, max_gaps=max_gaps)
+            s.rows = len(master_df)
+        return master_df
+
+    def footprint(self):
+        """``{label: arrays}`` of the route data prepared so far, for :func:`datastore.memory_budget`."""
+        out = {}
+        # No lock: it is held while a route is being prepared, and a snapshot of the dict is enough here
+        for name, (_, master_df, model, _) in list(self._prepared.items()):
+            out[f"{name}: grid"] = master_df
+            out[f"{name}: model"] = {"h_amb": model.h_amb, "density": model.density, "cabin_flow": model.cabin_flow,
+                                     "fan_on": model.fan_on, "weights": model.weights}
+        return out
+
+    def master_grid(self, name):
+        """Merged 10-minute weather/velocity grid of a route."""
+        return self._prepare(name)[1]
+
+    def model(self, name):
+        """Configuration-independent energy model of a route."""
+        return self._prepare(name)[2]
+
+    def evaluate(self, name, config=None, windows=DEFAULT_WINDOWS):
+        """Integrated KPIs of one configuration (see :meth:`energy.EnergyModel.evaluate`), cached on disk."""
+        config = config or energy.EnergyConfig()
+        _, _, model, model_key = self._prepare(name)
+        key = artifacts.make_key("energy-kpis", model_key, asdict(config), [asdict(w) for w in windows])
+        return self._cache.json(key, lambda: model.evaluate(config, windows))
@@ -0,0 +1,71 @@
+"""Heating-window scenarios for the heat-pump model.
+
+A scenario says when the heat pump is allowed to run: a daily clock window
+(harbour mode 08:00-14:00), the full day, or explicit periods such as port
+calls. All scenarios of a run are turned into one boolean matrix
+(scenarios x timesteps), so the heating power is computed once and every
+scenario is integrated in the same matrix product.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def _minute_of_day(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+@dataclass(frozen=True)
+class HeatingWindow:
+    """When heating is active.
+
+    ``start``/``end`` give a daily clock window (inclusive, ``"HH:MM"``; a
+    window with ``start > end`` wraps past midnight). ``periods`` are
+    explicit ``(start, end)`` timestamp pairs. With neither, the window
+    covers the whole day.
+    """
+
+    name: str
+    start: str = None
+    end: str = None
+    periods: tuple = ()
+
+    @classmethod
+    def from_port_calls(cls, name, calls):
+        """Window covering each ``(arrival, departure)`` port call."""
+        return cls(name, periods=tuple((pd.Timestamp(a), pd.Timestamp(d)) for a, d in calls))
+
+    def mask(self, index):
+        index = pd.DatetimeIndex(index)
+        if self.start is None and not self.periods:
+            return np.ones(len(index), dtype=bool)
+
+        mask = np.zeros(len(index), dtype=bool)
+        if self.start is not None:
+            minute = index.hour.to_numpy() * 60 + index.minute.to_numpy() + index.second.to_numpy() / 60
+            lo, hi = _minute_of_day(self.start), _minute_of_day(self.end)
+            mask |= (minute >= lo) & (minute <= hi) if lo <= hi else (minute >= lo) | (minute <= hi)
+
+        if self.periods:
+            times = index.as_unit("ns").asi8
+            bounds = np.array([[pd.Timestamp(a).value, pd.Timestamp(b).value] for a, b in self.periods])
+            lo = np.searchsorted(times, bounds[:, 0], side="left")
+            hi = np.searchsorted(times, bounds[:, 1], side="right")
+            # +1/-1 at the edges of every period, then a running sum marks covered rows
+            edges = np.zeros(len(times) + 1, dtype=np.int64)
+            np.add.at(edges, lo, 1)
+            np.add.at(edges, hi, -1)
+            mask |= np.cumsum(edges[:-1]) > 0
+        return mask
+
+
+HARBOUR = HeatingWindow("harbour", "08:00", "14:00")
+FULL_DAY = HeatingWindow("24h")
+DEFAULT_WINDOWS = (HARBOUR, FULL_DAY)
+
+
+def window_matrix(windows, index):
+    """Boolean matrix with one row per window and one column per timestep."""
+    return np.stack([w.mask(index) for w in windows])
@@ -0,0 +1,256 @@
+"""Live ingestion of Smart Cabin sensor samples.
+
+Samples arrive as text lines ``time,CO2_SENSOR,TEMPERATURE,HUMIDITY,velocity``
+(ISO 8601 time, velocity in m/s) from a tailed file, a local TCP socket or
+the simulated producer used for testing. :class:`StreamIngestor` parses
+them in bulk and writes micro-batches to a :class:`datastore.LiveStore`.
+:class:`LiveView` is the reader side: it loads only segments written since
+its last refresh, feeds them to an incremental monthly rollup and keeps a
+bounded window of recent samples for display.
+
+Run an ingestion process with e.g.::
+
+    python streaming.py simulate --rate 2000
+    python streaming.py tail /var/log/smartcabin.csv
+    python streaming.py socket 127.0.0.1:9009
+    python streaming.py simulate --store .cache/fleet --cabin 4021
+"""
+import argparse
+import io
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from datastore import FleetStore, LiveStore
+from rollup import MonthlyRollup
+
+LIVE_DIR = os.path.join(".cache", "live", "smartcabin")
+LIVE_COLUMNS = ("CO2_SENSOR", "TEMPERATURE", "HUMIDITY", "SmartCabin - Supply velocity")
+FLOW_COLUMN = "SmartCabin - Supply flowrate"
+# Logger conversion from duct velocity [m/s] to supply flowrate [m3/h] (80 mm duct)
+FLOW_PER_VELOCITY = 18.0864
+# Micro-batches written between two compactions of the live store
+COMPACT_EVERY = 32
+# Span of recent samples a LiveView keeps in memory
+LIVE_WINDOW = np.timedelta64(7, "D")
+
+
+def parse_lines(lines):
+    """Parse sample lines into ``{"Time": int64 ns, column: float64}``; bad rows are dropped.
+
+    A row is bad when it has the wrong number of fields, an unparseable time
+    or a non-numeric value; empty fields are kept as NaN.
+    """
+    # Rows with a missing or extra field (truncated writes) would otherwise be padded with NaN
+    lines = [ln for ln in lines if ln.count(",") == len(LIVE_COLUMNS)]
+    if not lines:
+        return {"Time": np.empty(0, dtype=np.int64), **{c: np.empty(0) for c in (*LIVE_COLUMNS, FLOW_COLUMN)}}
+    # Fields are read as text and converted per column, so one corrupt value drops its row instead of the batch
+    df = pd.read_csv(io.StringIO("\n".join(lines)), header=None, names=("Time", *LIVE_COLUMNS), dtype=str)
+    times = pd.to_datetime(df["Time"], format="ISO8601", errors="coerce").to_numpy(dtype="datetime64[ns]")
+    ok = ~np.isnat(times)
+    values = {}
+    for col in LIVE_COLUMNS:
+        values[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        ok &= ~(np.isnan(values[col]) & df[col].notna().to_numpy())
+    arrays = {"Time": times[ok].view(np.int64)}
+    for col in LIVE_COLUMNS:
+        arrays[col] = values[col][ok]
+    arrays[FLOW_COLUMN] = arrays["SmartCabin - Supply velocity"] * FLOW_PER_VELOCITY
+    return arrays
+
+
+# --- Sources: each yields lists of raw lines ---
+
+def tail_file(path, poll=0.5, from_start=False, stop=None):
+    """Follow a file that other processes append lines to."""
+    with open(path, "r", encoding="utf-8") as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = ""
+        while stop is None or not stop.is_set():
+            chunk = f.read(1 << 20)
+            if not chunk:
+                time.sleep(poll)
+                continue
+            lines = (partial + chunk).split("\n")
+            partial = lines.pop()
+            if lines:
+                yield [ln for ln in lines if ln]
+
+
+def socket_source(host, port, stop=None):
+    """Read newline-delimited samples from a TCP socket until it closes."""
+    with socket.create_connection((host, port)) as conn:
+        partial = b""
+        while stop is None or not stop.is_set():
+            data = conn.recv(1 << 16)
+            if not data:
+                break
+            lines = (partial + data).split(b"\n")
+            partial = lines.pop()
+            if lines:
+                yield [ln.decode() for ln in lines if ln]
+
+
+def simulated_producer(rate=1000, duration=None, start="2026-01-01T00:00", interval_s=60, seed=0, stop=None):
+    """Synthetic cabin samples at ``rate`` lines/s, paced in wall-clock time.
+
+    Sample timestamps advance by ``interval_s`` each, so a short run covers
+    days of simulated cabin time. ``duration`` is in wall-clock seconds.
+    """
+    rng = np.random.default_rng(seed)
+    t0 = np.datetime64(start, "s")
+    tick = 0.1
+    per_tick = max(1, int(rate * tick))
+    sent, began = 0, time.monotonic()
+    while (stop is None or not stop.is_set()) and (duration is None or time.monotonic() - began < duration):
+        k = np.arange(sent, sent + per_tick)
+        times = t0 + k * interval_s
+        hour = (k * interval_s / 3600) % 24
+        occupied = (hour < 8) | (hour > 20)
+        co2 = np.where(occupied, 900, 450) + rng.normal(0, 30, per_tick)
+        temp = 21 + rng.normal(0, 0.3, per_tick)
+        rh = 40 + rng.normal(0, 2, per_tick)
+        vel = np.where(occupied, 4.3, 1.2) + rng.normal(0, 0.1, per_tick)
+        yield [f"{t},{c:.0f},{a:.1f},{h:.1f},{v:.2f}" for t, c, a, h, v in zip(times.astype(str), co2, temp, rh, vel)]
+        sent += per_tick
+        time.sleep(max(0.0, began + sent / rate - time.monotonic()))
+
+
+class StreamIngestor:
+    """Buffer parsed samples and write them to the store in micro-batches.
+
+    Every ``compact_every`` batches the store's recent segments are merged,
+    so the number of segment directories readers list stays bounded.
+    """
+
+    def __init__(self, store, batch_size=5000, max_latency=1.0, compact_every=COMPACT_EVERY):
+        self.store = store
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.compact_every = compact_every
+        self._buffer = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._uncompacted = 0
+        self.samples = 0
+
+    def feed_lines(self, lines):
+        self.feed(parse_lines(lines))
+
+    def feed(self, arrays):
+        n = len(arrays["Time"])
+        if n:
+            self._buffer.append(arrays)
+            self._pending += n
+        if self._pending >= self.batch_size or time.monotonic() - self._last_flush >= self.max_latency:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return None
+        batch = {k: np.concatenate([b[k] for b in self._buffer]) for k in self._buffer[0]}
+        order = np.argsort(batch["Time"], kind="stable")
+        batch = {k: v[order] for k, v in batch.items()}
+        self._buffer, self._pending = [], 0
+        self.samples += len(order)
+        seq = self.store.append(batch)
+        self._uncompacted += 1
+        if self.compact_every and self._uncompacted >= self.compact_every:
+            self.store.compact()
+            self._uncompacted = 0
+        return seq
+
+    def run(self, source):
+        try:
+            for lines in source:
+                self.feed_lines(lines)
+        finally:
+            self.flush()
+
+
+class LiveView:
+    """Recent samples of a live store plus its monthly rollup, refreshed incrementally.
+
+    Only the newest ``window`` of samples is held, in time order; everything
+    older is summarized by the rollup. ``samples`` counts all samples read.
+    """
+
+    def __init__(self, store, window=LIVE_WINDOW):
+        self.store = store
+        self.window = np.timedelta64(window, "ns").astype(np.int64)
+        self.cursor = 0
+        self.arrays = {}
+        self.samples = 0
+        self.rollup = MonthlyRollup()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Load segments written since the last call; returns the number of new samples."""
+        with self._lock:
+            new, self.cursor = self.store.read(self.cursor)
+            if not new or not len(new["Time"]):
+                return 0
+            self.rollup.append(new["Time"], new[FLOW_COLUMN])
+            self.samples += len(new["Time"])
+            order = np.argsort(new["Time"], kind="stable")
+            new = {k: np.asarray(v)[order] for k, v in new.items()}
+            if self.arrays:
+                # Late samples are inserted in place, so the window stays sorted without a full sort
+                at = np.searchsorted(self.arrays["Time"], new["Time"], side="right")
+                new = {k: np.insert(self.arrays[k], at, v) for k, v in new.items()}
+            times = new["Time"]
+            lo = np.searchsorted(times, times[-1] - self.window)
+            self.arrays = {k: v[lo:] for k, v in new.items()}
+            return len(order)
+
+    def __len__(self):
+        return len(self.arrays.get("Time", ()))
+
+    def last(self, duration):
+        """Samples within ``duration`` (a numpy timedelta, at most ``window``) of the newest one, in time order."""
+        times = self.arrays["Time"]
+        lo = np.searchsorted(times, times[-1] - np.timedelta64(duration, "ns").astype(np.int64))
+        return {k: v[lo:] for k, v in self.arrays.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest live Smart Cabin samples into the columnar store.")
+    parser.add_argument("source", choices=("simulate", "tail", "socket"))
+    parser.add_argument("target", nargs="?", help="file path for 'tail', HOST:PORT for 'socket'")
+    parser.add_argument("--store", default=LIVE_DIR)
+    parser.add_argument("--cabin", help="write into this cabin's partition of a fleet store at --store")
+    parser.add_argument("--rate", type=float, default=1000, help="samples/s for 'simulate'")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run 'simulate'")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--max-latency", type=float, default=1.0)
+    parser.add_argument("--compact-every", type=int, default=COMPACT_EVERY, help="batches between compactions, 0 to disable")
+    args = parser.parse_args(argv)
+
+    if args.source == "simulate":
+        source = simulated_producer(args.rate, args.duration)
+    elif args.source == "tail":
+        source = tail_file(args.target)
+    else:
+        host, port = args.target.rsplit(":", 1)
+        source = socket_source(host, int(port))
+
+    store = FleetStore(args.store).partition(args.cabin) if args.cabin else LiveStore(args.store)
+    ingestor = StreamIngestor(store, args.batch_size, args.max_latency, args.compact_every)
+    began = time.monotonic()
+    try:
+        ingestor.run(source)
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.monotonic() - began
+    print(f"Ingested {ingestor.samples} samples in {elapsed:.1f} s ({ingestor.samples / max(elapsed, 1e-9):,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
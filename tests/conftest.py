@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def master_df():
+    """Three days of 10-minute weather and duct velocity, with a data gap and a fan-off period."""
+    index = pd.date_range("2025-12-01", periods=3 * 144, freq="10min")
+    hours = np.arange(len(index)) / 6
+    velocity = 3.0 + 1.5 * np.sin(hours / 24 * 2 * np.pi)
+    velocity[100:160] = np.nan
+    velocity[300:330] = 0.0
+    return pd.DataFrame({
+        "temperature": 2.0 + 6.0 * np.sin(hours / 24 * 2 * np.pi),
+        "relative_humidity": np.full(len(index), 80.0),
+        "Velocity": velocity,
+    }, index=index)
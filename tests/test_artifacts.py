@@ -0,0 +1,59 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+
+
+def counted(value):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return value
+    return compute, calls
+
+
+def test_arrays_are_computed_once_and_mapped(tmp_path):
+    cache = artifacts.ArtifactCache(str(tmp_path))
+    compute, calls = counted({"x": np.arange(10.0)})
+    key = artifacts.make_key("test", {"a": 1})
+    first = cache.arrays(key, compute)
+    second = artifacts.ArtifactCache(str(tmp_path)).arrays(key, compute)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first["x"], second["x"])
+    assert isinstance(second["x"], np.memmap)
+
+
+def test_frame_and_json_roundtrip(tmp_path):
+    cache = artifacts.ArtifactCache(str(tmp_path))
+    df = pd.DataFrame({"v": [1.0, 2.0]}, index=pd.date_range("2025-01-01", periods=2, freq="h", name="Time", unit="ns"))
+    cache.frame("f", lambda: df)
+    pd.testing.assert_frame_equal(cache.frame("f", lambda: None), df, check_freq=False)
+    cache.json("j", lambda: {"kwh": 1.5})
+    assert cache.json("j", lambda: None) == {"kwh": 1.5}
+
+
+def test_keys_follow_content(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("a\n1\n")
+    before = artifacts.file_digest(str(path))
+    assert artifacts.make_key("k", before, {"p": 1}) == artifacts.make_key("k", before, {"p": 1})
+    assert artifacts.make_key("k", before, {"p": 1}) != artifacts.make_key("k", before, {"p": 2})
+    path.write_text("a\n2\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert artifacts.file_digest(str(path)) != before
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    data = {"x": np.zeros(1000)}
+    cache = artifacts.ArtifactCache(str(tmp_path), max_bytes=10**9)
+    for key in ("a", "b", "c"):
+        cache.arrays(key, lambda: data)
+        time.sleep(0.01)
+    cache.arrays("a", lambda: data)    # a is now the most recently used
+    cache.max_bytes = 2 * 8500
+    cache.evict()
+    assert sorted(key for _, _, key in cache.entries()) == ["a", "c"]
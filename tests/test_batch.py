@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import batch
+import datastore
+import energy
+
+
+def test_parse_values_and_windows():
+    assert batch.parse_values(["20:61:20", "100"], int) == [20, 40, 60, 100]
+    window = batch.parse_window("night=22:00-06:00")
+    assert (window.name, window.start, window.end) == ("night", "22:00", "06:00")
+    assert batch.parse_window("24h").start is None
+
+
+def test_share_model_keys_by_content(tmp_path, master_df):
+    root = str(tmp_path / "batch")
+    model = energy.EnergyModel(master_df)
+    other = energy.EnergyModel(master_df.assign(Velocity=master_df["Velocity"] * 2))
+    first = batch.share_model(model, root=root)
+    assert batch.share_model(energy.EnergyModel(master_df), root=root) == first
+    assert batch.share_model(other, root=root) != first
+    np.testing.assert_array_equal(datastore._read_entry(first)["cabin_flow"], model.cabin_flow)
+
+
+def test_share_model_evicts_old_entries(tmp_path, master_df):
+    root = str(tmp_path / "batch")
+    model = energy.EnergyModel(master_df)
+    size = sum(a.nbytes for a in model.to_arrays().values())
+    for scale in (1, 2, 3):
+        scaled = energy.EnergyModel(master_df.assign(Velocity=master_df["Velocity"] * scale))
+        batch.share_model(scaled, root=root, max_bytes=int(size * 2.5))
+    assert len(os.listdir(root)) == 2
+
+
+def test_parallel_matches_serial(master_df):
+    model = energy.EnergyModel(master_df)
+    configs = batch.config_table({"num_cabins": [60, 120, 240], "sfp": [2.0, 2.5]})
+    serial = batch.run_batch(model, configs, workers=1)
+    parallel = batch.run_batch(model, configs, workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pytest
+
+import datastore
+import quality
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Empty dataset directory with two schemas in the two timestamp formats, cached under ``tmp_path``."""
+    monkeypatch.setattr(datastore, "DATASET_DIR", str(tmp_path))
+    monkeypatch.setitem(datastore.SCHEMAS, "sensor", datastore.DatasetSchema("sensor.csv", "Time", "%m/%d/%Y %H:%M", ("a", "b")))
+    monkeypatch.setitem(datastore.SCHEMAS, "weather", datastore.DatasetSchema("weather.csv", "Time", "%Y-%m-%dT%H:%M", ("t",)))
+    return str(tmp_path / "cache")
+
+
+def write(name, text):
+    with open(datastore.SCHEMAS[name].path, "w", encoding="utf-8-sig") as f:
+        f.write(text)
+
+
+def ns(*stamps):
+    return np.array(stamps, dtype="datetime64[ns]").view(np.int64)
+
+
+def test_time_formats_per_schema(store):
+    write("sensor", "a,Time,b\n1,7/1/2025 0:05,2\n3,07/01/2025 10:15,4\n")
+    write("weather", "Time,t\n2025-01-1T00:00,0\n2025-01-29T23:00,1.5\n")
+    np.testing.assert_array_equal(datastore.load_arrays("sensor", store)["Time"],
+                                  ns("2025-07-01T00:05", "2025-07-01T10:15"))
+    np.testing.assert_array_equal(datastore.load_arrays("weather", store)["Time"],
+                                  ns("2025-01-01T00:00", "2025-01-29T23:00"))
+
+
+def test_rows_are_sorted_and_stored_compactly(store):
+    write("sensor", "Time,a,b\n7/1/2025 2:00,3,30\n7/1/2025 0:00,1,10\n7/1/2025 1:00,2,20\n")
+    arrays = datastore.load_arrays("sensor", store)
+    np.testing.assert_array_equal(arrays["Time"], ns("2025-07-01T00:00", "2025-07-01T01:00", "2025-07-01T02:00"))
+    np.testing.assert_array_equal(arrays["a"], [1, 2, 3])
+    np.testing.assert_array_equal(arrays["b"], [10, 20, 30])
+    assert arrays["a"].dtype == datastore.VALUE_DTYPE
+    assert isinstance(arrays["a"], np.memmap) and not arrays["a"].flags.writeable
+
+
+def test_validity_masks(store):
+    write("sensor", "Time,a,b\n7/1/2025 0:00,1,\n7/1/2025 0:10,abc,2\n7/1/2025 0:20,3,4\n")
+    valid = datastore.load_validity("sensor", store)
+    arrays = datastore.load_arrays("sensor", store)
+    np.testing.assert_array_equal(valid["a"], [True, False, True])
+    np.testing.assert_array_equal(valid["b"], [False, True, True])
+    for column, mask in valid.items():
+        np.testing.assert_array_equal(mask, ~np.isnan(arrays[column]))
+
+
+def test_duplicates_are_flagged_and_dropped_when_clean(store):
+    write("sensor", "Time,a,b\n7/1/2025 0:00,1,1\n7/1/2025 0:00,1,1\n7/1/2025 0:10,2,2\n")
+    flags = datastore.load_flags("sensor", store)
+    np.testing.assert_array_equal(flags & quality.DUPLICATE != 0, [False, True, False])
+    assert len(datastore.load_frame("sensor", store)) == 3
+    assert len(datastore.load_clean_frame("sensor", store)) == 2
+
+
+def test_editing_the_csv_invalidates_the_cache(store):
+    write("sensor", "Time,a,b\n7/1/2025 0:00,1,1\n")
+    assert len(datastore.load_arrays("sensor", store)["Time"]) == 1
+    old = datastore.signature("sensor")
+    write("sensor", "Time,a,b\n7/1/2025 0:00,1,1\n7/1/2025 0:10,2,2\n")
+    os.utime(datastore.SCHEMAS["sensor"].path, ns=(0, os.stat(datastore.SCHEMAS["sensor"].path).st_mtime_ns + 1))
+    assert datastore.signature("sensor") != old
+    np.testing.assert_array_equal(datastore.load_arrays("sensor", store)["a"], [1, 2])
+    # The entry of the previous version is removed
+    assert [d for d in os.listdir(store) if d.startswith("sensor-")] == [f"sensor-{datastore.signature('sensor')}-v{datastore.CACHE_VERSION}"]
+
+
+def test_memory_budget_reports_mapped_and_derived(store):
+    write("sensor", "Time,a,b\n7/1/2025 0:00,1,1\n7/1/2025 0:10,2,2\n")
+    table = datastore.memory_budget(["sensor"], store, derived={"grid": {"x": np.zeros(100)}}).set_index("dataset")
+    assert table.loc["sensor", "heap_mb"] == 0 and table.loc["sensor", "mapped_mb"] > 0
+    assert table.loc["grid", "heap_mb"] == pytest.approx(800 / 2**20)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import dcvsim
+import energy
+
+
+@pytest.fixture
+def simulator(master_df):
+    model = energy.EnergyModel(master_df)
+    times = master_df.index.as_unit("ns").asi8
+    co2 = 700.0 + 300.0 * np.sin(np.arange(len(times)) / 20)
+    return dcvsim.ReplaySimulator(model, times, co2)
+
+
+def test_backlash_follows_signal_beyond_half_width():
+    out = dcvsim.backlash(np.array([0.0, 10.0, 12.0, 5.0]), [0.0, 10.0])
+    np.testing.assert_array_equal(out[0], [0.0, 10.0, 12.0, 5.0])
+    np.testing.assert_array_equal(out[1], [0.0, 5.0, 7.0, 7.0])
+
+
+def test_control_law_limits():
+    flow = dcvsim.control_law(np.array([500.0, 1000.0, 2000.0]), 800.0, 400.0, 0.25, 100.0)
+    np.testing.assert_allclose(flow, [25.0, 62.5, 100.0])
+
+
+def test_design_flow_controller_matches_baseline(simulator):
+    table = simulator.run(min_flow_frac=1.0, deadband=0.0)
+    row = table.iloc[0]
+    for window in energy.DEFAULT_WINDOWS:
+        assert row[f"heat_{window.name}_saving_pct"] == pytest.approx(0.0, abs=1e-9)
+    # The fan curve draws slightly less than design power at design flow
+    assert row["fan_dcv"] == pytest.approx(row["fan_orig"] * energy.fan_poly(1.0))
+    assert row["fan_saving_pct"] == pytest.approx((1 - energy.fan_poly(1.0)) * 100)
+
+
+def test_flows_count_only_operating_rows(simulator):
+    model = simulator.model
+    flows = np.full(len(model.fan_on), 87.0)
+    out = model.evaluate_flows(flows)
+    masked = model.evaluate_flows(np.where(model.fan_on, flows, 0.0))
+    np.testing.assert_allclose(out["fan_dcv"], masked["fan_dcv"])
+    assert out["fan_dcv"][0] == pytest.approx(model.evaluate()["fan_orig"] * energy.fan_poly(1.0))
+
+
+def test_grid_rows_follow_settings(simulator):
+    table = simulator.run(setpoint=[700, 900], band=[200, 400], grid=True)
+    assert len(table) == 4
+    # A higher setpoint never asks for more air
+    low, high = table[table.setpoint == 700], table[table.setpoint == 900]
+    assert (high["mean_flow_m3h"].to_numpy() <= low["mean_flow_m3h"].to_numpy()).all()
+
+
+def test_mean_flow_covers_operating_rows_only(simulator):
+    params = dcvsim.ControllerParams()
+    row = simulator.run(grid=False).iloc[0]
+    flows = dcvsim.control_law(dcvsim.backlash(simulator.co2, [params.deadband])[0], params.setpoint, params.band,
+                               params.min_flow_frac, energy.EnergyConfig().design_flow_per_cabin)
+    operating = simulator.model.fan_on
+    assert not operating.all()
+    assert row["mean_flow_m3h"] == pytest.approx(flows[operating].mean())
+    assert row["mean_flow_m3h"] != pytest.approx(flows.mean())
@@ -0,0 +1,44 @@
+import numpy as np
+import plotly.graph_objects as go
+
+import downsample
+
+
+def series(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n).astype("datetime64[m]").astype("datetime64[ns]")
+    return x, np.cumsum(rng.normal(size=n))
+
+
+def test_lttb_keeps_endpoints_and_order():
+    x, y = series()
+    idx = downsample.lttb_indices(x, y, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert (np.diff(idx) > 0).all()
+
+
+def test_lttb_short_series_unchanged():
+    x, y = series(100)
+    np.testing.assert_array_equal(downsample.lttb_indices(x, y, 500), np.arange(100))
+
+
+def test_minmax_keeps_every_extreme():
+    x, y = series()
+    idx = downsample.minmax_indices(y, 200)
+    assert y[idx].min() == y.min() and y[idx].max() == y.max()
+    assert len(idx) <= 2 * 200 + 2
+
+
+def test_downsample_drops_nan():
+    x, y = series(1000)
+    y[10:20] = np.nan
+    dx, dy = downsample.downsample(x, y, 100)
+    assert np.isfinite(dy).all() and len(dy) == 100
+
+
+def test_line_trace_is_bounded_scatter():
+    x, y = series(100_000)
+    trace = downsample.line_trace(x, y)
+    assert isinstance(trace, go.Scatter)
+    assert len(trace.y) == downsample.CHART_WIDTH_PX
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from scipy.integrate import simpson
+
+import energy
+from energyindex import EnergyIndex
+
+
+@pytest.fixture
+def model(master_df):
+    return energy.EnergyModel(master_df)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 5, 10, 11, 432])
+def test_simpson_weights_match_scipy(n):
+    y = np.random.default_rng(n).normal(size=n)
+    assert y @ energy.simpson_weights(n, 0.5) == pytest.approx(simpson(y, dx=0.5), abs=1e-12)
+
+
+def test_full_range_matches_evaluate(model):
+    index = EnergyIndex.from_model(model)
+    expected = model.evaluate()
+    for kind, orig, dcv in index.savings():
+        _, orig_col, dcv_col = next(c for c in energy.result_columns() if c[0] == kind)
+        assert orig == pytest.approx(expected[orig_col])
+        assert dcv == pytest.approx(expected[dcv_col])
+
+
+def test_ranges_add_up(model):
+    index = EnergyIndex.from_model(model)
+    split = index.times[len(index.times) // 3]
+    first, second, whole = index.query(end=split), index.query(start=split), index.query()
+    for column in whole:
+        assert first[column] + second[column] == pytest.approx(whole[column])
+
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import energy
+import ensemble
+
+
+@pytest.fixture
+def model(master_df):
+    return energy.EnergyModel(master_df)
+
+
+def test_ensemble_member_zero_matches_evaluate(model):
+    table = ensemble.Ensemble(model, members=4, window_days=1).run()
+    expected = model.evaluate()
+    for column, value in expected.items():
+        assert table[column].iloc[0] == pytest.approx(value)
+
+
+def test_members_are_reproducible_and_keep_inactive_rows(model):
+    ens = ensemble.Ensemble(model, members=4, window_days=1, seed=3)
+    weather, flow = ens.member_rows(2)
+    again = ensemble.Ensemble(model, members=4, window_days=1, seed=3).member_rows(2)
+    np.testing.assert_array_equal(weather, again[0])
+    np.testing.assert_array_equal(flow, again[1])
+    # Rows without flow are never replaced by a drawn day
+    idle = ens.cabin_flow <= 0
+    np.testing.assert_array_equal(flow[idle], np.flatnonzero(idle))
+
+
+def test_analog_days_stay_within_window():
+    targets, pool, counts = ensemble.analog_days(np.ones(30, dtype=bool), window_days=2)
+    for target, row, count in zip(targets, pool, counts):
+        dist = np.abs(row[:count] - target)
+        assert (np.minimum(dist, 30 - dist) <= 2).all()
+
+
+def test_cli_prints_bands_to_stdout(capsys):
+    ensemble.main(["--members", "3"])
+    out, err = capsys.readouterr()
+    assert "measured" in out and "p50" in out
+    assert "measured" not in err and err.startswith("Evaluating 3 members")
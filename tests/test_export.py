@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import energy
+import export
+
+
+@pytest.fixture
+def model(master_df):
+    return energy.EnergyModel(master_df)
+
+
+def test_series_roundtrip_in_batches(model):
+    config = energy.EnergyConfig(num_cabins=120)
+    batches = list(export.series_batches(model, config, batch_rows=100))
+    assert [b.num_rows for b in batches] == [100, 100, 100, 100, 32]
+    table = pq.read_table(io.BytesIO(export.export(model, "series", "parquet", config=config)))
+    assert table.schema.names == export.series_schema().names
+    for column, values in model.power_arrays(config).items():
+        np.testing.assert_allclose(table[column].to_numpy(), values)
+    assert table.schema.metadata[b"num_cabins"] == b"120"
+
+
+def test_kpis_by_month_and_total(master_df):
+    # Span a month boundary
+    master_df.index = master_df.index - np.timedelta64(1, "D")
+    model = energy.EnergyModel(master_df)
+    data = export.export(model, "kpis", "arrow")
+    table = pa.ipc.open_stream(data).read_all().to_pandas()
+    assert list(dict.fromkeys(table["period"])) == ["2025.11", "2025.12", "total"]
+    expected = model.evaluate()
+    total = table[table["period"] == "total"].set_index("kind")
+    for kind, orig, dcv in energy.result_columns():
+        assert total.loc[kind, "baseline_kwh"] == pytest.approx(expected[orig])
+        assert total.loc[kind, "dcv_kwh"] == pytest.approx(expected[dcv])
+    months = table[table["period"] != "total"].groupby("kind")["baseline_kwh"].sum()
+    np.testing.assert_allclose(months.loc[total.index], total["baseline_kwh"], rtol=1e-9)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        export.write(iter([]), export.KPI_SCHEMA, io.BytesIO(), fmt="csv")
+
+
+def test_parse_config():
+    config = export.parse_config({"num_cabins": ["10", "240"], "cop": ["3.5"]})
+    assert config.num_cabins == 240 and config.cop == 3.5
+    assert config.sfp == energy.EnergyConfig().sfp
@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.graph_objects as go
+
+import figures
+
+
+def test_concurrent_counts_add_up():
+    cache = figures.FigureCache()
+    keys = [i % 8 for i in range(400)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda k: cache.payload(k, lambda: go.Figure(go.Scatter(y=[k]))), keys))
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == len(keys)
+    assert stats["entries"] == 8
+
+
+def test_default_cache_is_created_once(monkeypatch):
+    monkeypatch.setattr(figures, "_default", None)
+    with ThreadPoolExecutor(8) as pool:
+        caches = list(pool.map(lambda _: figures.default_cache(), range(32)))
+    assert all(c is caches[0] for c in caches)
+
+
+def test_eviction_keeps_latest_entry():
+    cache = figures.FigureCache(max_bytes=1)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    assert len(cache) == 1 and cache.get("b") is not None and cache.evictions == 1
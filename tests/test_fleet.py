@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import datastore
+import fleet
+from streaming import FLOW_COLUMN
+
+STEP = 10 * 60 * 10**9
+
+
+@pytest.fixture
+def grid():
+    return pd.date_range("2025-12-01", periods=145, freq="10min").as_unit("ns").asi8
+
+
+def write_cabin(root, cabin_id, times, flow):
+    datastore.FleetStore(root).partition(cabin_id).append(
+        {"Time": np.asarray(times, dtype=np.int64), FLOW_COLUMN: np.full(len(times), flow)})
+
+
+def test_average_over_reporting_cabins(tmp_path, grid):
+    root = str(tmp_path / "fleet")
+    write_cabin(root, "a", grid, 50.0)
+    write_cabin(root, "b", grid, 50.0)
+    # Cabin c only covers the first quarter of the window
+    write_cabin(root, "c", grid[:len(grid) // 4], 50.0)
+
+    result = fleet.run_fleet(grid, root, workers=1)
+    assert result.num_cabins == 3
+    assert result.reporting.max() == 3 and result.reporting.min() == 2
+    np.testing.assert_allclose(result.mean_flow, 50.0)
+    covered = result.cabins.set_index("cabin")["coverage"]
+    assert covered["a"] == 1.0 and covered["c"] < 0.3
+
+
+def test_no_reporting_cabin_means_fan_off(tmp_path, grid):
+    root = str(tmp_path / "fleet")
+    write_cabin(root, "a", grid[:72], 40.0)
+    result = fleet.run_fleet(grid, root, workers=1)
+    assert np.isnan(result.mean_flow[100:]).all()
+
+    weather = pd.DataFrame({"temperature": 5.0, "relative_humidity": 80.0},
+                           index=pd.DatetimeIndex(grid.view("datetime64[ns]")))
+    model = fleet.fleet_model(weather, result)
+    assert not model.fan_on[100:].any()
+    np.testing.assert_allclose(model.cabin_flow[:72], 40.0)
+
+
+def test_parallel_matches_serial(tmp_path, grid):
+    root = str(tmp_path / "fleet")
+    for i in range(5):
+        write_cabin(root, f"{i:02d}", grid[i * 10:], 30.0 + i)
+    serial = fleet.run_fleet(grid, root, workers=1)
+    parallel = fleet.run_fleet(grid, root, workers=2, group_size=2)
+    np.testing.assert_allclose(parallel.total_flow, serial.total_flow)
+    np.testing.assert_array_equal(parallel.reporting, serial.reporting)
+
+
+def test_weather_grid_masks_long_gaps():
+    times = pd.to_datetime(["2025-12-01 00:00", "2025-12-01 01:00", "2025-12-01 08:00", "2025-12-01 09:00"])
+    df = pd.DataFrame({"Time": times, "temperature": [1.0, 2.0, 3.0, 4.0], "relative_humidity": 80.0})
+    out = fleet.weather_grid(df, max_gap="3h")
+    assert out.loc["2025-12-01 00:30", "temperature"] == pytest.approx(1.5)
+    assert out.loc["2025-12-01 04:00":"2025-12-01 07:00", "temperature"].isna().all()
+    assert not fleet.weather_grid(df).isna().any().any()
+
+
+def test_segments_stream_like_a_whole_read(tmp_path, grid):
+    partition = datastore.FleetStore(str(tmp_path / "fleet")).partition("a")
+    times = grid[3:120:2] + 7 * 10**9
+    flow = np.linspace(20.0, 60.0, len(times))
+    for lo in range(0, len(times), 17):
+        partition.append({"Time": times[lo:lo + 17], FLOW_COLUMN: flow[lo:lo + 17]})
+
+    streamed, samples = fleet.partition_flow(partition, grid, STEP)
+    arrays, _ = partition.read()
+    _, whole = fleet.resample.to_grid(arrays["Time"], {"flow": arrays[FLOW_COLUMN]}, STEP, grid)
+    assert samples == len(times)
+    np.testing.assert_allclose(streamed, whole["flow"])
+
+
+def test_late_segment_falls_back_to_whole_read(tmp_path, grid):
+    partition = datastore.FleetStore(str(tmp_path / "fleet")).partition("a")
+    partition.append({"Time": grid[60:], FLOW_COLUMN: np.full(len(grid) - 60, 45.0)})
+    partition.append({"Time": grid[:60], FLOW_COLUMN: np.full(60, 45.0)})
+
+    flow, samples = fleet.partition_flow(partition, grid, STEP)
+    assert samples == len(grid)
+    np.testing.assert_allclose(flow, 45.0)
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobExecutor
+
+
+def wait(job, timeout=5):
+    end = time.monotonic() + timeout
+    while not job.done and time.monotonic() < end:
+        time.sleep(0.01)
+    assert job.done
+
+
+def test_running_and_finished_jobs_are_shared():
+    executor = JobExecutor()
+    release, calls = threading.Event(), []
+
+    def compute(x, report):
+        calls.append(x)
+        report(0.5, "Half way")
+        release.wait(5)
+        return x * 2
+
+    job = executor.submit("k", compute, 21)
+    assert executor.submit("k", compute, 21) is job
+    release.set()
+    wait(job)
+    assert (job.status, job.result, job.progress) == ("done", 42, 1.0)
+    assert executor.submit("k", compute, 21) is job
+    assert calls == [21]
+
+
+def test_failed_job_is_retried():
+    executor = JobExecutor()
+    attempts = []
+
+    def flaky(report):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    job = executor.submit("k", flaky)
+    wait(job)
+    assert job.status == "failed" and job.error == "boom" and "RuntimeError" in job.traceback
+    retry = executor.submit("k", flaky)
+    wait(retry)
+    assert retry is not job and retry.result == "ok"
+
+
+def test_only_finished_jobs_are_evicted():
+    executor = JobExecutor(max_workers=2, max_cached=2)
+    release = threading.Event()
+    running = executor.submit("slow", lambda report: release.wait(5))
+    for key in ("a", "b", "c"):
+        wait(executor.submit(key, lambda report: key))
+    assert executor.get("slow") is running
+    assert executor.get("a") is None and executor.get("b") is None
+    assert executor.get("c").done
+    release.set()
+
+
+@pytest.mark.parametrize("progress, expected", [(-1, 0.0), (0.3, 0.3), (7, 1.0)])
+def test_progress_is_clamped(progress, expected):
+    executor = JobExecutor()
+    job = executor.submit("k", lambda report: report(progress, "x"))
+    wait(job)
+    assert job.message == "Done"
+    job.report(progress, "again")
+    assert job.progress == expected
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from CoolProp.HumidAirProp import HAPropsSI
+
+import psychrometrics
+
+
+def reference(prop, T_c, RH_pct):
+    return np.array([HAPropsSI(prop, "T", t + 273.15, "P", psychrometrics.P_ATM, "R", rh / 100.0)
+                     for t, rh in zip(T_c, RH_pct)])
+
+
+@pytest.fixture(scope="module")
+def states():
+    rng = np.random.default_rng(0)
+    return rng.uniform(-30.0, 40.0, 200), rng.uniform(0.0, 100.0, 200)
+
+
+def test_enthalpy_matches_coolprop(states):
+    T_c, RH_pct = states
+    h = psychrometrics.enthalpy(T_c, RH_pct)
+    np.testing.assert_allclose(h, reference("H", T_c, RH_pct) / 1000.0, atol=0.05)
+
+
+def test_density_matches_coolprop(states):
+    T_c, RH_pct = states
+    rho = psychrometrics.air_density(T_c, RH_pct)
+    np.testing.assert_allclose(rho, 1.0 / reference("V", T_c, RH_pct), rtol=1e-4)
+
+
+def test_outside_table_uses_coolprop():
+    h = psychrometrics.enthalpy([55.0], [30.0])
+    assert h[0] == pytest.approx(psychrometrics.enthalpy_point(55.0, 30.0))
+
+
+def test_missing_readings_are_nan():
+    T_c = np.array([np.nan, 5.0, 5.0])
+    RH_pct = np.array([80.0, np.nan, 80.0])
+    for values in (psychrometrics.enthalpy(T_c, RH_pct), psychrometrics.air_density(T_c, RH_pct)):
+        assert np.isnan(values[:2]).all() and np.isfinite(values[2])
+
+
+def test_max_error_bounds_every_cell():
+    table = psychrometrics.PsychroTable(t_step=5.0, rh_step=10.0)
+    h_err, rho_err = table.max_error()
+    rng = np.random.default_rng(1)
+    T_c, RH_pct = rng.uniform(-40.0, 50.0, 300), rng.uniform(0.0, 100.0, 300)
+    assert np.abs(table.enthalpy(T_c, RH_pct) - reference("H", T_c, RH_pct) / 1000.0).max() <= h_err * 1.05
+    rho_ref = 1.0 / reference("V", T_c, RH_pct)
+    assert (np.abs(table.density(T_c, RH_pct) - rho_ref) / rho_ref).max() <= rho_err * 1.05
+
+
+def test_coarse_table_is_rejected():
+    with pytest.raises(ValueError):
+        psychrometrics.get_table(t_step=5.0, rh_step=10.0)
@@ -0,0 +1,50 @@
+import numpy as np
+
+import quality
+
+MIN = 60 * 10**9
+
+
+def test_flags():
+    times = np.array([0, 10, 10, 10, 20, 30, 120, 130]) * MIN
+    values = {"v": np.array([1.0, 2.0, 2.0, 3.0, np.nan, 99.0, 0.0, 5.0])}
+    flags = quality.flag_rows(times, values, quality.Rules({"v": (0, 50)}))
+    has = {name: (flags & bit != 0).tolist() for name, bit in quality.FLAGS.items()}
+    assert has["duplicate"] == [False, False, True, False, False, False, False, False]
+    assert has["repeated_time"] == [False, False, False, True, False, False, False, False]
+    assert has["missing"] == [False, False, False, False, True, False, False, False]
+    assert has["out_of_range"] == [False, False, False, False, False, True, False, False]
+    # The zero row after the 90-minute gap is padding; the gap is flagged on the next usable row
+    assert has["padding"] == [False, False, False, False, False, False, True, False]
+    assert has["gap_before"] == [False, False, False, False, False, False, False, True]
+
+
+def test_zero_readings_inside_data_are_not_padding():
+    times = np.arange(5) * 10 * MIN
+    flags = quality.flag_rows(times, {"v": np.array([1.0, 0.0, 0.0, 1.0, 1.0])})
+    assert not (flags & quality.PADDING).any()
+
+
+def test_clean_drops_rows_and_masks_values():
+    times = np.array([0, 10, 10, 20]) * MIN
+    values = {"v": np.array([1.0, 2.0, 2.0, 99.0])}
+    rules = quality.Rules({"v": (0, 50)})
+    t, cols = quality.clean(times, values, quality.flag_rows(times, values, rules), rules)
+    np.testing.assert_array_equal(t, np.array([0, 10, 20]) * MIN)
+    np.testing.assert_array_equal(cols["v"], [1.0, 2.0, np.nan])
+
+
+def test_service_mask():
+    times = np.array([0, 10, 20, 100]) * MIN
+    grid = np.array([-40, -20, 5, 15, 50, 100, 120, 140]) * MIN
+    mask = quality.service_mask(times, grid, "30min")
+    np.testing.assert_array_equal(mask, [False, True, True, True, False, True, True, False])
+
+
+def test_coverage_splits_at_month_bounds():
+    start = np.datetime64("2025-07-31T23:00", "ns").view(np.int64)
+    times = start + np.arange(0, 121, 10) * MIN
+    table = quality.coverage(times, np.zeros(len(times), dtype=np.uint8))
+    assert table["month"].tolist() == ["2025.07", "2025.08"]
+    assert table["rows"].tolist() == [6, 7]
+    np.testing.assert_allclose(table["coverage_pct"], [100 / (31 * 24 * 60) * 60, 100 / (31 * 24 * 60) * 60])
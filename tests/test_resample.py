@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import resample
+
+MIN = 60 * 10**9
+STEP = resample.freq_to_ns("10min")
+
+
+def irregular(n=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.integers(1, 15, n)) * MIN
+    values = np.sin(np.arange(n) / 50)
+    values[rng.random(n) < 0.05] = np.nan
+    return times, {"a": values, "b": values * 2 + 1}
+
+
+def test_dedupe_averages_equal_timestamps():
+    times, cols = resample.dedupe([2, 1, 1, 3], {"v": [4.0, 1.0, np.nan, 5.0]})
+    np.testing.assert_array_equal(times, [1, 2, 3])
+    np.testing.assert_array_equal(cols["v"], [1.0, 4.0, 5.0])
+
+
+def test_to_grid_interpolates_inside_span():
+    times = np.array([0, 15, 30]) * MIN
+    grid, cols = resample.to_grid(times, {"v": np.array([0.0, 1.5, 3.0])}, STEP)
+    np.testing.assert_array_equal(grid, np.array([0, 10, 20, 30]) * MIN)
+    np.testing.assert_allclose(cols["v"], [0.0, 1.0, 2.0, 3.0])
+
+
+def test_to_grid_edges():
+    times = np.array([5, 25]) * MIN
+    grid, cols = resample.to_grid(times, {"v": np.array([1.0, 3.0])}, STEP)
+    # Before the first sample is NaN, after the last holds the last value
+    np.testing.assert_array_equal(grid, np.array([0, 10, 20, 30]) * MIN)
+    np.testing.assert_allclose(cols["v"], [np.nan, 1.5, 2.5, 3.0])
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 100, 5_000])
+def test_stream_matches_to_grid(chunk):
+    times, cols = irregular()
+    grid, expected = resample.to_grid(times, cols, STEP)
+    chunks = ((times[i:i + chunk], {k: v[i:i + chunk] for k, v in cols.items()}) for i in range(0, len(times), chunk))
+    segments = list(resample.resample_stream(chunks, "10min"))
+    np.testing.assert_array_equal(np.concatenate([g for g, _ in segments]), grid)
+    for k in cols:
+        np.testing.assert_allclose(np.concatenate([s[k] for _, s in segments]), expected[k])
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 5_000])
+@pytest.mark.parametrize("shift", [-50 * STEP, 0, 7 * MIN])
+def test_stream_onto_given_grid(chunk, shift):
+    times, cols = irregular()
+    # A shared grid that starts before and ends after the source, not aligned to its own grid
+    grid = np.arange(times[0] + shift, times[-1] + 80 * STEP, STEP)
+    _, expected = resample.to_grid(times, cols, STEP, grid)
+    chunks = ((times[i:i + chunk], {k: v[i:i + chunk] for k, v in cols.items()}) for i in range(0, len(times), chunk))
+    segments = list(resample.resample_stream(chunks, "10min", grid))
+    np.testing.assert_array_equal(np.concatenate([g for g, _ in segments]), grid)
+    for k in cols:
+        np.testing.assert_allclose(np.concatenate([s[k] for _, s in segments]), expected[k])
+
+
+def test_stream_rejects_unordered_chunks():
+    chunks = [(np.array([10, 20]) * MIN, {"v": np.ones(2)}), (np.array([5]) * MIN, {"v": np.ones(1)})]
+    with pytest.raises(ValueError):
+        list(resample.resample_stream(chunks))
+    with pytest.raises(ValueError):
+        list(resample.resample_stream([(np.array([20, 10]) * MIN, {"v": np.ones(2)})]))
+
+
+def test_align_renames_shared_columns_and_masks_outside_span():
+    a = (np.array([0, 60]) * MIN, {"t": np.array([0.0, 6.0]), "x": np.array([1.0, 1.0])})
+    b = (np.array([30, 90]) * MIN, {"t": np.array([3.0, 9.0])})
+    grid, cols = resample.align({"a": a, "b": b})
+    assert set(cols) == {"t_a", "t_b", "x"}
+    assert grid[0] == 0 and grid[-1] == 90 * MIN
+    assert np.isnan(cols["t_a"][grid > 60 * MIN]).all()
+    assert np.isnan(cols["t_b"][grid < 30 * MIN]).all()
+
+
+def test_freq_bounds():
+    with pytest.raises(ValueError):
+        resample.freq_to_ns("30s")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import rollup
+
+
+def series(seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.arange(np.datetime64("2025-07-20", "ns"), np.datetime64("2025-10-05", "ns"), np.timedelta64(10, "m"))
+    flow = rng.uniform(20.0, 77.0, len(times))
+    flow[rng.random(len(times)) < 0.02] = np.nan
+    # A day without data is counted at design flow
+    gap = (times >= np.datetime64("2025-08-10")) & (times < np.datetime64("2025-08-11"))
+    return times[~gap], flow[~gap]
+
+
+def assert_same(a, b):
+    assert a.months() == b.months()
+    for label in a.months():
+        for field in ("orig", "dcv", "save", "samples"):
+            assert a.get(label)[field] == pytest.approx(b.get(label)[field])
+
+
+@pytest.mark.parametrize("parts", [2, 13])
+def test_incremental_matches_recompute(parts):
+    times, flow = series()
+    full = rollup.MonthlyRollup.from_series(times, flow)
+    incremental = rollup.MonthlyRollup()
+    for t, q in zip(np.array_split(times, parts), np.array_split(flow, parts)):
+        incremental.append(t, q)
+    assert_same(incremental, full)
+
+
+def test_late_samples_are_merged():
+    times, flow = series()
+    order = np.random.default_rng(1).permutation(len(times))
+    incremental = rollup.MonthlyRollup()
+    for idx in np.array_split(order, 5):
+        incremental.append(times[idx], flow[idx])
+    assert_same(incremental, rollup.MonthlyRollup.from_series(times, flow))
+
+
+def test_gaps_count_at_design_flow():
+    start = np.datetime64("2025-09-01T00:00", "ns")
+    times = start + np.array([0, 10, 20]) * np.timedelta64(1, "m")
+    volume = rollup.integrate_volume(times.view(np.int64), np.full(3, 10.0),
+                                     int(start.view(np.int64)), int((start + np.timedelta64(2, "h")).view(np.int64)))
+    # 20 minutes at the measured 10 m3/h, the remaining 100 minutes at design flow
+    assert volume == pytest.approx(10.0 / 3 + rollup.DESIGN_FLOW_M3H * 100 / 60)
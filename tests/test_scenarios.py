@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from scenarios import DEFAULT_WINDOWS, FULL_DAY, HARBOUR, HeatingWindow, window_matrix
+
+INDEX = pd.date_range("2025-07-01", periods=48, freq="30min")
+
+
+def hours(mask):
+    return sorted(set((INDEX[mask].hour + INDEX[mask].minute / 60).tolist()))
+
+
+def test_clock_window_is_inclusive():
+    assert hours(HARBOUR.mask(INDEX)) == [h / 2 for h in range(16, 29)]
+    assert FULL_DAY.mask(INDEX).all()
+
+
+def test_window_wrapping_midnight():
+    night = HeatingWindow("night", "22:00", "02:00")
+    assert hours(night.mask(INDEX)) == [0.0, 0.5, 1.0, 1.5, 2.0, 22.0, 22.5, 23.0, 23.5]
+
+
+def test_port_calls():
+    port = HeatingWindow.from_port_calls("port", [("2025-07-01 03:00", "2025-07-01 04:00"),
+                                                  ("2025-07-01 03:30", "2025-07-01 05:00"),
+                                                  ("2025-07-01 20:00", "2025-07-01 20:00")])
+    assert hours(port.mask(INDEX)) == [3.0, 3.5, 4.0, 4.5, 5.0, 20.0]
+
+
+def test_window_matrix():
+    matrix = window_matrix(DEFAULT_WINDOWS, INDEX)
+    assert matrix.shape == (2, len(INDEX))
+    np.testing.assert_array_equal(matrix[0], HARBOUR.mask(INDEX))
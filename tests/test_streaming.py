@@ -0,0 +1,160 @@
+import threading
+
+import numpy as np
+import pytest
+
+import datastore
+import rollup
+import streaming
+
+GOOD = [
+    "2026-01-01T00:00,450,21.0,40.0,1.20",
+    "2026-01-01T00:01,460,21.1,40.5,1.30",
+]
+
+
+def test_parse_lines():
+    arrays = streaming.parse_lines(GOOD)
+    assert arrays["Time"].dtype == np.int64 and len(arrays["Time"]) == 2
+    np.testing.assert_allclose(arrays["CO2_SENSOR"], [450, 460])
+    np.testing.assert_allclose(arrays[streaming.FLOW_COLUMN], np.array([1.2, 1.3]) * streaming.FLOW_PER_VELOCITY)
+
+
+def test_malformed_lines_are_dropped():
+    lines = [
+        GOOD[0],
+        "2026-01-01T00:01,abc,21.1,40.5,1.30",      # non-numeric value
+        "not-a-time,450,21.0,40.0,1.20",            # bad timestamp
+        "2026-01-01T00:02,450,21.0",                # missing fields
+        "2026-01-01T00:03,450,21.0,40.0,1.2,9,9",   # extra fields
+        "2026-01-01T00:04,470,,41.0,1.25",          # empty field: kept as NaN
+        GOOD[1],
+    ]
+    arrays = streaming.parse_lines(lines)
+    np.testing.assert_allclose(arrays["CO2_SENSOR"], [450, 470, 460])
+    assert np.isnan(arrays["TEMPERATURE"][1])
+
+
+def test_empty_batch():
+    arrays = streaming.parse_lines(["", "  "])
+    assert all(len(v) == 0 for v in arrays.values())
+
+
+def test_ingestor_survives_corrupt_line(tmp_path):
+    store = datastore.LiveStore(str(tmp_path / "live"))
+    ingestor = streaming.StreamIngestor(store, batch_size=2, max_latency=60)
+    ingestor.run(iter([[GOOD[0]], ["2026-01-01T00:01,abc,21.1,40.5,1.30"], [GOOD[1]]]))
+    arrays, _ = store.read()
+    assert ingestor.samples == 2
+    np.testing.assert_allclose(arrays["CO2_SENSOR"], [450, 460])
+
+
+def test_live_view_rollup_matches_recompute(tmp_path):
+    store = datastore.LiveStore(str(tmp_path / "live"))
+    lines = next(streaming.simulated_producer(rate=2000, interval_s=600))
+    view = streaming.LiveView(store)
+    for chunk in (lines[:50], lines[50:120], lines[120:]):
+        store.append(streaming.parse_lines(chunk))
+        view.refresh()
+    assert len(view) == len(lines)
+    full = rollup.MonthlyRollup.from_series(view.arrays["Time"], view.arrays[streaming.FLOW_COLUMN])
+    for month in full.months():
+        for key in ("orig", "dcv", "save"):
+            assert view.rollup.get(month)[key] == pytest.approx(full.get(month)[key])
+
+
+def test_read_survives_concurrent_compaction(tmp_path):
+    store = datastore.LiveStore(str(tmp_path / "live"))
+    lines = next(streaming.simulated_producer(rate=4000, interval_s=60))
+    stop = threading.Event()
+
+    def compact_repeatedly():
+        while not stop.is_set():
+            store.compact()
+
+    reader = datastore.LiveStore(store.root)
+    seen, cursor = [], 0
+    compactor = threading.Thread(target=compact_repeatedly)
+    compactor.start()
+    try:
+        for chunk in np.array_split(np.arange(len(lines)), 40):
+            store.append(streaming.parse_lines([lines[i] for i in chunk]))
+            arrays, cursor = reader.read(cursor)
+            if arrays:
+                seen.append(arrays["Time"])
+    finally:
+        stop.set()
+        compactor.join()
+    arrays, cursor = reader.read(cursor)
+    if arrays:
+        seen.append(arrays["Time"])
+    np.testing.assert_array_equal(np.concatenate(seen), streaming.parse_lines(lines)["Time"])
+
+
+def test_second_writer_never_overwrites_or_drops(tmp_path):
+    first, second = (datastore.LiveStore(str(tmp_path / "live")) for _ in range(2))
+    a, b = (streaming.parse_lines([line]) for line in GOOD)
+    assert first.append(a) == 0
+    # The second writer was opened before the first one wrote, so its own counter is stale
+    assert second.append(b) == 1
+    first.compact()
+    assert first.append(b) == 2
+    arrays, next_seq = datastore.LiveStore(first.root).read()
+    assert next_seq == 3
+    np.testing.assert_allclose(arrays["CO2_SENSOR"], [450, 460, 460])
+
+
+def test_taken_segment_name_is_not_success(tmp_path):
+    store = datastore.LiveStore(str(tmp_path / "live"))
+    arrays = datastore.compact_arrays(streaming.parse_lines(GOOD))
+    entry = str(tmp_path / "live" / "seg-0000000000-0000000000")
+    datastore._write_entry(entry, arrays)
+    with pytest.raises(FileExistsError):
+        datastore._write_entry(entry, arrays, exist_ok=False)
+    assert store.append(streaming.parse_lines(GOOD)) == 1
+
+
+def test_ingestor_compacts_the_store(tmp_path):
+    store = datastore.LiveStore(str(tmp_path / "live"))
+    lines = next(streaming.simulated_producer(rate=2000, interval_s=60))
+    ingestor = streaming.StreamIngestor(store, batch_size=10, max_latency=60, compact_every=4)
+    ingestor.run(iter([lines[i:i + 10] for i in range(0, len(lines), 10)]))
+    assert len(store._segments()) < 4
+    arrays, next_seq = store.read()
+    assert next_seq == -(-len(lines) // 10)
+    np.testing.assert_array_equal(arrays["Time"], streaming.parse_lines(lines)["Time"])
+
+
+def test_compaction_keeps_full_segments(tmp_path):
+    store = datastore.LiveStore(str(tmp_path / "live"))
+    lines = next(streaming.simulated_producer(rate=2000, interval_s=60))
+    for i in range(0, 100, 10):
+        store.append(streaming.parse_lines(lines[i:i + 10]))
+    assert store.compact(max_rows=30) == 10
+    for i in range(100, 140, 10):
+        store.append(streaming.parse_lines(lines[i:i + 10]))
+    # The merged 100-row segment is full, so only the four new ones are rewritten
+    assert store.compact(max_rows=30) == 4
+    assert [s[:2] for s in store._segments()] == [(0, 9), (10, 13)]
+    arrays, _ = store.read(5)
+    np.testing.assert_array_equal(arrays["Time"], streaming.parse_lines(lines[50:140])["Time"])
+
+
+def test_live_view_keeps_a_sorted_window(tmp_path):
+    store = datastore.LiveStore(str(tmp_path / "live"))
+    arrays = streaming.parse_lines(next(streaming.simulated_producer(rate=2000, interval_s=600)))
+    view = streaming.LiveView(store, window=np.timedelta64(12, "h"))
+    # Batches arrive out of order across refreshes
+    for idx in (np.arange(0, 100), np.arange(150, 200), np.arange(100, 150)):
+        store.append({k: v[idx] for k, v in arrays.items()})
+        view.refresh()
+    times = view.arrays["Time"]
+    assert view.samples == 200
+    assert (np.diff(times) >= 0).all()
+    np.testing.assert_array_equal(times, arrays["Time"][200 - len(times):])
+    assert times[-1] - times[0] <= np.timedelta64(12, "h").astype("timedelta64[ns]").astype(np.int64)
+    recent = view.last(np.timedelta64(1, "h"))
+    assert len(recent["Time"]) == 7
+    # The rollup still covers every sample, not just the window
+    full = rollup.MonthlyRollup.from_series(arrays["Time"], arrays[streaming.FLOW_COLUMN])
+    assert view.rollup.get(full.months()[0])["dcv"] == pytest.approx(full.get(full.months()[0])["dcv"])
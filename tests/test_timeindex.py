@@ -0,0 +1,38 @@
+import numpy as np
+
+from timeindex import TimeIndex, month_label, to_epoch_ns
+
+
+def index():
+    times = np.array(["2025-07-30T12:00", "2025-07-31T23:59", "2025-08-01T00:00", "2025-08-15T06:00",
+                      "2025-10-02T00:00"], dtype="datetime64[ns]")
+    return TimeIndex(times)
+
+
+def test_months_skip_empty_ones():
+    ti = index()
+    assert ti.months() == ["2025.07", "2025.08", "2025.10"]
+    assert ti.month("2025.08") == slice(2, 4)
+    assert ti.month("2025.09") == slice(0, 0)
+
+
+def test_between_is_half_open():
+    ti = index()
+    assert ti.between("2025-07-31T23:59", "2025-08-15T06:00") == slice(1, 3)
+    assert ti.between(end="2025-07-01") == slice(0, 0)
+    assert ti.between("2025-08-01") == slice(2, 5)
+    assert ti.between("2025-09-01", "2025-08-01") == slice(4, 4)
+
+
+def test_between_matches_mask():
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.integers(0, 10**15, 1000))
+    ti = TimeIndex(times)
+    for start, end in rng.integers(0, 10**15, (20, 2)):
+        rows = ti.between(start.view("datetime64[ns]"), end.view("datetime64[ns]"))
+        np.testing.assert_array_equal(times[rows], times[(times >= start) & (times < end)])
+
+
+def test_labels_and_conversion():
+    assert month_label(np.datetime64("2025-12-31T23:00")) == "2025.12"
+    assert to_epoch_ns("1970-01-01T00:00:01") == 10**9
@@ -0,0 +1,54 @@
+"""Range lookups over sorted timestamp arrays.
+
+Datasets are sorted by time when they are cached, so any calendar month or
+arbitrary ``[start, end)`` window maps to a contiguous row range found with
+two binary searches. Slicing a frame or array with that range does not copy.
+"""
+import numpy as np
+
+
+def to_epoch_ns(value):
+    """Convert a timestamp-like scalar or array to int64 epoch nanoseconds."""
+    return np.asarray(value, dtype="datetime64[ns]").view(np.int64)
+
+
+def month_label(month):
+    return str(np.datetime64(month, "M")).replace("-", ".")
+
+
+class TimeIndex:
+    """Row-offset index over a sorted int64 (epoch ns) time column."""
+
+    def __init__(self, times):
+        times = np.asarray(times)
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype("datetime64[ns]").view(np.int64)
+        self.times = times
+        self._months = self._build_months()
+
+    def __len__(self):
+        return len(self.times)
+
+    def _build_months(self):
+        if not len(self.times):
+            return {}
+        first, last = self.times[[0, -1]].view("datetime64[ns]").astype("datetime64[M]")
+        bounds = np.arange(first, last + 2).astype("datetime64[ns]").view(np.int64)
+        offsets = np.searchsorted(self.times, bounds, side="left")
+        return {month_label(m): slice(int(lo), int(hi))
+                for m, lo, hi in zip(np.arange(first, last + 1), offsets[:-1], offsets[1:])
+                if hi > lo}
+
+    def months(self):
+        """Labels (``YYYY.MM``) of all months that contain data, in order."""
+        return list(self._months)
+
+    def month(self, label):
+        """Row slice for month ``label``; empty if the month has no data."""
+        return self._months.get(label, slice(0, 0))
+
+    def between(self, start=None, end=None):
+        """Row slice covering ``start <= t < end``; either bound may be open."""
+        lo = 0 if start is None else int(np.searchsorted(self.times, to_epoch_ns(start), side="left"))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, to_epoch_ns(end), side="left"))
+        return slice(lo, max(lo, hi))